@@ -1,13 +1,19 @@
 """
 缓存模块，用于缓存频繁请求的数据
 """
+import asyncio
 import time
-import hashlib
-import json
 from functools import wraps
-from typing import Dict, Any, Callable, Optional, List
+from typing import Dict, Any, Callable, Optional, List, Iterable, Set, Tuple, Union
 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal, primary_reads, reading_own_writes
 from app.services.unified_cache_service import UnifiedCacheService
+from app.services.single_flight import LOCK_KEY_PREFIX, SingleFlight
+from app.utils.cache_utils import CacheKeyBuilder, to_snapshot
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -15,42 +21,161 @@ logger = get_logger(__name__)
 # 兼容旧代码的内存缓存存储
 _cache: Dict[str, Dict[str, Any]] = {}
 
-def cache(ttl_seconds: int = 60, prefix: str = None):
+# stale-while-revalidate 条目的包装字段：缓存值及其新鲜截止时间（Unix 时间戳）
+SWR_VALUE_FIELD = "__swr_value__"
+SWR_FRESH_UNTIL_FIELD = "__swr_fresh_until__"
+
+# 正在后台刷新的缓存键，以及刷新任务的强引用（避免任务在完成前被垃圾回收）
+_refreshing_keys: Set[str] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+def _wrap_stale(value: Any, ttl_seconds: int) -> Dict[str, Any]:
+    """包装缓存值，记录其新鲜截止时间"""
+    return {SWR_VALUE_FIELD: value, SWR_FRESH_UNTIL_FIELD: time.time() + ttl_seconds}
+
+def _unwrap_stale(entry: Any) -> Tuple[Any, bool]:
+    """拆开缓存条目，返回 (缓存值, 是否仍然新鲜)；非包装条目视为新鲜"""
+    if isinstance(entry, dict) and SWR_VALUE_FIELD in entry:
+        return entry[SWR_VALUE_FIELD], time.time() < entry.get(SWR_FRESH_UNTIL_FIELD, 0)
+    return entry, True
+
+def _with_own_sessions(
+    args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Tuple[Tuple[Any, ...], Dict[str, Any], List[Union[Session, AsyncSession]]]:
+    """
+    将参数中的数据库会话（同步或异步）替换为新建的会话
+
+    后台刷新在响应返回之后执行，请求注入的会话此时已被 get_db / get_async_db 关闭。
+    """
+    sessions: List[Union[Session, AsyncSession]] = []
+
+    def replace(value: Any) -> Any:
+        if isinstance(value, (Session, AsyncSession)):
+            session = AsyncSessionLocal() if isinstance(value, AsyncSession) else SessionLocal()
+            sessions.append(session)
+            return session
+        return value
+
+    new_args = tuple(replace(value) for value in args)
+    new_kwargs = {name: replace(value) for name, value in kwargs.items()}
+    return new_args, new_kwargs, sessions
+
+def cache(
+    ttl_seconds: int = 60,
+    prefix: str = None,
+    key_params: Optional[Iterable[str]] = None,
+    tags: Optional[Iterable[str]] = None,
+    stale_while_revalidate: int = 0
+):
     """
     缓存装饰器，用于缓存函数返回值
 
+    缓存键跳过数据库会话和 Depends 注入的依赖，缓存值保存为可序列化的快照。
+    同一缓存键并发未命中时只计算一次（进程内共享 Future，跨 worker 使用 Redis 锁）。
+    配置了只读副本时，未命中和后台刷新的计算读取主库；客户端刚写入过的请求
+    （db_last_write）不读取缓存。
+    每个条目都带有与前缀同名的标签，可通过 clear_cache_by_prefix 或
+    invalidate_cache_tags 失效。
+
+    设置 stale_while_revalidate 后，条目过期后的这段时间内仍直接返回旧值，
+    同时在后台任务中重新计算；超过 ttl_seconds + stale_while_revalidate 的条目
+    不再返回，由请求同步计算。
+
     Args:
         ttl_seconds: 缓存有效期（秒）
         prefix: 缓存键前缀，如果为 None，则使用函数名
+        key_params: 参与缓存键计算的参数名，如果为 None，则使用除注入依赖外的全部参数
+        tags: 附加标签，支持使用参数格式化，如 "article:{article_id}"
+        stale_while_revalidate: 过期后允许返回旧值的最长时间（秒），0 表示不启用
     """
     def decorator(func: Callable):
+        key_builder = CacheKeyBuilder(prefix or func.__name__, func, key_params, tags)
+        storage_ttl = ttl_seconds + stale_while_revalidate
+
+        async def store(cache_key: str, cache_tags: List[str], result: Any) -> Any:
+            """写入缓存，返回写入的条目"""
+            entry = _wrap_stale(result, ttl_seconds) if stale_while_revalidate else result
+            await UnifiedCacheService.aset(cache_key, entry, storage_ttl, cache_tags)
+            return entry
+
+        async def refresh(cache_key: str, cache_tags: List[str], args, kwargs) -> None:
+            """后台重新计算过期条目"""
+            # 其他 worker 正在刷新时直接跳过，继续返回旧值
+            lock_name = f"{LOCK_KEY_PREFIX}{cache_key}"
+            token = await UnifiedCacheService.aacquire_lock(lock_name, settings.CACHE_LOCK_TTL_MS)
+            if token is None:
+                return
+
+            args, kwargs, sessions = _with_own_sessions(args, kwargs)
+            try:
+                with primary_reads():
+                    result = to_snapshot(await func(*args, **kwargs))
+                await store(cache_key, cache_tags, result)
+                logger.debug(f"Revalidated stale cache entry {cache_key}")
+            except Exception as e:
+                # 刷新失败时保留旧值，直到超过最长陈旧时间
+                logger.error(f"Error revalidating cache entry {cache_key}: {e}")
+            finally:
+                for session in sessions:
+                    if isinstance(session, AsyncSession):
+                        await session.close()
+                    else:
+                        session.close()
+                await UnifiedCacheService.arelease_lock(lock_name, token)
+
+        def schedule_refresh(cache_key: str, cache_tags: List[str], args, kwargs) -> None:
+            """为过期条目启动后台刷新，同一缓存键同时只有一个刷新任务"""
+            if cache_key in _refreshing_keys:
+                return
+            _refreshing_keys.add(cache_key)
+
+            task = asyncio.get_running_loop().create_task(refresh(cache_key, cache_tags, args, kwargs))
+            _refresh_tasks.add(task)
+
+            def done(finished: asyncio.Task) -> None:
+                _refresh_tasks.discard(finished)
+                _refreshing_keys.discard(cache_key)
+
+            task.add_done_callback(done)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # 生成缓存键
-            key_prefix = prefix or func.__name__
-
-            # 将参数转换为字符串
-            args_str = json.dumps(args, sort_keys=True, default=str)
-            kwargs_str = json.dumps(kwargs, sort_keys=True, default=str)
+            # 生成缓存键和标签
+            cache_key, cache_tags = key_builder.build_entry(args, kwargs)
 
-            # 创建哈希
-            key_hash = hashlib.md5(f"{key_prefix}:{args_str}:{kwargs_str}".encode()).hexdigest()
-            cache_key = f"{key_prefix}:{key_hash}"
+            # 客户端刚写入过时不读取缓存，也不与其他请求合并计算，直接从主库读取并更新缓存
+            if reading_own_writes():
+                with primary_reads():
+                    entry = await store(cache_key, cache_tags, to_snapshot(await func(*args, **kwargs)))
+                return _unwrap_stale(entry)[0]
 
             # 尝试从缓存获取
-            cached_result = UnifiedCacheService.get(cache_key)
+            cached_result = await UnifiedCacheService.aget(cache_key)
             if cached_result is not None:
-                logger.debug(f"Cache hit for {cache_key}")
-                return cached_result
-
-            # 执行原始函数
+                if not stale_while_revalidate:
+                    logger.debug(f"Cache hit for {cache_key}")
+                    return cached_result
+
+                value, fresh = _unwrap_stale(cached_result)
+                if fresh:
+                    logger.debug(f"Cache hit for {cache_key}")
+                else:
+                    logger.debug(f"Serving stale cache entry {cache_key}")
+                    schedule_refresh(cache_key, cache_tags, args, kwargs)
+                return value
+
+            # 执行原始函数；并发的未命中合并为一次计算
             logger.debug(f"Cache miss for {cache_key}")
-            result = await func(*args, **kwargs)
 
-            # 缓存结果
-            UnifiedCacheService.set(cache_key, result, ttl_seconds)
+            async def load():
+                # 缓存结果；写入缓存的结果从主库读取，不使用副本的旧数据
+                with primary_reads():
+                    result = to_snapshot(await func(*args, **kwargs))
+                return await store(cache_key, cache_tags, result)
 
-            return result
+            # 其他 worker 写入的条目同样是包装后的形式
+            entry = await SingleFlight.run(cache_key, load)
+            return _unwrap_stale(entry)[0] if stale_while_revalidate else entry
         return wrapper
     return decorator
 
@@ -75,7 +200,14 @@ def clear_cache_by_prefix(prefix: str):
     for key in keys_to_delete:
         del _cache[key]
 
-    # 清除统一缓存中的匹配项
-    redis_keys = UnifiedCacheService.get_keys(f"{prefix}:*")
-    for key in redis_keys:
-        UnifiedCacheService.delete(key)
+    # 缓存装饰器写入的条目都带有与前缀同名的标签，按标签失效无需扫描键空间
+    UnifiedCacheService.invalidate_tags(prefix)
+
+def invalidate_cache_tags(*tags: str):
+    """
+    按标签清除缓存（同时通知其他 worker 清理本地缓存）
+
+    Args:
+        tags: 缓存标签，如 "stats"、"article:42"
+    """
+    UnifiedCacheService.invalidate_tags(*tags)
@@ -1,24 +1,195 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
 
 from app.core.config import settings
 
+# 同步驱动对应的异步驱动
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Async driver URL for a sync DATABASE_URL (same server, database and options)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def _engine_options(url: str, pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    """Pool and charset options for MySQL; SQLite (local testing) uses the driver defaults."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": 10,                      # Connection timeout in seconds
+        "connect_args": {"charset": "utf8mb4"},  # Support for Emoji characters
+    }
+
+def _create_engine(url: str) -> Engine:
+    return create_engine(
+        url,
+        pool_pre_ping=True,      # Enable connection pool ping
+        pool_recycle=600,        # Recycle connections every 10 minutes
+        echo=settings.SQL_ECHO,  # Log SQL queries in development mode
+        echo_pool=settings.SQL_ECHO_POOL,  # Log connection pool events in development mode
+        **_engine_options(url, pool_size=20, max_overflow=30)
+    )
+
+def _create_async_engine(url: str):
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=600,
+        echo=settings.SQL_ECHO,
+        echo_pool=settings.SQL_ECHO_POOL,
+        **_engine_options(url, pool_size=settings.ASYNC_DB_POOL_SIZE, max_overflow=settings.ASYNC_DB_MAX_OVERFLOW)
+    )
+
+# 只读副本地址
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+# 接口标记：总是读取主库
+PRIMARY_ONLY_ATTR = "__primary_only__"
+
+
+class ReplicaRouting:
+    """Read/write routing state of one HTTP request (see ReplicaRoutingMiddleware)."""
+
+    __slots__ = ("scope", "use_replica", "sticky", "wrote")
+
+    def __init__(self, scope: Dict[str, Any], use_replica: bool, sticky: bool = False):
+        self.scope = scope
+        # GET/HEAD 请求且客户端最近没有写入时读取副本
+        self.use_replica = use_replica
+        # 客户端最近写入过（携带粘滞 Cookie）的读取请求，不使用可能早于其写入的缓存
+        self.sticky = sticky
+        # 请求中是否写入过主库，中间件据此设置粘滞 Cookie
+        self.wrote = False
+
+
+# 当前请求的路由状态；请求之外（后台任务、脚本、WebSocket）为 None，全部访问主库
+_routing: ContextVar[Optional[ReplicaRouting]] = ContextVar("replica_routing", default=None)
+
+# 为填充缓存执行的查询总是读取主库（见 primary_reads）
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+def begin_replica_routing(
+    scope: Dict[str, Any], use_replica: bool, sticky: bool = False
+) -> Tuple[ReplicaRouting, Token]:
+    """Start routing the current request's sessions; the token is for end_replica_routing."""
+    routing = ReplicaRouting(scope, use_replica, sticky)
+    return routing, _routing.set(routing)
+
+
+def end_replica_routing(token: Token) -> None:
+    _routing.reset(token)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+    块内的查询读取主库
+
+    用于结果会写入缓存的查询：缓存条目被其他客户端共享，如果用副本的旧数据填充，
+    刚写入的客户端在条目过期前都会读到旧数据。缓存未命中时才执行，主库负载很小。
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def reading_own_writes() -> bool:
+    """Whether the current request reads after the client's recent write (db_last_write) and must bypass caches."""
+    routing = _routing.get()
+    return routing is not None and routing.sticky
+
+
+def use_primary(func: Callable) -> Callable:
+    """
+    接口总是读取主库（不接受副本延迟的读取）
+
+    标记放在 @router.get 之下。
+    """
+    setattr(func, PRIMARY_ONLY_ATTR, True)
+    return func
+
+
+def _needs_primary(clause: Any) -> bool:
+    # SELECT ... FOR UPDATE 和无法判断读写的文本 SQL 也发往主库
+    return isinstance(clause, TextClause) or getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of replica-routed requests to a random replica.
+
+    Writes, flushes, reads inside primary_reads() and everything after the
+    session's first write go to the primary (the session's bind). The replicas
+    are passed as info["replicas"].
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        routing = _routing.get()
+        if self._flushing or isinstance(clause, UpdateBase):
+            # INSERT/UPDATE/DELETE
+            self.info["primary"] = True
+            if routing is not None:
+                routing.wrote = True
+        elif _needs_primary(clause):
+            self.info["primary"] = True
+        elif (
+            routing is not None
+            and routing.use_replica
+            and self.info.get("replicas")
+            and not self.info.get("primary")
+            and not _primary_reads.get()
+            and not getattr(routing.scope.get("endpoint"), PRIMARY_ONLY_ATTR, False)
+        ):
+            return random.choice(self.info["replicas"])
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,      # Enable connection pool ping
-    pool_recycle=600,        # Recycle connections every 10 minutes
-    pool_size=20,            # Increase connection pool size
-    max_overflow=30,         # Increase max additional connections
-    pool_timeout=10,         # Connection timeout in seconds
-    connect_args={'charset': 'utf8mb4'},  # Support for Emoji characters
-    echo=settings.SQL_ECHO,  # Log SQL queries in development mode
-    echo_pool=settings.SQL_ECHO_POOL  # Log connection pool events in development mode
-)
+engine = _create_engine(settings.DATABASE_URL)
+replica_engines: List[Engine] = [_create_engine(url) for url in REPLICA_URLS]
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, info={"replicas": replica_engines}
+)
+
+# 异步引擎：查询在事件循环中等待 I/O，不阻塞同一 worker 上的其他请求和 WebSocket。
+# 与同步代码共用模型；创建引擎时不连接数据库
+async_engine = _create_async_engine(settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL))
+async_replica_engines = [_create_async_engine(async_database_url(url)) for url in REPLICA_URLS]
+
+# expire_on_commit=False：提交后访问属性不会触发隐式的异步加载
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    info={"replicas": [replica.sync_engine for replica in async_replica_engines]}
+)
 
 # Create base class for models
 Base = declarative_base()
@@ -30,3 +201,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Dependency for an async database session (hot read paths)."""
+    async with AsyncSessionLocal() as db:
+        yield db
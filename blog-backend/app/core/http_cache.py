@@ -0,0 +1,261 @@
+"""
+整响应缓存与 HTTP 条件请求（ETag / Last-Modified / 304）
+
+使用 @cache_response 标记的 GET 接口缓存最终的响应字节和响应头：
+命中时跳过接口函数、response_model 校验和 JSON 编码，直接发送缓存的字节。
+响应体的强 ETag 为内容哈希，Last-Modified 为该 ETag 首次出现的时间，每个 URL 的
+校验信息保存在统一缓存中；请求的 If-None-Match（优先）或 If-Modified-Since
+与之匹配时返回 304，不发送响应体。
+未命中时同时生成 gzip / brotli 压缩版本并一起缓存，命中时按 Accept-Encoding
+发送对应版本（带 Content-Encoding，GZip 中间件不再重复压缩），每个版本有各自的 ETag。
+缓存键为路径加排序后的查询参数；除固定标签外，还可以从响应内容中提取代理键
+（如 "article:42"、"category:3"），相关数据修改时按这些标签清除。
+只用于不区分用户的公开接口。
+
+配置了只读副本时，生成会被缓存的响应和校验信息时读取主库；客户端刚写入过的请求
+（携带 db_last_write）不使用缓存的响应，能读到自己的写入。
+
+路由器需要使用 ConditionalRoute 作为 route_class，标记放在 @router.get 之下。
+"""
+import hashlib
+import json
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.database import primary_reads, reading_own_writes
+from app.services.unified_cache_service import UnifiedCacheService
+from app.utils.compression import IDENTITY, compress_variants, negotiate_encoding
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+VALIDATOR_KEY_PREFIX = "etag:"
+RESPONSE_KEY_PREFIX = "response:"
+# 校验信息的保留时间：内容未变化时沿用原来的 Last-Modified
+VALIDATOR_RETENTION_SECONDS = 86400
+
+RESPONSE_CACHE_ATTR = "__response_cache__"
+
+# 不随缓存的响应保存的响应头（由发送时重新生成）
+_VOLATILE_HEADERS = {
+    "content-length", "content-encoding", "vary", "etag", "last-modified", "cache-control", "x-cache", "server-timing"
+}
+
+SurrogateKeys = Callable[[Any], Iterable[str]]
+
+
+def cache_response(
+    ttl_seconds: int = 60,
+    tags: Optional[Iterable[str]] = None,
+    surrogate_keys: Optional[SurrogateKeys] = None
+):
+    """
+    缓存 GET 接口的最终响应字节（同时启用条件请求）
+
+    Args:
+        ttl_seconds: 响应缓存有效期（秒）
+        tags: 固定标签，支持使用路径参数格式化，如 "article:{article_id}"
+        surrogate_keys: 从解析后的响应 JSON 中提取代理键的函数
+    """
+    def decorator(func: Callable):
+        setattr(func, RESPONSE_CACHE_ATTR, (ttl_seconds, tuple(tags or ()), surrogate_keys))
+        return func
+    return decorator
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of a compressed representation, e.g. "abc" -> "abc-gzip"."""
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # 弱比较：GZip 等中间层可能把强 ETag 改为弱 ETag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Whether the request's validators match; If-None-Match takes precedence."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP 日期精确到秒
+        return int(last_modified) <= since
+    return False
+
+
+def _validator_headers(validator: Dict[str, Any], encoding: Optional[str] = None) -> Dict[str, str]:
+    return {
+        "ETag": encoded_etag(validator["etag"], encoding),
+        "Last-Modified": formatdate(validator["last_modified"], usegmt=True),
+        # 允许浏览器和代理保存，但每次使用前都要重新验证
+        "Cache-Control": "no-cache",
+    }
+
+
+def _apply_validator(response: Response, validator: Dict[str, Any], encoding: Optional[str] = None) -> None:
+    headers = _validator_headers(validator, encoding)
+    response.headers["ETag"] = headers["ETag"]
+    response.headers["Last-Modified"] = headers["Last-Modified"]
+    response.headers.setdefault("Cache-Control", headers["Cache-Control"])
+
+
+def _url_key(request: Request) -> str:
+    query = "&".join(sorted(f"{name}={value}" for name, value in request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _format_tags(tags: Iterable[str], request: Request) -> List[str]:
+    return [tag.format(**request.path_params) for tag in tags]
+
+
+async def _store_validator(
+    key: str,
+    previous: Optional[Dict[str, Any]],
+    body: bytes,
+    now: float,
+    tags: List[str]
+) -> Dict[str, Any]:
+    """Save the validator of a freshly built body, keeping Last-Modified if unchanged."""
+    etag = make_etag(body)
+    unchanged = previous is not None and previous["etag"] == etag
+    validator = {
+        "etag": etag,
+        "last_modified": previous["last_modified"] if unchanged else now,
+        "checked_at": now,
+    }
+    await UnifiedCacheService.aset(key, validator, VALIDATOR_RETENTION_SECONDS, tags)
+    return validator
+
+
+def _pack(meta: Dict[str, Any], bodies: Dict[str, bytes]) -> bytes:
+    """
+    Cached response layout: 4-byte metadata length, JSON metadata, then the
+    bodies of every encoding back to back (meta["bodies"] lists encoding and length).
+    """
+    meta = dict(meta, bodies=[[encoding, len(body)] for encoding, body in bodies.items()])
+    header = json.dumps(meta, separators=(",", ":")).encode()
+    return len(header).to_bytes(4, "big") + header + b"".join(bodies.values())
+
+
+def _unpack(data: bytes) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    size = int.from_bytes(data[:4], "big")
+    meta = json.loads(data[4:4 + size])
+    offset = 4 + size
+    # 没有 bodies 字段的旧条目只有原文
+    layout = meta.pop("bodies", None) or [[IDENTITY, len(data) - offset]]
+    bodies = {}
+    for encoding, length in layout:
+        bodies[encoding] = data[offset:offset + length]
+        offset += length
+    return meta, bodies
+
+
+def _cached_response(request: Request, meta: Dict[str, Any], bodies: Dict[str, bytes], status: str) -> Response:
+    """Response (or 304) for a cached entry, in the encoding the client accepts."""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), bodies)
+    validator = meta["validator"]
+    if is_not_modified(request, encoded_etag(validator["etag"], encoding), validator["last_modified"]):
+        response = Response(status_code=304, headers=_validator_headers(validator, encoding))
+    else:
+        response = Response(
+            content=bodies[encoding or IDENTITY], status_code=meta["status"], headers=dict(meta["headers"])
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        _apply_validator(response, validator, encoding)
+        response.headers["X-Cache"] = status
+    # 内容随 Accept-Encoding 协商，任何编码（包括发送给不支持压缩的客户端的原文）都带 Vary，
+    # 否则共享缓存可能把原文发给支持压缩的客户端
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _response_cache_handler(
+    handler: Callable,
+    ttl_seconds: int,
+    tags: Tuple[str, ...],
+    surrogate_keys: Optional[SurrogateKeys]
+) -> Callable:
+    async def response_cache_handler(request: Request) -> Response:
+        if request.method != "GET":
+            return await handler(request)
+
+        url_key = _url_key(request)
+        response_key = f"{RESPONSE_KEY_PREFIX}{url_key}"
+        # 客户端刚写入过时不使用缓存的响应，从主库重新生成并更新缓存
+        data = None if reading_own_writes() else await UnifiedCacheService.aget_bytes(response_key)
+        if data is not None:
+            return _cached_response(request, *_unpack(data), "HIT")
+
+        # 缓存的响应被所有客户端共享，从主库读取，不使用副本的旧数据
+        with primary_reads():
+            response = await handler(request)
+        if response.status_code != 200 or not hasattr(response, "body") or "set-cookie" in response.headers:
+            return response
+
+        body = response.body
+        cache_tags = _format_tags(tags, request)
+        if surrogate_keys is not None:
+            try:
+                cache_tags.extend(surrogate_keys(json.loads(body)))
+            except Exception as e:
+                # 提取失败时只使用固定标签
+                logger.error(f"Error extracting surrogate keys for {url_key}: {e}")
+
+        validator_key = f"{VALIDATOR_KEY_PREFIX}{url_key}"
+        now = time.time()
+        validator = await _store_validator(
+            validator_key, await UnifiedCacheService.aget(validator_key), body, now, cache_tags
+        )
+        meta = {
+            "status": response.status_code,
+            "headers": [[name, value] for name, value in response.headers.items() if name not in _VOLATILE_HEADERS],
+            "validator": validator,
+        }
+        # 只在未命中时压缩，各压缩版本与原文一起缓存
+        bodies = {IDENTITY: body, **compress_variants(body)}
+        await UnifiedCacheService.aset_bytes(response_key, _pack(meta, bodies), ttl_seconds, cache_tags)
+
+        cached = _cached_response(request, meta, bodies, "MISS")
+        if "server-timing" in response.headers:
+            cached.headers["Server-Timing"] = response.headers["server-timing"]
+        return cached
+
+    return response_cache_handler
+
+
+class ConditionalRoute(APIRoute):
+    """APIRoute that serves endpoints marked with @cache_response."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        response_options = getattr(self.endpoint, RESPONSE_CACHE_ATTR, None)
+        if response_options is not None:
+            return _response_cache_handler(handler, *response_options)
+        return handler
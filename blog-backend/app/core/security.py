@@ -7,7 +7,7 @@ from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, primary_reads
 from app.models import User
 from app.services.unified_cache_service import UnifiedCacheService
 from app.utils.logging import get_logger
@@ -42,11 +42,11 @@ def _get_jwt_payload_cache_key(token: str) -> str:
     token_hash = hashlib.md5(token.encode()).hexdigest()
     return f"{JWT_PAYLOAD_CACHE_PREFIX}{token_hash}"
 
-def _cache_user(username: str, user: User) -> None:
-    """缓存用户信息"""
+async def _cache_user_and_token(token: str, username: str, user: User) -> None:
+    """缓存用户信息以及令牌到用户名的映射（一次往返写入）"""
     if not user:
         return
-    
+
     # 只缓存必要的用户信息，避免缓存敏感数据
     user_data = {
         "id": str(user.id),
@@ -54,37 +54,41 @@ def _cache_user(username: str, user: User) -> None:
         "role": user.role,
         "avatar": user.avatar
     }
-    
-    cache_key = _get_user_cache_key(username)
-    UnifiedCacheService.set(cache_key, user_data, USER_CACHE_TTL)
-    logger.debug(f"用户信息已缓存: {username}")
 
-def _cache_token_user_mapping(token: str, username: str) -> None:
-    """缓存令牌到用户名的映射"""
-    token_key = _get_token_cache_key(token)
-    UnifiedCacheService.set(token_key, username, USER_CACHE_TTL)
-    logger.debug(f"令牌到用户名映射已缓存")
+    await UnifiedCacheService.aset_many({
+        _get_user_cache_key(username): user_data,
+        _get_token_cache_key(token): username,
+    }, USER_CACHE_TTL)
+    logger.debug(f"用户信息和令牌映射已缓存: {username}")
 
-def _cache_jwt_payload(token: str, payload: Dict[str, Any]) -> None:
+async def _cache_jwt_payload(token: str, payload: Dict[str, Any]) -> None:
     """缓存JWT负载"""
     payload_key = _get_jwt_payload_cache_key(token)
-    UnifiedCacheService.set(payload_key, payload, USER_CACHE_TTL)
+    await UnifiedCacheService.aset(payload_key, payload, USER_CACHE_TTL)
     logger.debug(f"JWT负载已缓存")
 
-def _get_cached_user_by_token(token: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+async def _get_cached_user_by_token(token: str) -> Optional[Tuple[str, Dict[str, Any]]]:
     """通过令牌获取缓存的用户信息"""
-    # 1. 尝试从缓存获取令牌到用户名的映射
+    # 用户缓存键依赖用户名，先从令牌中读取未经验证的 sub 作为候选用户名，
+    # 以便令牌映射和用户信息通过一次 MGET 取回
+    try:
+        candidate = jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+    if not candidate:
+        return None
+
     token_key = _get_token_cache_key(token)
-    username = UnifiedCacheService.get(token_key)
-    
-    if not username:
+    user_key = _get_user_cache_key(candidate)
+    cached = await UnifiedCacheService.aget_many([token_key, user_key])
+
+    # 令牌映射只在令牌验证通过后写入，映射的用户名必须与候选用户名一致
+    username = cached.get(token_key)
+    if not username or username != candidate:
         logger.debug("令牌缓存未命中")
         return None
-    
-    # 2. 尝试从缓存获取用户信息
-    user_key = _get_user_cache_key(username)
-    user_data = UnifiedCacheService.get(user_key)
-    
+
+    user_data = cached.get(user_key)
     if not user_data:
         logger.debug(f"用户缓存未命中: {username}")
         return None
@@ -92,10 +96,10 @@ def _get_cached_user_by_token(token: str) -> Optional[Tuple[str, Dict[str, Any]]
     logger.debug(f"缓存命中: {username}")
     return username, user_data
 
-def _get_cached_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
+async def _get_cached_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
     """获取缓存的JWT负载"""
     payload_key = _get_jwt_payload_cache_key(token)
-    payload = UnifiedCacheService.get(payload_key)
+    payload = await UnifiedCacheService.aget(payload_key)
     
     if not payload:
         logger.debug("JWT负载缓存未命中")
@@ -138,7 +142,7 @@ async def get_current_user(
     start_time = datetime.now()
 
     # 尝试从缓存获取用户信息
-    cached_result = _get_cached_user_by_token(token)
+    cached_result = await _get_cached_user_by_token(token)
     if cached_result:
         username, user_data = cached_result
         # 从缓存数据创建用户对象
@@ -155,7 +159,7 @@ async def get_current_user(
     jwt_start_time = datetime.now()
     try:
         # 尝试从缓存获取JWT负载
-        payload = _get_cached_jwt_payload(token)
+        payload = await _get_cached_jwt_payload(token)
         if not payload:
             # 缓存未命中，解码JWT
             payload = jwt.decode(
@@ -164,7 +168,7 @@ async def get_current_user(
                 algorithms=[settings.ALGORITHM]
             )
             # 缓存JWT负载
-            _cache_jwt_payload(token, payload)
+            await _cache_jwt_payload(token, payload)
 
         username: str = payload.get("sub")
         if username is None:
@@ -174,15 +178,16 @@ async def get_current_user(
 
         # 从数据库获取用户
         db_start_time = datetime.now()
-        user = db.query(User).filter(User.username == username).first()
+        # 查询结果写入用户缓存，从主库读取
+        with primary_reads():
+            user = db.query(User).filter(User.username == username).first()
         logger.debug(f"[性能] 数据库查询用户耗时: {(datetime.now() - db_start_time).total_seconds() * 1000:.2f}ms")
 
         if user is None:
             raise credentials_exception
 
         # 缓存用户信息和令牌映射
-        _cache_user(username, user)
-        _cache_token_user_mapping(token, username)
+        await _cache_user_and_token(token, username, user)
 
         logger.debug(f"[性能] 获取用户总耗时: {(datetime.now() - start_time).total_seconds() * 1000:.2f}ms")
         return user
@@ -203,7 +208,7 @@ async def get_current_user_optional(
     start_time = datetime.now()
 
     # 尝试从缓存获取用户信息
-    cached_result = _get_cached_user_by_token(token)
+    cached_result = await _get_cached_user_by_token(token)
     if cached_result:
         username, user_data = cached_result
         # 从缓存数据创建用户对象
@@ -218,7 +223,7 @@ async def get_current_user_optional(
 
     try:
         # 尝试从缓存获取JWT负载
-        payload = _get_cached_jwt_payload(token)
+        payload = await _get_cached_jwt_payload(token)
         if not payload:
             # 缓存未命中，解码JWT
             payload = jwt.decode(
@@ -227,7 +232,7 @@ async def get_current_user_optional(
                 algorithms=[settings.ALGORITHM]
             )
             # 缓存JWT负载
-            _cache_jwt_payload(token, payload)
+            await _cache_jwt_payload(token, payload)
             
         username: str = payload.get("sub")
         if username is None:
@@ -235,13 +240,14 @@ async def get_current_user_optional(
         
         # 从数据库获取用户
         db_start_time = datetime.now()
-        user = db.query(User).filter(User.username == username).first()
+        # 查询结果写入用户缓存，从主库读取
+        with primary_reads():
+            user = db.query(User).filter(User.username == username).first()
         logger.debug(f"[性能] 数据库查询可选用户耗时: {(datetime.now() - db_start_time).total_seconds() * 1000:.2f}ms")
         
         if user:
             # 缓存用户信息和令牌映射
-            _cache_user(username, user)
-            _cache_token_user_mapping(token, username)
+            await _cache_user_and_token(token, username, user)
         
         logger.debug(f"[性能] 获取可选用户总耗时: {(datetime.now() - start_time).total_seconds() * 1000:.2f}ms")
         return user
@@ -289,7 +295,7 @@ async def get_current_user_or_token(
     start_time = datetime.now()
 
     # 尝试从缓存获取用户信息
-    cached_result = _get_cached_user_by_token(token_to_use)
+    cached_result = await _get_cached_user_by_token(token_to_use)
     if cached_result:
         username, user_data = cached_result
         # 从缓存数据创建用户对象
@@ -306,7 +312,7 @@ async def get_current_user_or_token(
     jwt_start_time = datetime.now()
     try:
         # 尝试从缓存获取JWT负载
-        payload = _get_cached_jwt_payload(token_to_use)
+        payload = await _get_cached_jwt_payload(token_to_use)
         if not payload:
             # 缓存未命中，解码JWT
             payload = jwt.decode(
@@ -315,7 +321,7 @@ async def get_current_user_or_token(
                 algorithms=[settings.ALGORITHM]
             )
             # 缓存JWT负载
-            _cache_jwt_payload(token_to_use, payload)
+            await _cache_jwt_payload(token_to_use, payload)
 
         username: str = payload.get("sub")
         if username is None:
@@ -325,15 +331,16 @@ async def get_current_user_or_token(
 
         # 从数据库获取用户
         db_start_time = datetime.now()
-        user = db.query(User).filter(User.username == username).first()
+        # 查询结果写入用户缓存，从主库读取
+        with primary_reads():
+            user = db.query(User).filter(User.username == username).first()
         logger.debug(f"[性能] 数据库查询token用户耗时: {(datetime.now() - db_start_time).total_seconds() * 1000:.2f}ms")
 
         if user is None:
             raise credentials_exception
 
         # 缓存用户信息和令牌映射
-        _cache_user(username, user)
-        _cache_token_user_mapping(token_to_use, username)
+        await _cache_user_and_token(token_to_use, username, user)
 
         logger.debug(f"[性能] 获取token用户总耗时: {(datetime.now() - start_time).total_seconds() * 1000:.2f}ms")
         return user
@@ -353,28 +360,23 @@ def clear_user_cache(username: str = None, token: str = None) -> None:
         username: 用户名
         token: 令牌
     """
+    keys = []
     if username:
         # 清除用户信息缓存
-        user_key = _get_user_cache_key(username)
-        UnifiedCacheService.delete(user_key)
-        logger.debug(f"已清除用户缓存: {username}")
-    
+        keys.append(_get_user_cache_key(username))
+
     if token:
-        # 清除令牌到用户名的映射
         token_key = _get_token_cache_key(token)
         # 获取关联的用户名
         username_from_token = UnifiedCacheService.get(token_key)
         if username_from_token and not username:
             # 如果找到关联的用户名，且未通过参数提供用户名，则清除该用户的缓存
-            user_key = _get_user_cache_key(username_from_token)
-            UnifiedCacheService.delete(user_key)
-            logger.debug(f"已清除用户缓存: {username_from_token} (通过令牌)")
-        
-        # 清除令牌映射
-        UnifiedCacheService.delete(token_key)
-        logger.debug(f"已清除令牌缓存: {token[:10]}...")
-        
-        # 清除JWT负载缓存
-        payload_key = _get_jwt_payload_cache_key(token)
-        UnifiedCacheService.delete(payload_key)
-        logger.debug(f"已清除JWT负载缓存")
+            keys.append(_get_user_cache_key(username_from_token))
+
+        # 清除令牌映射和JWT负载缓存
+        keys.append(token_key)
+        keys.append(_get_jwt_payload_cache_key(token))
+
+    # 一次批量删除
+    UnifiedCacheService.delete_many(keys)
+    logger.debug(f"已清除用户缓存: {len(keys)} 个键")
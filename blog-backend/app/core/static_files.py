@@ -0,0 +1,78 @@
+"""
+静态文件服务（/static）
+
+在 StaticFiles 的基础上：
+- 文件名为 UUID（上传时生成，内容不会变化）的文件返回
+  Cache-Control: public, max-age=STATIC_IMMUTABLE_MAX_AGE, immutable，
+  浏览器和 CDN 在有效期内不再发起请求，也不做重新验证；
+- 文本类文件存在上传时生成的 .br / .gz 同名文件时，按 Accept-Encoding 直接发送压缩版本
+  （带 Content-Encoding，GZip 中间件不再压缩）；
+- Range 请求始终针对原文件，由 FileResponse 按偏移读取，不读入整个文件。
+"""
+import os
+import re
+from mimetypes import guess_type
+from typing import Dict, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.utils.compression import SIBLING_SUFFIXES, is_precompressible, negotiate_encoding
+
+# 上传文件名：uuid4().hex 加可选的扩展名
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{32}(\.[A-Za-z0-9]+)?$")
+
+
+def is_content_addressed(path: str) -> bool:
+    """Whether a static path is an upload whose name never gets reused."""
+    return CONTENT_ADDRESSED_NAME.match(os.path.basename(path)) is not None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving .br / .gz siblings and immutable caching headers for uploads."""
+
+    def _sibling(self, full_path: str, accept_encoding: Optional[str]) -> Tuple[Optional[str], Optional[os.stat_result]]:
+        """(encoding, stat) of the precompressed sibling to send, if any."""
+        available: Dict[str, os.stat_result] = {}
+        for encoding, suffix in SIBLING_SUFFIXES.items():
+            try:
+                available[encoding] = os.stat(full_path + suffix)
+            except OSError:
+                continue
+        encoding = negotiate_encoding(accept_encoding, available)
+        return (encoding, available[encoding]) if encoding else (None, None)
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        media_type = guess_type(full_path)[0] or "application/octet-stream"
+
+        headers = {}
+        if is_content_addressed(full_path):
+            headers["Cache-Control"] = f"public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+
+        path = full_path
+        # Range 请求的偏移针对原文件，不使用压缩版本
+        if status_code == 200 and is_precompressible(full_path) and "range" not in request_headers:
+            encoding, sibling_stat = self._sibling(full_path, request_headers.get("accept-encoding"))
+            if encoding:
+                path, stat_result = full_path + SIBLING_SUFFIXES[encoding], sibling_stat
+                headers["Content-Encoding"] = encoding
+                headers["Vary"] = "Accept-Encoding"
+
+        response = FileResponse(
+            path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,47 +1,93 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from datetime import datetime
+from fastapi.responses import JSONResponse
 import uvicorn
 
 from app.utils.ip_utils import get_client_ip
 
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import SessionLocal, async_engine, async_replica_engines, engine, replica_engines
+from app.core.responses import FastJSONResponse
+from app.core.static_files import PrecompressedStaticFiles
 from app.routers import routers
+from app.routers.metrics import router as metrics_router
 from app.utils.logging import get_logger
 from app.services.unified_cache_service import UnifiedCacheService
 from app.services.ip_location_service import IPLocationService
+from app.services.view_counter import ViewCounter
+from app.services.request_metrics import RequestMetrics
+from app.services.tracing import Tracer
+from app.middleware import (
+    ProfilerMiddleware, RealIPMiddleware, ReplicaRoutingMiddleware, RequestMetricsMiddleware, TracingMiddleware,
+    ViewCountMiddleware
+)
 # 不再使用HTTP中间件记录访客
 # from app.middleware import record_visitor
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# 初始化缓存服务
-view_count_cache_prefix = "view_count"
-
-# 初始化 IP 地址归属地服务
-IPLocationService.init_app()
+# 按请求统计 SQL 语句数和数据库耗时；追踪的请求中每条 SQL 记录为 span（主库和只读副本）
+for db_engine in [engine, async_engine.sync_engine] + replica_engines + [
+    replica.sync_engine for replica in async_replica_engines
+]:
+    RequestMetrics.instrument_engine(db_engine)
+    Tracer.instrument_engine(db_engine)
+# 追踪的请求中每次提交记录为 span
+Tracer.instrument_sessions(SessionLocal)
+
+def _log_ip_warmup(future: asyncio.Future) -> None:
+    """记录后台预热 IP 属地数据库的结果"""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"IP2Region warm-up failed: {error}", exc_info=error)
+    elif not future.result():
+        logger.warning("IP2Region warm-up failed, loading will be retried on the next lookup")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动和停止每个 worker 的后台任务"""
+    # 导入和启动都不访问数据库，表结构由 python run_migrations.py 创建和更新；
+    # IP 属地数据库在后台线程中预热，不推迟 worker 就绪
+    ip_warmup = asyncio.get_running_loop().run_in_executor(None, IPLocationService.init_app)
+    ip_warmup.add_done_callback(_log_ip_warmup)
+    # 订阅其他 worker 发布的缓存失效事件
+    UnifiedCacheService.start_invalidation_listener()
+    # 浏览量定期批量写入数据库
+    ViewCounter.start()
+    yield
+    # 先写入缓冲中的浏览量，再关闭缓存连接
+    await ViewCounter.stop()
+    # 导出队列中剩余的 span
+    Tracer.shutdown()
+    await UnifiedCacheService.stop_invalidation_listener()
+    await UnifiedCacheService.close()
+    # 关闭异步连接池
+    for db_engine in [async_engine] + async_replica_engines:
+        await db_engine.dispose()
 
 # Initialize FastAPI application
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
     version=settings.PROJECT_VERSION,
     docs_url="/docs",
     openapi_url="/openapi.json",
     # 禁用自动重定向，避免与Nginx重定向冲突
-    redirect_slashes=False
+    redirect_slashes=False,
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSE else JSONResponse
 )
 
 # Mount static files directory
-app.mount("/static", StaticFiles(directory=settings.STATIC_FILES_DIR), name="static")
+# 上传文件使用 immutable 缓存头，文本类文件发送预压缩版本
+app.mount("/static", PrecompressedStaticFiles(directory=settings.STATIC_FILES_DIR), name="static")
 
 # Configure CORS
 if settings.IS_PRODUCTION:
@@ -66,9 +112,30 @@ else:
 # Add GZip compression middleware
 app.add_middleware(
     GZipMiddleware,
-    minimum_size=1000  # 只压缩大于 1KB 的响应
+    minimum_size=settings.RESPONSE_COMPRESS_MIN_BYTES,  # 只压缩大于 1KB 的响应
+    compresslevel=settings.RESPONSE_GZIP_LEVEL  # 已带 Content-Encoding 的缓存响应不会重复压缩
 )
 
+# 浏览量计数与真实 IP 解析（纯 ASGI 中间件，后添加的在外层，真实 IP 最先解析）
+app.add_middleware(ViewCountMiddleware)
+app.add_middleware(RealIPMiddleware)
+
+# 配置了只读副本时，GET/HEAD 请求的查询发往副本
+if replica_engines:
+    app.add_middleware(ReplicaRoutingMiddleware)
+
+# 管理员按需分析单个请求
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# 按路由的请求指标（最外层，延迟包含其他中间件的耗时）
+if settings.REQUEST_METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+# 请求追踪（最外层，根 span 包含所有中间件的耗时）
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 # 不再使用HTTP中间件记录访客，改为使用WebSocket连接记录
 # app.middleware("http")(record_visitor)
 
@@ -78,6 +145,9 @@ for router in routers:
     # 所有路由都使用API前缀
     app.include_router(router, prefix=settings.API_V1_STR)
 
+# Prometheus 抓取的 /metrics 不使用 API 前缀
+app.include_router(metrics_router)
+
 @app.get("/")
 async def root():
     """Root endpoint for API health check."""
@@ -87,43 +157,6 @@ async def root():
         "status": "healthy"
     }
 
-# 中间件：获取真实 IP
-@app.middleware("http")
-async def get_real_ip(request: Request, call_next):
-    # 尝试从各种头部获取真实 IP
-    x_client_ip = request.headers.get("X-Client-IP")
-    x_real_ip = request.headers.get("X-Real-IP")
-    x_forwarded_for = request.headers.get("X-Forwarded-For")
-    forwarded = request.headers.get("Forwarded")
-
-    # 按优先级获取真实 IP
-    if x_client_ip:
-        real_ip = x_client_ip
-    elif x_real_ip:
-        real_ip = x_real_ip
-    elif x_forwarded_for:
-        # X-Forwarded-For 可能包含多个 IP，取第一个
-        real_ip = x_forwarded_for.split(',')[0].strip()
-    elif forwarded:
-        # 解析 Forwarded 头部
-        for part in forwarded.split(';'):
-            if part.lower().startswith('for='):
-                real_ip = part[4:].strip()
-                # 移除可能的引号和 IPv6 括号
-                real_ip = real_ip.strip('"[]')
-                break
-        else:
-            real_ip = request.client.host
-    else:
-        real_ip = request.client.host
-
-    # 将真实 IP 添加到请求状态中，以便在路由处理函数中使用
-    request.state.real_ip = real_ip
-
-    # 继续处理请求
-    response = await call_next(request)
-    return response
-
 # IP 地址调试端点
 @app.get("/debug/ip")
 async def debug_ip(request: Request):
@@ -154,63 +187,6 @@ async def websocket_test():
     return FileResponse("app/static/websocket_test.html")
 
 
-# Add middleware for view counting
-@app.middleware("http")
-async def add_view_count(request: Request, call_next):
-    """Middleware to track article view counts."""
-    # Process the request
-    response = await call_next(request)
-
-    # Only process successful GET requests
-    if request.method == "GET" and response.status_code == 200:
-        from app.services.article_service import ArticleService
-        from app.core.database import get_db
-        import re
-
-        path = request.url.path
-
-        # Match article detail page paths (with API prefix)
-        api_prefix = settings.API_V1_STR
-        article_id_match = re.match(f"{api_prefix}/articles/([0-9]+)$", path)
-        article_slug_match = re.match(f"{api_prefix}/articles/by-slug/([\\w-]+)$", path)
-
-        if article_id_match or article_slug_match:
-            # Get visitor's real IP address
-            client_ip = get_client_ip(request)
-
-            # Get database session
-            db = next(get_db())
-            try:
-                # Get article
-                if article_id_match:
-                    article_id = int(article_id_match.group(1))
-                    article = ArticleService.get_article_by_id(db, article_id)
-                else:
-                    slug = article_slug_match.group(1)
-                    article = ArticleService.get_article_by_slug(db, slug)
-
-                if article:
-                    # Create cache key
-                    cache_key = f"{view_count_cache_prefix}:{article.id}:{client_ip}"
-                    current_time = datetime.now().isoformat()
-
-                    # Check if already viewed in the last 5 minutes
-                    last_view_time = UnifiedCacheService.get(cache_key)
-
-                    if last_view_time is None or \
-                       (datetime.now() - datetime.fromisoformat(last_view_time)).total_seconds() > settings.VIEW_COUNT_CACHE_SECONDS:
-                        # Update view count
-                        ArticleService.increment_view_count(db, article.id)
-
-                        # Update cache
-                        UnifiedCacheService.set(cache_key, current_time, settings.VIEW_COUNT_CACHE_SECONDS)
-            except Exception as e:
-                logger.error(f"Error updating view count: {e}", exc_info=True)
-            finally:
-                db.close()
-
-    return response
-
 if __name__ == "__main__":
     # 根据环境设置参数
     host = "127.0.0.1" if settings.IS_DEVELOPMENT else "0.0.0.0"
@@ -0,0 +1,16 @@
+# Export middleware classes
+from app.middleware.db_routing import ReplicaRoutingMiddleware
+from app.middleware.profiler import ProfilerMiddleware
+from app.middleware.real_ip import RealIPMiddleware
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.middleware.view_count import ViewCountMiddleware
+
+__all__ = [
+    "ProfilerMiddleware",
+    "RealIPMiddleware",
+    "ReplicaRoutingMiddleware",
+    "RequestMetricsMiddleware",
+    "TracingMiddleware",
+    "ViewCountMiddleware",
+]
@@ -0,0 +1,53 @@
+"""
+数据库读写分离中间件（纯 ASGI）
+
+GET/HEAD 请求中的查询由 RoutingSession（app/core/database.py）发往只读副本，其他方法的请求
+和用 @use_primary 标记的接口访问主库。请求写入主库后，响应设置 Cookie db_last_write，
+有效期 REPLICA_STICKY_SECONDS 秒；携带该 Cookie 的请求同样访问主库，客户端能读到自己的写入，
+不受副本复制延迟影响，这类请求也不读取缓存（见 reading_own_writes）。缓存未命中时填充缓存的查询
+读取主库（见 primary_reads），共享的缓存条目不会包含副本的旧数据。只在配置了 DATABASE_REPLICA_URLS 时启用。
+"""
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import begin_replica_routing, end_replica_routing
+
+STICKY_COOKIE = "db_last_write"
+READ_METHODS = ("GET", "HEAD")
+
+
+def _recently_wrote(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            return STICKY_COOKIE in cookie_parser(value.decode("latin-1"))
+    return False
+
+
+class ReplicaRoutingMiddleware:
+    """Routes reads of GET/HEAD requests to replicas, with read-your-writes stickiness."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.sticky_cookie = (
+            f"{STICKY_COOKIE}=1; Max-Age={settings.REPLICA_STICKY_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+        ).encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        read = scope["method"] in READ_METHODS
+        sticky = read and _recently_wrote(scope)
+        routing, token = begin_replica_routing(scope, use_replica=read and not sticky, sticky=sticky)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and routing.wrote:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", self.sticky_cookie)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_replica_routing(token)
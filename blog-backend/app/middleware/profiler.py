@@ -0,0 +1,92 @@
+"""
+请求分析中间件（纯 ASGI）
+
+请求带有 X-Profile: 1 请求头或 ?__profile=1 查询参数，且 Authorization 中是管理员的令牌时，
+在 StackSampler 下处理该请求，响应头 X-Profile-Id 返回分析结果的 ID
+（GET /api/v1/admin/profiles/{id} 查看）。非管理员的请求照常处理，不做分析。
+其他请求只做一次请求头和查询字符串的检查；令牌签名有效时才查询用户。
+默认关闭，由 PROFILER_ENABLED 开启。
+"""
+import time
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.permissions import is_admin
+from app.services.request_profiler import RequestProfiler
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = b"__profile=1"
+
+
+def _profile_requested(scope: Scope) -> bool:
+    if PROFILE_QUERY_FLAG in scope.get("query_string", b""):
+        return True
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value not in (b"", b"0")
+    return False
+
+
+async def _is_admin_request(scope: Scope) -> bool:
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    # 先在本地校验令牌签名，伪造或过期的令牌不会触发缓存和数据库查询
+    try:
+        jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return False
+    db = SessionLocal()
+    try:
+        user = await security.get_current_user(token=token, db=db)
+        return is_admin(user)
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+class ProfilerMiddleware:
+    """Profiles single requests on demand for administrators."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope) or not await _is_admin_request(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = RequestProfiler.new_id()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        sampler = RequestProfiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            elapsed = time.perf_counter() - start
+            try:
+                profile = RequestProfiler.build(
+                    sampler, profile_id, scope["method"], scope["path"], status_code, elapsed
+                )
+                await RequestProfiler.store(profile)
+            except Exception as e:
+                logger.error(f"Error storing profile {profile_id}: {e}", exc_info=True)
@@ -0,0 +1,22 @@
+"""
+真实 IP 中间件（纯 ASGI）
+
+解析代理头部得到客户端真实 IP，保存到 scope["state"]["real_ip"]，
+路由中可通过 request.state.real_ip 或 get_client_ip 读取，无需重复解析。
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.ip_utils import get_client_ip_from_scope
+
+
+class RealIPMiddleware:
+    """Stores the client's real IP in the request state for HTTP and WebSocket scopes."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            real_ip = get_client_ip_from_scope(scope)
+            scope.setdefault("state", {})["real_ip"] = real_ip
+        await self.app(scope, receive, send)
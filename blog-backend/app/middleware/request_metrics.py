@@ -0,0 +1,48 @@
+"""
+请求指标中间件（纯 ASGI）
+
+作为最外层中间件记录每个 HTTP 请求：延迟（到最后一个响应体消息发送为止）、
+状态码、发送的响应字节数（压缩后），以及请求期间由 RequestMetrics 收集的
+SQL 语句数、数据库耗时和缓存命中情况，按匹配的路由模板汇总。
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.request_metrics import RequestMetrics
+
+
+class RequestMetricsMiddleware:
+    """Records per-route latency, status, response size and DB/cache usage."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats, token = RequestMetrics.begin(scope)
+        status_code = 500
+        response_bytes = 0
+        finished_at = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes, finished_at
+            if message["type"] == "http.response.start":
+                # 严格模式下超出查询预算时在发送响应前抛出，请求以 500 失败
+                RequestMetrics.check_query_budget(stats)
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished_at = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = (finished_at or time.perf_counter()) - start
+            RequestMetrics.end(token, stats, status_code, elapsed, response_bytes)
@@ -0,0 +1,44 @@
+"""
+请求追踪中间件（纯 ASGI）
+
+为采样的 HTTP 请求创建根 span（见 app/services/tracing.py），请求处理期间的缓存、SQL、
+外部 HTTP 调用等记录为其子 span；响应头 X-Trace-Id 返回 trace ID，便于在导出的 span 中查找。
+根 span 在整个 ASGI 调用结束时结束，包括响应发送后执行的后台任务。
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.request_metrics import route_template
+from app.services.tracing import Tracer
+
+
+class TracingMiddleware:
+    """Opens a root span per sampled request and exports its spans when it ends."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        started = Tracer.start_request(scope) if scope["type"] == "http" else None
+        if started is None:
+            await self.app(scope, receive, send)
+            return
+
+        span, token = started
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", span.trace.trace_id.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            Tracer.end_request(span, token, route_template(scope), status_code)
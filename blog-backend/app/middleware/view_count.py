@@ -0,0 +1,72 @@
+"""
+文章浏览量中间件（纯 ASGI）
+
+文章详情请求（按 ID 或 slug）成功返回（200，或读者重新验证缓存时的 304）后计一次浏览：
+经 ViewDeduplicator 去重后写入 ViewCounter 缓冲区。计数在响应发送完成后进行，
+不增加响应延迟；其他请求只做一次路径前缀比较，响应不经过任何包装。
+"""
+import re
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.view_counter import ViewCounter
+from app.services.view_dedup import ViewDeduplicator
+from app.utils.ip_utils import get_client_ip_from_scope
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+ARTICLES_PATH_PREFIX = f"{settings.API_V1_STR}/articles/"
+# 文章详情页路径（带 API 前缀）
+ARTICLE_ID_PATH = re.compile(rf"{re.escape(ARTICLES_PATH_PREFIX)}([0-9]+)$")
+ARTICLE_SLUG_PATH = re.compile(rf"{re.escape(ARTICLES_PATH_PREFIX)}by-slug/([\w-]+)$")
+
+COUNTED_STATUSES = (200, 304)
+
+
+class ViewCountMiddleware:
+    """Counts article detail views after the response has been sent."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" \
+                or not scope["path"].startswith(ARTICLES_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        article_id_match = ARTICLE_ID_PATH.match(path)
+        article_slug_match = None if article_id_match else ARTICLE_SLUG_PATH.match(path)
+        if not (article_id_match or article_slug_match):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+        if status_code not in COUNTED_STATUSES:
+            return
+        try:
+            # 响应成功说明文章存在，无需再次查询文章
+            if article_id_match:
+                article_id = int(article_id_match.group(1))
+            else:
+                article_id = await ViewCounter.resolve_slug(article_slug_match.group(1))
+
+            if article_id is not None:
+                # 5 分钟内同一 IP 重复访问不计数（按时间窗口的布隆过滤器，近似判断）
+                if await ViewDeduplicator.observe(article_id, get_client_ip_from_scope(scope)):
+                    # 浏览量先进入缓冲区，由后台任务批量写入数据库
+                    await ViewCounter.record(article_id)
+        except Exception as e:
+            logger.error(f"Error updating view count: {e}", exc_info=True)
@@ -2,7 +2,7 @@ from app.core.database import Base
 
 # Import all models to make them available when importing from app.models
 from app.models.user import User
-from app.models.article import Article, Category, Tag
+from app.models.article import Article, Category, Tag, article_tags
 from app.models.comment import Comment
 from app.models.activity import Activity
 from app.models.subscription import Notification, EmailSubscription, SubscriptionType
@@ -20,6 +20,7 @@ __all__ = [
     "Article",
     "Category",
     "Tag",
+    "article_tags",
     "Comment",
     "Activity",
     "Notification",
@@ -1,9 +1,16 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 
 from app.core.database import Base
 
+# 标题和正文在 MySQL 中使用 utf8mb4_unicode_ci 排序规则；
+# 其他数据库（如本地测试用的 SQLite）没有该排序规则，使用默认规则
+UNICODE_COLLATION = "utf8mb4_unicode_ci"
+UnicodeTitle = String(255).with_variant(mysql.VARCHAR(255, collation=UNICODE_COLLATION), "mysql")
+UnicodeText = Text().with_variant(mysql.TEXT(collation=UNICODE_COLLATION), "mysql")
+
 # 文章-标签多对多关系表
 article_tags = Table(
     "article_tags",
@@ -49,10 +56,10 @@ class Article(Base):
     __tablename__ = "articles"
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(255, collation='utf8mb4_unicode_ci'), nullable=False, info={'mysql_charset': 'utf8mb4'})
+    title = Column(UnicodeTitle, nullable=False, info={'mysql_charset': 'utf8mb4'})
     slug = Column(String(255), unique=True, index=True)
-    content = Column(Text(collation='utf8mb4_unicode_ci'), info={'mysql_charset': 'utf8mb4'})
-    excerpt = Column(Text(collation='utf8mb4_unicode_ci'), nullable=True, info={'mysql_charset': 'utf8mb4'})
+    content = Column(UnicodeText, info={'mysql_charset': 'utf8mb4'})
+    excerpt = Column(UnicodeText, nullable=True, info={'mysql_charset': 'utf8mb4'})
     cover_image = Column(String(255))
     category_id = Column(Integer, ForeignKey("categories.id"))
     # tags 字段已移除，使用 tags_relationship 多对多关系代替
@@ -6,15 +6,18 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any
 
 from app.core.database import get_db
+from app.core.cache import invalidate_cache_tags
+from app.core.http_cache import ConditionalRoute, cache_response
 from app.core import security
 from app.core.permissions import is_admin, is_super_admin
 from app.schemas.about import AboutPageResponse, AboutPageCreate, AboutPageUpdate
 from app.services.about_service import AboutPageService
 from app.models.user import User
 
-router = APIRouter(prefix="/about", tags=["about"])
+router = APIRouter(prefix="/about", tags=["about"], route_class=ConditionalRoute)
 
 @router.get("")
+@cache_response(ttl_seconds=300, tags=["about"])
 async def get_about_page(db: Session = Depends(get_db)):
     """
     获取About页面内容
@@ -335,7 +338,9 @@ async def update_about_page(
 
     if not about_page:
         # 如果不存在，创建新的
-        return AboutPageService.create_about_page(db, about_data.content)
+        created_page = AboutPageService.create_about_page(db, about_data.content)
+        invalidate_cache_tags("about")
+        return created_page
 
     # 更新现有页面
     updated_page = AboutPageService.update_about_page(db, about_page.id, about_data.content)
@@ -345,4 +350,5 @@ async def update_about_page(
             detail="About page not found"
         )
 
+    invalidate_cache_tags("about")
     return updated_page
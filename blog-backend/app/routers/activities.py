@@ -6,7 +6,7 @@ from typing import List, Optional
 from app import models
 from app.core import security
 from app.core.database import get_db
-from app.core.cache import cache, clear_cache_by_prefix
+from app.core.cache import cache, invalidate_cache_tags
 from app.schemas.activity import ActivityResponse, EnhancedActivityResponse, ActivityBatchDeleteRequest
 from app.services.activity_service import ActivityService
 
@@ -61,7 +61,7 @@ async def get_basic_activities(
     return activities
 
 @router.get("/public", response_model=List[EnhancedActivityResponse])
-@cache(ttl_seconds=300)  # 缓存5分钟
+@cache(ttl_seconds=300, prefix="public_activities", tags=["activities"])  # 缓存5分钟
 async def get_public_activities(
     days: int = Query(7, ge=1, le=30, description="返回最近几天的活动，默认7天"),
     limit: int = Query(10, ge=1, le=50, description="返回的活动数量，默认10条"),
@@ -129,7 +129,7 @@ async def delete_activity(
     db.commit()
 
     # 清除相关缓存
-    clear_cache_by_prefix("activity_")
+    invalidate_cache_tags("activities")
 
     return None
 
@@ -177,7 +177,7 @@ async def batch_delete_activities(
     db.commit()
 
     # 清除相关缓存
-    clear_cache_by_prefix("activity_")
+    invalidate_cache_tags("activities")
 
     return {
         "deleted_count": deleted_count,
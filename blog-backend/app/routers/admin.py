@@ -1,16 +1,18 @@
 """
 管理员路由模块：提供管理员特有的功能
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app import models
 from app.core import security
-from app.core.database import get_db
+from app.core.database import get_db, use_primary
 from app.schemas.user import UserCreate, UserResponse, UserRole, UserUpdate
 from app.core.permissions import is_admin
 from app.services.user_service import UserService
+from app.services.request_profiler import RequestProfiler
 
 router = APIRouter(
     prefix="/admin",
@@ -53,6 +55,7 @@ async def create_admin_user(
         )
 
 @router.get("/users", response_model=list[UserResponse])
+@use_primary
 async def list_users(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user),
@@ -143,3 +146,34 @@ async def update_user_role(
     updated_user = UserService.update_user(db, user_id, user_update)
 
     return updated_user
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+async def list_profiles(
+    current_user: models.User = Depends(security.get_current_admin_user)
+):
+    """
+    最近的请求分析结果（请求头 X-Profile: 1 或查询参数 __profile=1 触发）
+    """
+    return await RequestProfiler.list_recent()
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|folded)$"),
+    current_user: models.User = Depends(security.get_current_admin_user)
+):
+    """
+    获取一次请求的分析结果
+
+    - **format**: json 返回按类别的耗时和 folded 调用栈；folded 只返回调用栈文本，
+      可导入 speedscope 或 flamegraph.pl 生成火焰图
+    """
+    profile = await RequestProfiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or expired"
+        )
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
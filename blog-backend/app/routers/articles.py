@@ -3,22 +3,26 @@ import os
 import json
 import httpx
 from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 import re
-from sqlalchemy import func, and_
+from sqlalchemy import and_
 
 from app import models
 from app.core import security
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.config import settings
-from app.core.cache import cache, clear_cache_by_prefix
+from app.core.cache import cache, clear_cache_by_prefix, invalidate_cache_tags
+from app.core.http_cache import ConditionalRoute, cache_response
+from app.core.responses import trusted_response
 from app.schemas.article import ArticleBase, ArticleCreate, ArticleUpdate, ArticleResponse, ArticleList, LikeResponse
 from app.schemas.article_extended import ArticleWithContent, FeaturedArticle, HomeResponse
 from app.schemas.ai_assist import AIAssistRequest, AIAssistResponse
-from app.schemas.user import UserBriefResponse
+from app.services.article_service import ArticleService
 from app.services.subscription_service import NotificationService
+from app.services.tracing import async_http_client
 
 # Load environment variables
 load_dotenv()
@@ -28,7 +32,7 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 # 移除了 Emoji 过滤函数，保留 Emoji 字符
 
-router = APIRouter(prefix="/articles", tags=['articles'])
+router = APIRouter(prefix="/articles", tags=['articles'], route_class=ConditionalRoute)
 
 OPENROUTER_API_KEY = settings.OPENROUTER_API_KEY
 
@@ -58,6 +62,7 @@ async def like_article(
         article.like_count -= 1
         db.commit()
         db.refresh(article)
+        invalidate_cache_tags(f"article:{article_id}")
         return {
             "article_id": article_id,
             "like_count": article.like_count,
@@ -84,6 +89,7 @@ async def like_article(
         db.add(new_activity)
         db.commit()
         db.refresh(article)
+        invalidate_cache_tags(f"article:{article_id}")
         return {
             "article_id": article_id,
             "like_count": article.like_count,
@@ -100,7 +106,7 @@ async def ai_assist (
 
     try:
         # 使用 httpx 异步客户端
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with async_http_client(timeout=30.0) as client:
             response = await client.post(
                 url="https://openrouter.ai/api/v1/chat/completions",
                 headers={
@@ -144,6 +150,31 @@ async def ai_assist (
         raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
 
 
+def article_keys(article: Dict[str, Any]) -> List[str]:
+    """响应缓存的代理键：文章本身及其分类、标签、作者"""
+    keys = [f"article:{article['id']}"]
+    category_id = article.get("category_id") or (article.get("category") or {}).get("id")
+    if category_id:
+        keys.append(f"category:{category_id}")
+    for tag in article.get("tags_list") or article.get("tags") or []:
+        keys.append(f"tag:{tag['id']}")
+    author_id = article.get("author_id") or (article.get("author") or {}).get("id")
+    if author_id:
+        keys.append(f"user:{author_id}")
+    return keys
+
+def article_list_keys(articles: List[Dict[str, Any]]) -> List[str]:
+    """文章列表中每篇文章的代理键"""
+    return [key for article in articles for key in article_keys(article)]
+
+def home_keys(home: Dict[str, Any]) -> List[str]:
+    """首页的代理键：文章（含评论数）、分类和精选文章"""
+    keys = article_list_keys(home["articles"])
+    keys.extend(f"article:{article['id']}:comments" for article in home["articles"])
+    keys.extend(f"category:{category['id']}" for category in home["categories"])
+    keys.extend(f"article:{article['id']}" for article in home["featuredArticles"])
+    return keys
+
 def generate_slug(title: str) -> str:
     """从标题生成slug，添加时间戳确保唯一性"""
     # 转换为小写并替换空格为连字符
@@ -345,6 +376,8 @@ async def create_article(
     return response_data
 
 @router.get("", response_model=List[ArticleList])
+@cache_response(ttl_seconds=60, tags=["read_articles"], surrogate_keys=article_list_keys)
+@trusted_response(List[ArticleList])
 @cache(ttl_seconds=60)  # 缓存60秒
 async def read_articles(
     skip: int = 0,
@@ -352,7 +385,7 @@ async def read_articles(
     category: Optional[str] = None,
     tag: Optional[str] = None,
     is_featured: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取文章列表，支持分页、分类筛选、标签筛选和精选筛选。
@@ -363,302 +396,32 @@ async def read_articles(
     - **tag**: 按标签名称筛选
     - **is_featured**: 是否只返回精选文章，True 表示只返回精选文章，False 表示只返回非精选文章，None 表示不筛选
     """
-
-    # 使用join连接Category表，以便获取分类名称
-    query = db.query(
-        models.Article.id,
-        models.Article.title,
-        models.Article.slug,
-        models.Article.content,
-        models.Article.excerpt,
-        models.Article.category_id,
-        models.Article.cover_image,
-        models.Article.author_id,
-        models.Article.created_at,
-        models.Article.updated_at,
-        models.Article.view_count,
-        models.Article.like_count,
-        models.Article.is_featured,
-        models.Category.name.label('category_name')
-    ).join(models.Category, models.Article.category_id == models.Category.id, isouter=True)
-
-    # 按分类筛选（修改为通过分类名称查询）
-    if category:
-        # 先获取分类ID
-        category_obj = db.query(models.Category).filter(models.Category.name == category).first()
-        if category_obj:
-            query = query.filter(models.Article.category_id == category_obj.id)
-
-    # 按标签筛选（使用多对多关系表）
-    if tag:
-        # 获取标签对象
-        tag_obj = db.query(models.Tag).filter(models.Tag.name == tag).first()
-        if tag_obj:
-            # 使用多对多关系表进行查询
-            from app.models.article import article_tags
-            query = query.join(
-                article_tags,
-                models.Article.id == article_tags.c.article_id
-            ).filter(article_tags.c.tag_id == tag_obj.id)
-        else:
-            # 如果标签不存在，返回空结果
-            query = query.filter(models.Article.id == -1)  # 永远不会匹配的条件
-
-    # 按是否精选筛选
-    if is_featured is not None:
-        query = query.filter(models.Article.is_featured == is_featured)
-
-    # 按创建时间降序排序
-    query = query.order_by(models.Article.created_at.desc())
-
-    articles = query.offset(skip).limit(limit).all()
-
-    # 将查询结果转换为字典列表
-    result = []
-    for article in articles:
-        # 获取作者信息
-        author_obj = db.query(models.User).filter(models.User.id == article.author_id).first()
-        author = UserBriefResponse.model_validate(author_obj)
-
-        # 获取分类信息
-        category = None
-        if article.category_id:
-            category_obj = db.query(models.Category).filter(models.Category.id == article.category_id).first()
-            if category_obj:
-                category = {
-                    "id": category_obj.id,
-                    "name": category_obj.name
-                }
-
-        article_dict = {
-            "id": article.id,
-            "title": article.title,
-            "slug": article.slug,
-            "excerpt": article.excerpt,
-            "category_id": article.category_id,
-            "tags_list": [],  # 将在下面填充
-            "cover_image": article.cover_image,
-            "author_id": article.author_id,
-            "created_at": article.created_at,
-            "updated_at": article.updated_at,
-            "category_name": article.category_name,
-            "view_count": article.view_count,
-            "like_count": article.like_count,
-            "is_featured": article.is_featured,
-            "author": author,
-            "category": category
-        }
-
-        # 获取文章的标签列表
-        article_obj = db.query(models.Article).filter(models.Article.id == article.id).first()
-        if article_obj and hasattr(article_obj, 'tags_relationship'):
-            tags = [{
-                "id": tag.id,
-                "name": tag.name
-            } for tag in article_obj.tags_relationship]
-            article_dict["tags_list"] = tags
-        result.append(article_dict)
-
-    return result
+    return await ArticleService.alist_articles(db, skip, limit, category, tag, is_featured)
 
 # Move the /home route before the /{article_id} route
 @router.get("/home", response_model=HomeResponse)
-async def get_home_info(db: Session = Depends(get_db)):
-    # 获取最新文章列表
-    articles = db.query(models.Article).order_by(models.Article.created_at.desc()).limit(10).all()
-
-    # 获取分类及其文章数量
-    categories = (
-        db.query(
-            models.Category,
-            func.count(models.Article.id).label('article_count')
-        )
-        .join(models.Article, models.Category.id == models.Article.category_id, isouter=True)
-        .group_by(models.Category.id)
-        .all()
-    )
-
-    # 获取精选/置顶文章
-    featured_articles = db.query(models.Article).filter(models.Article.is_featured == True).limit(5).all()
-
-    # 构建响应数据
-    home_articles = []
-    for article in articles:
-        # 获取文章作者信息
-        author_obj = db.query(models.User).filter(models.User.id == article.author_id).first()
-        author = UserBriefResponse.model_validate(author_obj)
-
-        # 获取文章分类信息
-        category = None
-        if article.category_id:
-            category_obj = db.query(models.Category).filter(models.Category.id == article.category_id).first()
-            if category_obj:
-                category = {
-                    "id": category_obj.id,
-                    "name": category_obj.name
-                }
-
-        # 获取文章标签
-        tags = []
-        article_obj = db.query(models.Article).filter(models.Article.id == article.id).first()
-        if article_obj and hasattr(article_obj, 'tags_relationship'):
-            for tag in article_obj.tags_relationship:
-                tags.append({"id": tag.id, "name": tag.name})
-
-        # 获取评论数量
-        comment_count = db.query(func.count(models.Comment.id)).filter(
-            models.Comment.article_id == article.id
-        ).scalar()
-
-        home_articles.append({
-            "id": article.id,
-            "title": article.title,
-            "excerpt": article.excerpt or "",  # 使用 excerpt 而不是 summary
-            "cover_image": article.cover_image,
-            "created_at": article.created_at,  # 使用 created_at 而不是 publishDate
-            "author": author,
-            "category": category,
-            "tags": tags,
-            "view_count": article.view_count or 0,
-            "like_count": article.like_count or 0,
-            "comment_count": comment_count or 0
-        })
-
-    # 构建分类列表
-    category_list = [
-        {
-            "id": cat[0].id,
-            "name": cat[0].name,
-            "articleCount": cat[1]
-        }
-        for cat in categories
-    ]
-
-    # 构建精选文章列表
-    featured_list = [
-        {
-            "id": art.id,
-            "title": art.title,
-            "coverImage": art.cover_image
-        }
-        for art in featured_articles
-    ]
-
-    return {
-        "articles": home_articles,
-        "categories": category_list,
-        "featuredArticles": featured_list
-    }
+@cache_response(ttl_seconds=60, tags=["read_articles"], surrogate_keys=home_keys)
+@trusted_response(HomeResponse)
+async def get_home_info(db: AsyncSession = Depends(get_async_db)):
+    return await ArticleService.aget_home(db)
 
 @router.get("/{article_id}", response_model=ArticleWithContent)
-async def read_article(article_id: int, db: Session = Depends(get_db)):
-    # 使用join连接Category表，以便获取分类名称
-    article = db.query(
-        models.Article.id,
-        models.Article.title,
-        models.Article.slug,
-        models.Article.content,
-        models.Article.excerpt,
-        models.Article.category_id,
-        models.Article.cover_image,
-        models.Article.author_id,
-        models.Article.created_at,
-        models.Article.updated_at,
-        models.Article.view_count,
-        models.Article.like_count,
-        models.Article.is_featured,
-        models.Category.name.label('category_name')
-    ).join(
-        models.Category, models.Article.category_id == models.Category.id, isouter=True
-    ).filter(models.Article.id == article_id).first()
-
+@cache_response(ttl_seconds=30, tags=["read_articles", "article:{article_id}"], surrogate_keys=article_keys)
+@trusted_response(ArticleWithContent)
+async def read_article(article_id: int, db: AsyncSession = Depends(get_async_db)):
+    article = await ArticleService.aget_article(db, article_id=article_id)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    # 将查询结果转换为字典
-    result = {
-        "id": article.id,
-        "title": article.title,
-        "slug": article.slug,
-        "content": article.content,
-        "excerpt": article.excerpt,
-        "category_id": article.category_id,
-        "tags_list": [],  # 将在下面填充
-        "cover_image": article.cover_image,
-        "author_id": article.author_id,
-        "created_at": article.created_at,
-        "updated_at": article.updated_at,
-        "category_name": article.category_name,
-        "view_count": article.view_count,
-        "like_count": article.like_count,
-        "is_featured": article.is_featured
-    }
-
-    # 获取文章的标签列表
-    article_obj = db.query(models.Article).filter(models.Article.id == article.id).first()
-    if article_obj and hasattr(article_obj, 'tags_relationship'):
-        tags = [{
-            "id": tag.id,
-            "name": tag.name
-        } for tag in article_obj.tags_relationship]
-        result["tags_list"] = tags
-
-    return result
+    return article
 
 @router.get("/by-slug/{slug}", response_model=ArticleWithContent)
-async def read_article_by_slug(slug: str, db: Session = Depends(get_db)):
-    # 使用join连接Category表，以便获取分类名称
-    article = db.query(
-        models.Article.id,
-        models.Article.title,
-        models.Article.slug,
-        models.Article.content,
-        models.Article.excerpt,
-        models.Article.category_id,
-        models.Article.cover_image,
-        models.Article.author_id,
-        models.Article.created_at,
-        models.Article.updated_at,
-        models.Article.view_count,
-        models.Article.like_count,
-        models.Article.is_featured,
-        models.Category.name.label('category_name')
-    ).join(
-        models.Category, models.Article.category_id == models.Category.id, isouter=True
-    ).filter(models.Article.slug == slug).first()
-
+@cache_response(ttl_seconds=30, tags=["read_articles"], surrogate_keys=article_keys)
+@trusted_response(ArticleWithContent)
+async def read_article_by_slug(slug: str, db: AsyncSession = Depends(get_async_db)):
+    article = await ArticleService.aget_article(db, slug=slug)
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    # 将查询结果转换为字典
-    result = {
-        "id": article.id,
-        "title": article.title,
-        "slug": article.slug,
-        "content": article.content,
-        "excerpt": article.excerpt,
-        "category_id": article.category_id,
-        "tags_list": [],  # 将在下面填充
-        "cover_image": article.cover_image,
-        "author_id": article.author_id,
-        "created_at": article.created_at,
-        "updated_at": article.updated_at,
-        "category_name": article.category_name,
-        "view_count": article.view_count,
-        "like_count": article.like_count,
-        "is_featured": article.is_featured
-    }
-
-    # 获取文章的标签列表
-    article_obj = db.query(models.Article).filter(models.Article.id == article.id).first()
-    if article_obj and hasattr(article_obj, 'tags_relationship'):
-        tags = [{
-            "id": tag.id,
-            "name": tag.name
-        } for tag in article_obj.tags_relationship]
-        result["tags_list"] = tags
-
-    return result
+    return article
 
 @router.put("/{article_id}", response_model=ArticleResponse)
 async def update_article(
@@ -755,6 +518,9 @@ async def update_article(
     db.commit()
     db.refresh(db_article)
 
+    # 清除文章列表缓存
+    clear_cache_by_prefix("read_articles")
+
     # 获取分类信息
     category = db.query(models.Category).filter(models.Category.id == db_article.category_id).first()
     category_name = category.name if category else "未分类"
@@ -851,6 +617,10 @@ async def delete_article(
 
     db.delete(db_article)
     db.commit()
+
+    # 清除文章列表及该文章评论的缓存
+    invalidate_cache_tags("read_articles", f"article:{article_id}", f"article:{article_id}:comments")
+
     return {"message": "Article deleted successfully"}
 
 
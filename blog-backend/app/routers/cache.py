@@ -1,8 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any, List
 
 from app.core import security
 from app.services.unified_cache_service import UnifiedCacheService
+from app.services.cache_metrics import CacheMetrics
+from app.core.responses import SerializationMetrics
+from app.utils.metrics import PrometheusWriter, worker_id
+from app.services.single_flight import SingleFlight
+from app.services.view_counter import ViewCounter
+from app.services.view_dedup import ViewDeduplicator
 from app.core.config import settings
 
 router = APIRouter(
@@ -13,8 +20,31 @@ router = APIRouter(
 
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_cache_stats():
-    """获取缓存统计信息"""
-    return UnifiedCacheService.get_stats()
+    """获取缓存统计信息（进程内的统计只包含处理本次请求的 worker）"""
+    stats = UnifiedCacheService.get_stats()
+    # 前缀指标、L1、未命中合并等统计保存在各 worker 进程内
+    stats["worker"] = worker_id()
+    # 未命中合并统计：saved 为节省的重复计算次数
+    stats["single_flight"] = SingleFlight.get_stats()
+    # 浏览量写后缓冲的记录与刷新次数
+    stats["view_counter"] = ViewCounter.get_stats()
+    # 浏览去重布隆过滤器的参数与每个窗口的内存占用
+    stats["view_dedup"] = ViewDeduplicator.get_stats()
+    # 可信数据接口的序列化耗时（毫秒）
+    stats["serialization_ms"] = SerializationMetrics.get_stats()
+    return stats
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics():
+    """按键前缀统计的缓存指标（Prometheus 文本格式，带 worker 标签）"""
+    writer = PrometheusWriter()
+    CacheMetrics.write_prometheus(writer)
+    # 可信数据接口的序列化耗时
+    SerializationMetrics.write_prometheus(writer)
+    return PlainTextResponse(
+        writer.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 @router.get("/keys", response_model=List[str])
 async def get_cache_keys(pattern: str = "*"):
@@ -40,4 +70,6 @@ async def get_cache_info():
         "type": "redis" if settings.USE_REDIS_CACHE else "memory",
         "redis_host": settings.REDIS_HOST if settings.USE_REDIS_CACHE else None,
         "redis_port": settings.REDIS_PORT if settings.USE_REDIS_CACHE else None,
+        "l1_enabled": settings.USE_REDIS_CACHE and settings.CACHE_L1_ENABLED,
+        "l1_ttl": settings.CACHE_L1_TTL,
     }
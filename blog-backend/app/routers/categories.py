@@ -7,10 +7,11 @@ from sqlalchemy.sql import func
 from app import models
 from app.core import security
 from app.core.database import get_db
-from app.core.cache import cache, clear_cache_by_prefix
+from app.core.cache import cache, clear_cache_by_prefix, invalidate_cache_tags
+from app.core.http_cache import ConditionalRoute, cache_response
 from app.schemas.article import CategoryBase, CategoryCreate, CategoryUpdate, CategoryResponse, CategoryWithCount, CategoryBatchDeleteRequest
 
-router = APIRouter(prefix="/categories", tags=['categories'])
+router = APIRouter(prefix="/categories", tags=['categories'], route_class=ConditionalRoute)
 
 @router.post("/", response_model=CategoryResponse)
 async def create_category(
@@ -38,6 +39,11 @@ async def create_category(
     return db_category
 
 @router.get("/", response_model=List[CategoryWithCount])
+@cache_response(
+    ttl_seconds=300,
+    tags=["get_categories", "read_articles"],
+    surrogate_keys=lambda categories: [f"category:{category['id']}" for category in categories]
+)
 @cache(ttl_seconds=300)  # 缓存5分钟
 async def get_categories(db: Session = Depends(get_db)):
     categories = db.query(
@@ -95,6 +101,10 @@ async def update_category(
 
     db.commit()
     db.refresh(db_category)
+
+    # 清除分类缓存，以及展示该分类名称的文章列表等响应缓存
+    clear_cache_by_prefix("get_categories")
+    invalidate_cache_tags(f"category:{category_id}")
     return db_category
 
 @router.delete("/{category_id}")
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Header, status, Query
 from typing import Optional, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 import os
 import json
 import httpx
-from ipregion import IP2Region
 from dotenv import load_dotenv
 from jose import jwt
 
@@ -13,7 +14,7 @@ from app.utils.ip_utils import get_client_ip
 
 from app import models
 from app.core import security
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.core.config import settings
 from app.schemas.comment import (
     CommentBase, CommentCreate, CommentResponse, CommentUpdate,
@@ -518,7 +519,7 @@ async def get_comments(
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     sort_by: str = Query("newest", description="排序方式: newest, oldest, most_liked"),
     parent_only: bool = Query(True, description="是否只返回顶层评论"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     authorization: Optional[str] = Header(None, description="用户认证令牌，可选")
 ):
     """获取文章评论列表"""
@@ -546,7 +547,9 @@ async def get_comments(
 
             if username:
                 # 从数据库中获取用户
-                current_user = db.query(models.User).filter(models.User.username == username).first()
+                current_user = (await db.execute(
+                    select(models.User).where(models.User.username == username)
+                )).scalar_one_or_none()
                 if current_user:
                     print(f"获取文章评论 - 用户已登录: {current_user.username}, ID: {current_user.id}, 角色: {current_user.role}")
         except Exception as e:
@@ -557,7 +560,7 @@ async def get_comments(
     params = PaginationParams(page=page, page_size=page_size)
 
     # 获取评论列表
-    comments = CommentService.get_comments_by_article(
+    comments = await CommentService.aget_comments_by_article(
         db=db,
         article_id=article_id,
         params=params,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status, Query
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status, Query, BackgroundTasks
 from typing import Optional, List
 import os
 import shutil
@@ -16,6 +16,7 @@ from app.core import security
 from app.core.database import get_db
 from app.core.config import settings
 from app.core.permissions import is_admin
+from app.utils.compression import remove_precompressed, write_precompressed
 
 router = APIRouter(prefix="/files", tags=['files'])
 
@@ -54,6 +55,7 @@ async def delete_image(
             raise HTTPException(status_code=404, detail="文件不存在")
 
         os.remove(file_path)
+        remove_precompressed(file_path)
         print(f"文件删除成功: {file_path}")
         return {"message": "文件删除成功"}
 
@@ -65,6 +67,7 @@ async def delete_image(
 
 @router.post("/upload-image", response_model=dict)
 async def upload_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
@@ -111,6 +114,8 @@ async def upload_image(
 
         with open(save_path, "wb") as buffer:
             buffer.write(content)
+        # 在响应发送后生成 .br / .gz 版本（仅文本类文件）
+        background_tasks.add_task(write_precompressed, save_path)
 
         # 创建文件记录以便后续访问
         db_file = models.File(
@@ -153,6 +158,7 @@ async def upload_image(
 # 新增文件管理相关接口
 @router.post("/upload", response_model=schemas.FileUploadResponse)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
@@ -218,6 +224,8 @@ async def upload_file(
         # 写入文件
         with open(file_path, "wb") as buffer:
             buffer.write(content)
+        # 在响应发送后生成 .br / .gz 版本（仅文本类文件）
+        background_tasks.add_task(write_precompressed, file_path)
 
         # 获取MIME类型
         mime_type, _ = mimetypes.guess_type(file_path)
@@ -431,6 +439,7 @@ async def delete_file(
         # 删除文件
         if os.path.exists(file_path):
             os.remove(file_path)
+        remove_precompressed(file_path)
 
         # 删除数据库记录
         db.delete(file)
@@ -578,6 +587,7 @@ async def batch_delete_files(
             # 删除物理文件
             if os.path.exists(file_path):
                 os.remove(file_path)
+            remove_precompressed(file_path)
 
             # 删除数据库记录
             db.delete(file)
@@ -0,0 +1,75 @@
+import hmac
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import security
+from app.core.config import settings
+from app.core.responses import SerializationMetrics
+from app.models import User
+from app.services.cache_metrics import CacheMetrics
+from app.services.query_inspector import QueryInspector
+from app.services.request_metrics import RequestMetrics
+from app.utils.metrics import PrometheusWriter, worker_id
+
+
+async def verify_metrics_token(
+    authorization: Optional[str] = Header(None),
+    current_user: Optional[User] = Depends(security.get_current_user_optional)
+) -> None:
+    """
+    要求 Authorization: Bearer <METRICS_TOKEN>（供 Prometheus 抓取）或管理员登录令牌
+
+    未配置 METRICS_TOKEN 时只有管理员可以访问。
+    """
+    if settings.METRICS_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token, settings.METRICS_TOKEN):
+            return
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges"
+        )
+
+
+# 不使用 API 前缀，供 Prometheus 抓取 /metrics
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(verify_metrics_token)]
+)
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics():
+    """按路由的请求指标、缓存指标和序列化耗时（Prometheus 文本格式；处理本次请求的 worker 的数据，带 worker 标签）"""
+    writer = PrometheusWriter()
+    RequestMetrics.write_prometheus(writer)
+    CacheMetrics.write_prometheus(writer)
+    SerializationMetrics.write_prometheus(writer)
+    QueryInspector.write_prometheus(writer)
+    return PlainTextResponse(
+        writer.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@router.get("/routes", response_model=Dict[str, Any])
+async def get_route_metrics():
+    """按路由的延迟分位数、SQL 语句数、数据库耗时、缓存命中和响应大小（仅处理本次请求的 worker）"""
+    return {"worker": worker_id(), "routes": RequestMetrics.get_stats()}
+
+@router.get("/queries", response_model=List[Dict[str, Any]])
+async def get_query_findings(
+    type: Optional[str] = Query(None, pattern="^(n_plus_one|slow_query|budget_exceeded)$"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(security.get_current_admin_user)
+):
+    """最近的 N+1、慢查询和查询预算告警（需开启 QUERY_INSPECTOR_ENABLED，仅管理员；不含绑定参数）"""
+    return QueryInspector.get_findings(type, limit)
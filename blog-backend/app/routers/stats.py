@@ -4,16 +4,19 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy import func, desc, extract
 from datetime import datetime, timedelta, timezone, date
 
+from app.core import security
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.cache import cache
 from app.models import Article, User, Comment, Category, Activity, EmailSubscription, SubscriptionType, Memo
 from app.models.subscription import user_category_subscriptions, user_author_subscriptions
 from app.schemas.heatmap import HeatmapResponse, HeatmapItem
+from app.services.view_dedup import ViewDeduplicator
 
 router = APIRouter(prefix="/stats", tags=["statistics"])
 
 @router.get("/overview")
-@cache(ttl_seconds=300)  # 缓存5分钟
+@cache(ttl_seconds=300, prefix="stats_overview")  # 缓存5分钟
 async def get_overview_stats(db: Session = Depends(get_db)):
     """
     Get overview statistics for the blog.
@@ -46,7 +49,7 @@ async def get_overview_stats(db: Session = Depends(get_db)):
     }
 
 @router.get("/popular-articles")
-@cache(ttl_seconds=300)  # 缓存5分钟
+@cache(ttl_seconds=300, prefix="popular_articles")  # 缓存5分钟
 async def get_popular_articles(
     limit: int = Query(5, ge=1, le=20),
     period: str = Query("all", regex="^(day|week|month|year|all)$"),
@@ -98,7 +101,7 @@ async def get_popular_articles(
     return result
 
 @router.get("/activity-timeline")
-@cache(ttl_seconds=600)  # 缓存10分钟
+@cache(ttl_seconds=600, prefix="activity_timeline", tags=["activities"], stale_while_revalidate=1800)  # 缓存10分钟，过期后30分钟内先返回旧值
 async def get_activity_timeline(
     days: int = Query(30, ge=1, le=365),
     db: Session = Depends(get_db)
@@ -149,7 +152,7 @@ async def get_activity_timeline(
     return date_list
 
 @router.get("/category-distribution")
-@cache(ttl_seconds=1800)  # 缓存30分钟
+@cache(ttl_seconds=1800, stale_while_revalidate=3600)  # 缓存30分钟，过期后1小时内先返回旧值
 async def get_category_distribution(db: Session = Depends(get_db)):
     """
     Get the distribution of articles across categories.
@@ -174,7 +177,7 @@ async def get_category_distribution(db: Session = Depends(get_db)):
     return result
 
 @router.get("/user-activity")
-@cache(ttl_seconds=900)  # 缓存15分钟
+@cache(ttl_seconds=900, prefix="user_activity", tags=["activities"], stale_while_revalidate=1800)  # 缓存15分钟，过期后30分钟内先返回旧值
 async def get_user_activity(
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db)
@@ -228,7 +231,7 @@ async def get_user_activity(
     return result
 
 @router.get("/activity-heatmap", response_model=HeatmapResponse)
-@cache(ttl_seconds=3600)  # 缓存1小时
+@cache(ttl_seconds=3600, prefix="activity_heatmap", tags=["activities"], stale_while_revalidate=3600)  # 缓存1小时，过期后1小时内先返回旧值
 async def get_activity_heatmap(
     days: int = Query(365, ge=1, le=730),  # 默认显示一年的数据
     action_type: Optional[str] = Query(None, description="活动类型过滤，如 'article', 'comment', 'like' 等"),
@@ -303,6 +306,23 @@ async def get_activity_heatmap(
 
     return {"values": heatmap_items}
 
+@router.get("/articles/{article_id}/unique-readers")
+async def get_article_unique_readers(
+    article_id: int,
+    days: int = Query(1, ge=1, le=settings.VIEW_UNIQUE_READERS_DAYS, description="统计最近多少天（含今天）"),
+    current_user: User = Depends(security.get_current_admin_user)
+):
+    """
+    获取文章的独立读者数（按 IP 去重的估算值，误差约 1%），仅管理员可用
+
+    每次查询对每一天的 HyperLogLog 执行 PFCOUNT，天数不超过 VIEW_UNIQUE_READERS_DAYS。
+    """
+    return {
+        "article_id": article_id,
+        "days": days,
+        "unique_readers": await ViewDeduplicator.unique_readers(article_id, days),
+    }
+
 @router.get("/subscriptions")
 @cache(ttl_seconds=300)  # 缓存5分钟
 async def get_subscription_stats(db: Session = Depends(get_db)):
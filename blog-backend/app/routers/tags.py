@@ -6,12 +6,13 @@ from sqlalchemy import func
 from app import models
 from app.core import security
 from app.core.database import get_db
-from app.core.cache import clear_cache_by_prefix
+from app.core.cache import clear_cache_by_prefix, invalidate_cache_tags
+from app.core.http_cache import ConditionalRoute, cache_response
 from app.schemas.tag import TagCreate, TagResponse, TagUpdate, TagWithCount, TagBatchDeleteRequest
 from app.schemas.article import ArticleList
 from app.services.tag_service import TagService
 
-router = APIRouter(prefix="/tags", tags=["tags"])
+router = APIRouter(prefix="/tags", tags=["tags"], route_class=ConditionalRoute)
 
 @router.post("", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 async def create_tag(
@@ -22,9 +23,16 @@ async def create_tag(
     """
     Create a new tag.
     """
-    return TagService.create_tag(db=db, tag=tag)
+    db_tag = TagService.create_tag(db=db, tag=tag)
+    invalidate_cache_tags("tags")
+    return db_tag
 
 @router.get("", response_model=List[TagWithCount])
+@cache_response(
+    ttl_seconds=300,
+    tags=["tags", "read_articles"],
+    surrogate_keys=lambda tags: [f"tag:{tag['id']}" for tag in tags]
+)
 async def get_tags(
     skip: int = 0,
     limit: int = 100,
@@ -58,7 +66,10 @@ async def update_tag(
     """
     Update a tag.
     """
-    return TagService.update_tag(db=db, tag_id=tag_id, tag_update=tag)
+    db_tag = TagService.update_tag(db=db, tag_id=tag_id, tag_update=tag)
+    # 标签名称出现在标签列表和文章响应中
+    invalidate_cache_tags("tags", f"tag:{tag_id}")
+    return db_tag
 
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_tag(
@@ -72,6 +83,7 @@ async def delete_tag(
     success = TagService.delete_tag(db=db, tag_id=tag_id)
     if not success:
         raise HTTPException(status_code=404, detail="Tag not found")
+    invalidate_cache_tags("tags", f"tag:{tag_id}")
     return None
 
 @router.post("/batch-delete", status_code=status.HTTP_200_OK)
@@ -109,6 +121,7 @@ async def batch_delete_tags(
 
     # 清除相关缓存
     clear_cache_by_prefix("tags_")
+    invalidate_cache_tags("tags", *(f"tag:{tag_id}" for tag_id in request.tag_ids))
 
     return {
         "deleted_count": deleted_count,
@@ -150,7 +163,9 @@ async def add_tag_to_article(
     """
     Add a tag to an article.
     """
-    return {"success": TagService.add_tag_to_article(db=db, article_id=article_id, tag_id=tag_id)}
+    success = TagService.add_tag_to_article(db=db, article_id=article_id, tag_id=tag_id)
+    invalidate_cache_tags("tags", f"article:{article_id}")
+    return {"success": success}
 
 @router.delete("/articles/{article_id}/tags/{tag_id}")
 async def remove_tag_from_article(
@@ -162,7 +177,9 @@ async def remove_tag_from_article(
     """
     Remove a tag from an article.
     """
-    return {"success": TagService.remove_tag_from_article(db=db, article_id=article_id, tag_id=tag_id)}
+    success = TagService.remove_tag_from_article(db=db, article_id=article_id, tag_id=tag_id)
+    invalidate_cache_tags("tags", f"article:{article_id}")
+    return {"success": success}
 
 @router.put("/articles/{article_id}/tags")
 async def update_article_tags(
@@ -175,6 +192,7 @@ async def update_article_tags(
     Update all tags for an article.
     """
     tags = TagService.update_article_tags(db=db, article_id=article_id, tag_ids=tag_ids)
+    invalidate_cache_tags("tags", f"article:{article_id}")
     return {"tags": [tag.name for tag in tags]}
 
 @router.get("/articles/{article_id}/tags", response_model=List[TagResponse])
@@ -6,7 +6,8 @@ from sqlalchemy import func
 
 from app import models
 from app.core import security
-from app.core.database import get_db
+from app.core.database import get_db, use_primary
+from app.core.cache import invalidate_cache_tags
 from app.core.config import settings
 from app.services.user_service import UserService
 from app.services.comment_service import CommentService
@@ -107,6 +108,7 @@ async def login(form_data: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserInDB)
+@use_primary
 async def read_users_me(
     current_user: models.User = Depends(security.get_current_user),
     db: Session = Depends(get_db)
@@ -185,6 +187,8 @@ async def update_user(
     current_user.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(current_user)
+    # 作者信息出现在文章列表等响应缓存中
+    invalidate_cache_tags(f"user:{user_id}")
 
     # 在返回用户信息之前将 social_media 字段转换为字典
     if current_user.social_media:
@@ -82,7 +82,7 @@ async def get_visitors(
     )
 
 @router.get("/statistics", response_model=VisitorStatistics)
-@cache(ttl_seconds=300)  # 缓存5分钟
+@cache(ttl_seconds=300, key_params=["days", "current_user"])  # 缓存5分钟，按用户区分以保留管理员校验
 async def get_visitor_statistics(
     days: int = Query(30, ge=1, le=365, description="统计天数，默认30天"),
     db: Session = Depends(get_db),
@@ -77,7 +77,7 @@ async def websocket_endpoint(
 
         # 尝试从缓存获取用户信息
         cache_key = f"{USER_CACHE_PREFIX}{token}"
-        cached_user = UnifiedCacheService.get(cache_key)
+        cached_user = await UnifiedCacheService.aget(cache_key)
 
         if cached_user:
             # 使用缓存的用户信息
@@ -106,7 +106,7 @@ async def websocket_endpoint(
                                 "avatar": user_info.avatar,
                                 "is_admin": is_admin
                             }
-                            UnifiedCacheService.set(cache_key, user_cache, USER_CACHE_TTL)
+                            await UnifiedCacheService.aset(cache_key, user_cache, USER_CACHE_TTL)
                     logger.debug(f"[性能] 数据库查询用户信息耗时: {(time.time() - db_start_time) * 1000:.2f}ms")
                 except Exception as e:
                     logger.warning(f"Token验证失败: {str(e)}")
@@ -543,7 +543,7 @@ async def websocket_endpoint(
             if last_user_id:
                 # 尝试从缓存获取用户信息
                 cache_key = f"{USER_CACHE_PREFIX}user:{last_user_id}"
-                cached_user = UnifiedCacheService.get(cache_key)
+                cached_user = await UnifiedCacheService.aget(cache_key)
 
                 if cached_user:
                     # 使用缓存的用户信息
@@ -594,7 +594,7 @@ async def websocket_endpoint(
                                 "avatar": user_info.avatar,
                                 "is_admin": user_info.role == "admin"
                             }
-                            UnifiedCacheService.set(cache_key, user_cache, USER_CACHE_TTL)
+                            await UnifiedCacheService.aset(cache_key, user_cache, USER_CACHE_TTL)
                     finally:
                         db.close()
             # 如果是匿名用户
@@ -8,7 +8,7 @@ from app import models, schemas
 from app.schemas.activity import ActivityDetail, EnhancedActivityResponse
 from app.utils.logging import get_logger
 from app.utils.time_utils import get_relative_time_zh
-from app.core.cache import clear_cache_by_prefix
+from app.core.cache import invalidate_cache_tags
 
 logger = get_logger(__name__)
 
@@ -63,29 +63,22 @@ class ActivityService:
 
     @staticmethod
     def clear_activity_related_caches(action_type: str) -> None:
-        """清除与活动相关的缓存"""
-        # 清除活动热力图缓存
-        clear_cache_by_prefix("activity_heatmap")
+        """清除与活动相关的缓存（一次按标签批量失效，不扫描键空间）"""
+        # 活动热力图、活动时间线和用户活动缓存
+        tags = ["activity_heatmap", "activity_timeline", "user_activity"]
 
-        # 清除活动时间线缓存
-        clear_cache_by_prefix("activity_timeline")
-
-        # 清除公开活动缓存
+        # 公开活动缓存
         if action_type in ["article_create", "comment_create"]:
-            clear_cache_by_prefix("public_activities")
+            tags.append("public_activities")
 
         # 根据活动类型清除特定缓存
         if action_type.startswith("article"):
-            clear_cache_by_prefix("articles_list")
-            clear_cache_by_prefix("popular_articles")
-            clear_cache_by_prefix("stats_overview")
+            tags.extend(["read_articles", "popular_articles", "stats_overview"])
 
         elif action_type.startswith("comment"):
-            clear_cache_by_prefix("comments_by_article")
-            clear_cache_by_prefix("stats_overview")
+            tags.extend(["comments_by_article", "stats_overview"])
 
-        # 清除用户活动缓存
-        clear_cache_by_prefix("user_activity")
+        invalidate_cache_tags(*tags)
 
     @staticmethod
     def log_article_creation(db: Session, user_id: int, article_id: int, title: str) -> models.Activity:
@@ -1,34 +1,56 @@
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case, select, update
 from fastapi import HTTPException, status
 
 from app import models, schemas
+from app.models.article import article_tags
+from app.schemas.user import UserBriefResponse
 from app.utils.validators import generate_slug, is_valid_slug
 from app.utils.logging import get_logger
 from app.schemas.version import ArticleVersionCreate
 from app.services.version_service import VersionService
-from app.services.unified_cache_service import cached
 
 logger = get_logger(__name__)
 
+# 文章列表和详情返回的列（不含正文）
+ARTICLE_SUMMARY_COLUMNS = (
+    models.Article.id,
+    models.Article.title,
+    models.Article.slug,
+    models.Article.excerpt,
+    models.Article.category_id,
+    models.Article.cover_image,
+    models.Article.author_id,
+    models.Article.created_at,
+    models.Article.updated_at,
+    models.Article.view_count,
+    models.Article.like_count,
+    models.Article.is_featured,
+)
+
 class ArticleService:
     """Service for article-related operations."""
 
+    # 以下查询返回绑定到调用方会话的 ORM 对象（调用方会修改并提交），不能跨请求缓存
+
     @staticmethod
-    @cached(prefix="article_by_id", ttl=300)
     def get_article_by_id(db: Session, article_id: int) -> Optional[models.Article]:
         """Get an article by ID."""
         return db.query(models.Article).filter(models.Article.id == article_id).first()
 
     @staticmethod
-    @cached(prefix="article_by_slug", ttl=300)
     def get_article_by_slug(db: Session, slug: str) -> Optional[models.Article]:
         """Get an article by slug."""
         return db.query(models.Article).filter(models.Article.slug == slug).first()
 
     @staticmethod
-    @cached(prefix="articles_list", ttl=60)  # 较短的缓存时间，因为文章列表可能会频繁更新
+    def get_article_id_by_slug(db: Session, slug: str) -> Optional[int]:
+        """Get the ID of an article by slug without loading the article."""
+        return db.query(models.Article.id).filter(models.Article.slug == slug).scalar()
+
+    @staticmethod
     def get_articles(
         db: Session,
         skip: int = 0,
@@ -206,6 +228,28 @@ class ArticleService:
 
         return db_article
 
+    @staticmethod
+    def add_view_counts(db: Session, counts: Dict[int, int], batch_size: int = 500) -> None:
+        """
+        Add buffered view counts to several articles.
+
+        Each batch is a single UPDATE ... SET view_count = view_count + CASE id ... END.
+        """
+        items = list(counts.items())
+        for i in range(0, len(items), batch_size):
+            batch = dict(items[i:i + batch_size])
+            db.execute(
+                update(models.Article)
+                .where(models.Article.id.in_(batch.keys()))
+                .values(
+                    view_count=func.coalesce(models.Article.view_count, 0) + case(batch, value=models.Article.id, else_=0),
+                    # 浏览量不是内容修改，保持 updated_at 不变（覆盖列上的 onupdate）
+                    updated_at=models.Article.updated_at
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
     @staticmethod
     def like_article(db: Session, article_id: int) -> models.Article:
         """Increment the like count of an article."""
@@ -222,3 +266,191 @@ class ArticleService:
         db.refresh(db_article)
 
         return db_article
+
+    # 以下为热点读取路径（文章列表、详情、首页）的异步版本，使用 get_async_db 注入的 AsyncSession，
+    # 等待数据库时不阻塞事件循环。异步会话不能隐式加载关联对象，作者、分类、标签和评论数
+    # 按 ID 各批量查询一次；返回与对应接口响应结构相同的字典
+
+    @staticmethod
+    async def _aget_by_ids(db: AsyncSession, model: Any, ids: Iterable[Optional[int]]) -> Dict[int, Any]:
+        """Rows of a model by primary key."""
+        ids = {value for value in ids if value}
+        if not ids:
+            return {}
+        result = await db.execute(select(model).where(model.id.in_(ids)))
+        return {obj.id: obj for obj in result.scalars()}
+
+    @staticmethod
+    async def _aget_tags(db: AsyncSession, article_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Tags ({"id", "name"}) of each article."""
+        tags: Dict[int, List[Dict[str, Any]]] = {article_id: [] for article_id in article_ids}
+        if article_ids:
+            rows = await db.execute(
+                select(article_tags.c.article_id, models.Tag.id, models.Tag.name)
+                .join(models.Tag, models.Tag.id == article_tags.c.tag_id)
+                .where(article_tags.c.article_id.in_(article_ids))
+                .order_by(article_tags.c.article_id, models.Tag.id)
+            )
+            for article_id, tag_id, name in rows:
+                tags[article_id].append({"id": tag_id, "name": name})
+        return tags
+
+    @staticmethod
+    async def alist_articles(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        is_featured: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Articles (List[ArticleList]) filtered by category name, tag name and featured flag, newest first."""
+        query = select(*ARTICLE_SUMMARY_COLUMNS, models.Category.name.label("category_name")).outerjoin(
+            models.Category, models.Article.category_id == models.Category.id
+        )
+
+        # 分类不存在时不筛选
+        if category:
+            category_id = (await db.execute(
+                select(models.Category.id).where(models.Category.name == category)
+            )).scalar()
+            if category_id:
+                query = query.where(models.Article.category_id == category_id)
+
+        # 标签不存在时返回空列表
+        if tag:
+            tag_id = (await db.execute(select(models.Tag.id).where(models.Tag.name == tag))).scalar()
+            if not tag_id:
+                return []
+            query = query.join(article_tags, models.Article.id == article_tags.c.article_id).where(
+                article_tags.c.tag_id == tag_id
+            )
+
+        if is_featured is not None:
+            query = query.where(models.Article.is_featured == is_featured)
+
+        rows = (await db.execute(
+            query.order_by(models.Article.created_at.desc()).offset(skip).limit(limit)
+        )).all()
+
+        authors = await ArticleService._aget_by_ids(db, models.User, (row.author_id for row in rows))
+        categories = await ArticleService._aget_by_ids(db, models.Category, (row.category_id for row in rows))
+        tags = await ArticleService._aget_tags(db, [row.id for row in rows])
+
+        result = []
+        for row in rows:
+            category_obj = categories.get(row.category_id)
+            result.append({
+                "id": row.id,
+                "title": row.title,
+                "slug": row.slug,
+                "excerpt": row.excerpt,
+                "category_id": row.category_id,
+                "tags_list": tags[row.id],
+                "cover_image": row.cover_image,
+                "author_id": row.author_id,
+                "created_at": row.created_at,
+                "updated_at": row.updated_at,
+                "category_name": row.category_name,
+                "view_count": row.view_count,
+                "like_count": row.like_count,
+                "is_featured": row.is_featured,
+                "author": UserBriefResponse.model_validate(authors.get(row.author_id)),
+                "category": {"id": category_obj.id, "name": category_obj.name} if category_obj else None
+            })
+        return result
+
+    @staticmethod
+    async def aget_article(
+        db: AsyncSession,
+        article_id: Optional[int] = None,
+        slug: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Article with content (ArticleWithContent) by ID or slug, or None."""
+        query = select(
+            *ARTICLE_SUMMARY_COLUMNS, models.Article.content, models.Category.name.label("category_name")
+        ).outerjoin(models.Category, models.Article.category_id == models.Category.id)
+        if article_id is not None:
+            query = query.where(models.Article.id == article_id)
+        else:
+            query = query.where(models.Article.slug == slug)
+
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None
+
+        return {
+            "id": row.id,
+            "title": row.title,
+            "slug": row.slug,
+            "content": row.content,
+            "excerpt": row.excerpt,
+            "category_id": row.category_id,
+            "tags_list": (await ArticleService._aget_tags(db, [row.id]))[row.id],
+            "cover_image": row.cover_image,
+            "author_id": row.author_id,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "category_name": row.category_name,
+            "view_count": row.view_count,
+            "like_count": row.like_count,
+            "is_featured": row.is_featured
+        }
+
+    @staticmethod
+    async def aget_home(db: AsyncSession) -> Dict[str, Any]:
+        """Home page (HomeResponse): latest articles, categories with article counts and featured articles."""
+        rows = (await db.execute(
+            select(*ARTICLE_SUMMARY_COLUMNS).order_by(models.Article.created_at.desc()).limit(10)
+        )).all()
+
+        categories = (await db.execute(
+            select(models.Category.id, models.Category.name, func.count(models.Article.id).label("article_count"))
+            .outerjoin(models.Article, models.Category.id == models.Article.category_id)
+            .group_by(models.Category.id)
+        )).all()
+
+        featured = (await db.execute(
+            select(models.Article.id, models.Article.title, models.Article.cover_image)
+            .where(models.Article.is_featured == True)
+            .limit(5)
+        )).all()
+
+        article_ids = [row.id for row in rows]
+        authors = await ArticleService._aget_by_ids(db, models.User, (row.author_id for row in rows))
+        article_categories = await ArticleService._aget_by_ids(db, models.Category, (row.category_id for row in rows))
+        tags = await ArticleService._aget_tags(db, article_ids)
+        comment_counts: Dict[int, int] = {}
+        if article_ids:
+            comment_counts = dict((await db.execute(
+                select(models.Comment.article_id, func.count(models.Comment.id))
+                .where(models.Comment.article_id.in_(article_ids))
+                .group_by(models.Comment.article_id)
+            )).all())
+
+        home_articles = []
+        for row in rows:
+            category_obj = article_categories.get(row.category_id)
+            home_articles.append({
+                "id": row.id,
+                "title": row.title,
+                "excerpt": row.excerpt or "",
+                "cover_image": row.cover_image,
+                "created_at": row.created_at,
+                "author": UserBriefResponse.model_validate(authors.get(row.author_id)),
+                "category": {"id": category_obj.id, "name": category_obj.name} if category_obj else None,
+                "tags": tags[row.id],
+                "view_count": row.view_count or 0,
+                "like_count": row.like_count or 0,
+                "comment_count": comment_counts.get(row.id, 0)
+            })
+
+        return {
+            "articles": home_articles,
+            "categories": [
+                {"id": row.id, "name": row.name, "articleCount": row.article_count} for row in categories
+            ],
+            "featuredArticles": [
+                {"id": row.id, "title": row.title, "coverImage": row.cover_image} for row in featured
+            ]
+        }
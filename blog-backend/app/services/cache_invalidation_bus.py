@@ -0,0 +1,135 @@
+"""
+跨 worker 的缓存失效总线
+
+每个 uvicorn worker 进程都有自己的进程内缓存（内存后端或两级缓存的 L1）。
+某个 worker 按键、前缀或标签执行失效操作时，通过 Redis pub/sub 广播失效事件，其余 worker
+中的订阅任务收到事件后只清理本进程内的缓存，共享的 Redis 数据由发布方负责删除。
+"""
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+InvalidationHandler = Callable[[str, Any], None]
+
+
+class CacheInvalidationBus:
+    """Publishes cache invalidation events and applies events from other workers."""
+
+    # 失效事件类型
+    KEY = "key"
+    KEYS = "keys"
+    PREFIX = "prefix"
+    TAGS = "tags"
+    CLEAR = "clear"
+
+    # 当前 worker 的唯一标识，用于忽略自己发布的事件
+    worker_id: str = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    _handler: Optional[InvalidationHandler] = None
+    _task: Optional[asyncio.Task] = None
+    _client: Optional[Any] = None
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Whether invalidation events should be published."""
+        return settings.CACHE_INVALIDATION_BUS_ENABLED
+
+    @classmethod
+    def publish(cls, kind: str, value: Any = None) -> None:
+        """Broadcast an invalidation event to the other workers."""
+        if not cls.is_enabled():
+            return
+
+        message = json.dumps({"origin": cls.worker_id, "kind": kind, "value": value})
+        try:
+            from app.services.redis_cache_service import RedisCacheService
+            RedisCacheService.get_client().publish(settings.CACHE_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation event: {e}")
+
+    @classmethod
+    async def apublish(cls, kind: str, value: Any = None) -> None:
+        """Async version of publish."""
+        if not cls.is_enabled():
+            return
+
+        message = json.dumps({"origin": cls.worker_id, "kind": kind, "value": value})
+        try:
+            from app.services.redis_cache_service import RedisCacheService
+            await RedisCacheService.get_async_client().publish(settings.CACHE_INVALIDATION_CHANNEL, message)
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation event: {e}")
+
+    @classmethod
+    def _apply(cls, data: Any) -> None:
+        """Apply an event received from the channel."""
+        try:
+            event: Dict[str, Any] = json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            logger.warning(f"Ignoring malformed cache invalidation event: {data!r}")
+            return
+
+        if event.get("origin") == cls.worker_id or cls._handler is None:
+            return
+
+        cls._handler(event.get("kind"), event.get("value"))
+
+    @classmethod
+    async def _listen(cls) -> None:
+        """Subscribe to the channel and apply events until cancelled."""
+        import redis.asyncio as aioredis
+        from app.services.redis_cache_service import RedisCacheService
+
+        retry_delay = 1
+        while True:
+            try:
+                cls._client = aioredis.Redis(**RedisCacheService.get_connection_kwargs())
+                pubsub = cls._client.pubsub()
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                logger.info(f"Cache invalidation bus subscribed (worker {cls.worker_id})")
+
+                # 断线期间可能错过事件，重新订阅后清空本地缓存
+                if cls._handler is not None:
+                    cls._handler(cls.CLEAR, None)
+                retry_delay = 1
+
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        cls._apply(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation bus disconnected: {e}, retrying in {retry_delay}s")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30)
+            finally:
+                if cls._client is not None:
+                    await cls._client.aclose()
+                    cls._client = None
+
+    @classmethod
+    def start(cls, handler: InvalidationHandler) -> None:
+        """Start the subscriber task on the running event loop."""
+        if not cls.is_enabled() or cls._task is not None:
+            return
+        cls._handler = handler
+        cls._task = asyncio.get_running_loop().create_task(cls._listen())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Cancel the subscriber task."""
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
@@ -0,0 +1,181 @@
+"""
+按缓存键前缀统计的缓存指标
+
+记录每个前缀的命中（区分进程内 L1 与后端）、未命中、写入、删除、淘汰次数，
+写入值的大小，以及读写耗时直方图，用于根据数据调整各类缓存的 TTL。
+前缀取缓存键第一个 ":" 之前的部分（如 comments_by_article、auth、view_count），
+前缀数量有上限，超出的归入 "other"。
+"""
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.request_metrics import RequestMetrics
+from app.services.tracing import Tracer
+from app.utils.metrics import Histogram, PrometheusWriter
+
+# 前缀数量上限，防止异常的键格式导致统计无限增长
+MAX_PREFIXES = 256
+OTHER_PREFIX = "other"
+
+
+class PrefixStats:
+    """Counters for one key prefix."""
+
+    __slots__ = (
+        "hits", "l1_hits", "misses", "sets", "deletes", "evictions",
+        "bytes_written", "max_value_bytes", "get_latency", "set_latency",
+    )
+
+    def __init__(self):
+        self.hits = 0
+        self.l1_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.evictions = 0
+        self.bytes_written = 0
+        self.max_value_bytes = 0
+        # 读写耗时（毫秒）
+        self.get_latency = Histogram()
+        self.set_latency = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "l1_hits": self.l1_hits,
+            "misses": self.misses,
+            "hit_rate": f"{(self.hits / lookups) * 100:.2f}%" if lookups else "0.00%",
+            "sets": self.sets,
+            "deletes": self.deletes,
+            "evictions": self.evictions,
+            "avg_value_bytes": self.bytes_written // self.sets if self.sets else 0,
+            "max_value_bytes": self.max_value_bytes,
+            "get_latency_ms": self.get_latency.snapshot(),
+            "set_latency_ms": self.set_latency.snapshot(),
+        }
+
+
+class CacheMetrics:
+    """In-process per-prefix cache metrics."""
+
+    _prefixes: Dict[str, PrefixStats] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def prefix_of(key: str) -> str:
+        """Metrics bucket of a cache key."""
+        return key.split(":", 1)[0]
+
+    @classmethod
+    def _stats_locked(cls, key: str) -> PrefixStats:
+        prefix = cls.prefix_of(key)
+        stats = cls._prefixes.get(prefix)
+        if stats is None:
+            if len(cls._prefixes) >= MAX_PREFIXES:
+                prefix = OTHER_PREFIX
+                stats = cls._prefixes.get(prefix)
+            if stats is None:
+                stats = cls._prefixes[prefix] = PrefixStats()
+        return stats
+
+    @classmethod
+    def record_get(cls, key: str, source: Optional[str], seconds: float) -> None:
+        """
+        Record a lookup.
+
+        source is "l1" for an in-process L1 hit, "backend" for a hit in the
+        active backend, and None for a miss.
+        """
+        # 计入当前请求所属路由的缓存命中与未命中
+        RequestMetrics.record_cache_lookup(source is not None)
+        Tracer.record("cache.get", seconds, **{"cache.key": key, "cache.hit": source or "miss"})
+        if not settings.CACHE_METRICS_ENABLED:
+            return
+        with cls._lock:
+            stats = cls._stats_locked(key)
+            if source is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+                if source == "l1":
+                    stats.l1_hits += 1
+            stats.get_latency.observe(seconds * 1000)
+
+    @classmethod
+    def record_set(cls, key: str, size: int, seconds: float) -> None:
+        """Record a write of size bytes."""
+        Tracer.record("cache.set", seconds, **{"cache.key": key, "cache.bytes": size})
+        if not settings.CACHE_METRICS_ENABLED:
+            return
+        with cls._lock:
+            stats = cls._stats_locked(key)
+            stats.sets += 1
+            stats.bytes_written += size
+            if size > stats.max_value_bytes:
+                stats.max_value_bytes = size
+            stats.set_latency.observe(seconds * 1000)
+
+    @classmethod
+    def record_delete(cls, key: str) -> None:
+        """Record an explicit delete."""
+        if not settings.CACHE_METRICS_ENABLED:
+            return
+        with cls._lock:
+            cls._stats_locked(key).deletes += 1
+
+    @classmethod
+    def record_eviction(cls, key: str) -> None:
+        """Record an LRU eviction from an in-process cache."""
+        if not settings.CACHE_METRICS_ENABLED:
+            return
+        with cls._lock:
+            cls._stats_locked(key).evictions += 1
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Per-prefix counters, sorted by prefix."""
+        with cls._lock:
+            return {prefix: cls._prefixes[prefix].to_dict() for prefix in sorted(cls._prefixes)}
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop all counters."""
+        with cls._lock:
+            cls._prefixes.clear()
+
+    @classmethod
+    def write_prometheus(cls, writer: PrometheusWriter) -> None:
+        """Append the cache metrics to a Prometheus document."""
+        with cls._lock:
+            items = sorted(cls._prefixes.items())
+            writer.counter("cache_hits_total", "Cache hits by key prefix and layer.", (
+                sample
+                for prefix, stats in items
+                for sample in (
+                    ({"prefix": prefix, "layer": "l1"}, stats.l1_hits),
+                    ({"prefix": prefix, "layer": "backend"}, stats.hits - stats.l1_hits),
+                )
+            ))
+            writer.counter("cache_misses_total", "Cache misses by key prefix.",
+                           (({"prefix": prefix}, stats.misses) for prefix, stats in items))
+            writer.counter("cache_sets_total", "Cache writes by key prefix.",
+                           (({"prefix": prefix}, stats.sets) for prefix, stats in items))
+            writer.counter("cache_deletes_total", "Explicit cache deletes by key prefix.",
+                           (({"prefix": prefix}, stats.deletes) for prefix, stats in items))
+            writer.counter("cache_evictions_total", "In-process LRU evictions by key prefix.",
+                           (({"prefix": prefix}, stats.evictions) for prefix, stats in items))
+            writer.counter("cache_written_bytes_total", "Bytes written to the cache by key prefix.",
+                           (({"prefix": prefix}, stats.bytes_written) for prefix, stats in items))
+            writer.histogram("cache_get_duration_seconds", "Cache lookup latency by key prefix.",
+                             (({"prefix": prefix}, stats.get_latency) for prefix, stats in items), scale=0.001)
+            writer.histogram("cache_set_duration_seconds", "Cache write latency by key prefix.",
+                             (({"prefix": prefix}, stats.set_latency) for prefix, stats in items), scale=0.001)
+
+    @classmethod
+    def render_prometheus(cls) -> str:
+        """Cache metrics in the Prometheus text exposition format."""
+        writer = PrometheusWriter()
+        cls.write_prometheus(writer)
+        return writer.render()
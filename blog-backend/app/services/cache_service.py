@@ -1,53 +1,313 @@
 import time
 import json
 import hashlib
-from typing import Any, Dict, Optional, Callable, TypeVar, cast
+import fnmatch
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Callable, TypeVar, cast, List, Tuple, Set, Iterable
 from functools import wraps
 
+from app.core.config import settings
+from app.services.cache_metrics import CacheMetrics
+
 # 定义缓存类型
 T = TypeVar('T')
 
+
+def estimate_size(value: Any) -> int:
+    """估算缓存值占用的字节数（按 JSON 编码长度计算）"""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except (TypeError, ValueError):
+        return 0
+
+
+class BoundedTTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL and a memory budget.
+
+    Entries are evicted in least-recently-used order once either ``max_items``
+    or ``max_bytes`` is exceeded; expired entries are dropped lazily on access.
+    Entries may carry tags, and ``delete_tag`` removes every entry of a tag
+    without scanning the whole cache.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_bytes: int,
+        size_of: Callable[[Any], int] = estimate_size,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._size_of = size_of
+        # 淘汰回调（在持有锁时调用，必须足够轻量）
+        self._on_evict = on_evict
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        # 标签索引: tag -> {key}，以及反向索引 key -> (tag, ...)
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove_locked(self, key: str) -> bool:
+        """Remove key and its tag memberships; caller must hold the lock."""
+        item = self._data.pop(key, None)
+        if item is None:
+            return False
+        self._bytes -= item[2]
+        for tag in self._key_tags.pop(key, ()):
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tags[tag]
+        return True
+
+    def _get_locked(self, key: str, now: float) -> Optional[Any]:
+        """Look up key, dropping it when expired; caller must hold the lock."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at, _ = item
+        if expires_at < now:
+            self._remove_locked(key)
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set_locked(self, key: str, value: Any, expires_at: float, size: int, tags: Tuple[str, ...]) -> None:
+        """Store an entry without enforcing the budget; caller must hold the lock."""
+        self._remove_locked(key)
+        if size > self.max_bytes:
+            # 超过整体预算的值不进入缓存
+            return
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def _evict_locked(self) -> None:
+        """Evict LRU entries until within budget; caller must hold the lock."""
+        while self._data and (len(self._data) > self.max_items or self._bytes > self.max_bytes):
+            key = next(iter(self._data))
+            self._remove_locked(key)
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for key, or None when missing or expired."""
+        with self._lock:
+            return self._get_locked(key, time.time())
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the present, non-expired values of keys in one lock pass."""
+        now = time.time()
+        result = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_locked(key, now)
+                if value is not None:
+                    result[key] = value
+        return result
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        """Store value for ttl seconds, evicting LRU entries over budget."""
+        self.set_many({key: value}, ttl, tags)
+
+    def set_many(self, items: Dict[str, Any], ttl: int, tags: Iterable[str] = ()) -> None:
+        """Store several values with the same ttl and tags in one lock pass."""
+        # 在锁外计算大小，序列化开销不占用锁
+        sized = [(key, value, self._size_of(value)) for key, value in items.items()]
+        tags = tuple(tags)
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key, value, size in sized:
+                self._set_locked(key, value, expires_at, size, tags)
+            self._evict_locked()
+
+    def delete(self, key: str) -> bool:
+        """Remove key; returns True when it was present."""
+        with self._lock:
+            return self._remove_locked(key)
+
+    def entry_size(self, key: str) -> int:
+        """Accounted size of the entry stored under key (0 when missing)."""
+        item = self._data.get(key)
+        return item[2] if item is not None else 0
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Remove several keys in one lock pass; returns the number removed."""
+        with self._lock:
+            return sum(1 for key in keys if self._remove_locked(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with prefix; returns the number removed."""
+        with self._lock:
+            matched = [key for key in self._data if key.startswith(prefix)]
+            for key in matched:
+                self._remove_locked(key)
+            return len(matched)
+
+    def delete_tag(self, tag: str) -> int:
+        """Remove every key carrying tag; returns the number removed."""
+        with self._lock:
+            matched = list(self._tags.get(tag, ()))
+            for key in matched:
+                self._remove_locked(key)
+            return len(matched)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+            self._bytes = 0
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        """Return the non-expired keys matching a glob pattern."""
+        now = time.time()
+        with self._lock:
+            return [
+                key for key, (_, expires_at, _) in self._data.items()
+                if expires_at >= now and (pattern == "*" or fnmatch.fnmatchcase(key, pattern))
+            ]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and eviction counters."""
+        return {
+            "keys_count": len(self._data),
+            "tags_count": len(self._tags),
+            "bytes": self._bytes,
+            "max_items": self.max_items,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
 class CacheService:
-    """Simple in-memory cache service with TTL support."""
-    
-    # 内存缓存存储
-    _cache: Dict[str, Dict[str, Any]] = {}
-    
+    """Bounded in-memory cache service with TTL support."""
+
+    # 内存缓存存储（按条目数和内存预算做 LRU 淘汰）
+    _cache = BoundedTTLCache(
+        max_items=settings.CACHE_MEMORY_MAX_ITEMS,
+        max_bytes=settings.CACHE_MEMORY_MAX_BYTES,
+        on_evict=CacheMetrics.record_eviction
+    )
+
     @classmethod
     def get(cls, key: str) -> Optional[Any]:
         """Get a value from cache if it exists and is not expired."""
-        if key not in cls._cache:
-            return None
-            
-        cache_item = cls._cache[key]
-        
-        # 检查是否过期
-        if 'expires_at' in cache_item and cache_item['expires_at'] < time.time():
-            # 已过期，删除缓存项
-            del cls._cache[key]
-            return None
-            
-        return cache_item.get('value')
-    
+        return cls._cache.get(key)
+
     @classmethod
-    def set(cls, key: str, value: Any, ttl: int = 300) -> None:
+    def set(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
         """Set a value in cache with TTL in seconds."""
-        cls._cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl
-        }
-    
+        cls._cache.set(key, value, ttl, tags or ())
+
     @classmethod
     def delete(cls, key: str) -> None:
         """Delete a value from cache."""
-        if key in cls._cache:
-            del cls._cache[key]
-    
+        cls._cache.delete(key)
+
+    @classmethod
+    def get_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the cached values of several keys; missing keys are omitted."""
+        return cls._cache.get_many(keys)
+
+    @classmethod
+    def set_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Set several values with the same TTL."""
+        cls._cache.set_many(items, ttl, tags or ())
+
+    @classmethod
+    def delete_many(cls, keys: Iterable[str]) -> None:
+        """Delete several keys."""
+        cls._cache.delete_many(keys)
+
     @classmethod
     def clear(cls) -> None:
         """Clear all cache."""
         cls._cache.clear()
-    
+
+    @classmethod
+    def delete_by_prefix(cls, prefix: str) -> None:
+        """Delete every key starting with prefix."""
+        cls._cache.delete_prefix(prefix)
+
+    @classmethod
+    def invalidate_tags(cls, tags: Iterable[str]) -> None:
+        """Delete every key carrying any of the tags."""
+        for tag in tags:
+            cls._cache.delete_tag(tag)
+
+    # 内存缓存的读写不涉及 I/O，异步接口直接复用同步实现
+
+    @classmethod
+    async def aget(cls, key: str) -> Optional[Any]:
+        """Async version of get."""
+        return cls.get(key)
+
+    @classmethod
+    async def aset(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set."""
+        cls.set(key, value, ttl, tags)
+
+    @classmethod
+    async def adelete(cls, key: str) -> None:
+        """Async version of delete."""
+        cls.delete(key)
+
+    @classmethod
+    async def ainvalidate_tags(cls, tags: Iterable[str]) -> None:
+        """Async version of invalidate_tags."""
+        cls.invalidate_tags(tags)
+
+    @classmethod
+    async def aget_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """Async version of get_many."""
+        return cls.get_many(keys)
+
+    @classmethod
+    async def aset_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set_many."""
+        cls.set_many(items, ttl, tags)
+
+    @classmethod
+    async def adelete_many(cls, keys: Iterable[str]) -> None:
+        """Async version of delete_many."""
+        cls.delete_many(keys)
+
+    @classmethod
+    def get_keys(cls, pattern: str = "*") -> List[str]:
+        """Get all keys matching pattern."""
+        return cls._cache.keys(pattern)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {"type": "memory", **cls._cache.get_stats()}
+
     @classmethod
     def generate_key(cls, prefix: str, *args: Any, **kwargs: Any) -> str:
         """Generate a cache key from prefix and arguments."""
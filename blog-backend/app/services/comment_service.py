@@ -1,6 +1,8 @@
 from typing import List, Optional, Tuple, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, asc, func, select
 from fastapi import HTTPException, status
 from datetime import datetime, timezone
 import json
@@ -11,22 +13,122 @@ from app.utils.logging import get_logger
 from app.utils.pagination import PaginationParams, PagedResponse
 from app.services.content_filter_service import ContentFilterService
 from app.services.ip_location_service import IPLocationService
-from app.services.unified_cache_service import cached
+from app.services.unified_cache_service import UnifiedCacheService, cached
 from app.services.site_settings_service import SiteSettingsService
+from app.services.tracing import traced
 
 logger = get_logger(__name__)
 
 class CommentService:
     """Service for comment-related operations."""
 
+    # 返回绑定到调用方会话的 ORM 对象（调用方会修改并提交），不做缓存
     @staticmethod
-    @cached(prefix="comment_by_id", ttl=300)
     def get_comment_by_id(db: Session, comment_id: int) -> Optional[models.Comment]:
         """Get a comment by ID."""
         return db.query(models.Comment).filter(models.Comment.id == comment_id).first()
 
     @staticmethod
-    @cached(prefix="comments_by_article", ttl=60)
+    def invalidate_article_comments(article_id: int) -> None:
+        """清除文章评论列表缓存"""
+        UnifiedCacheService.invalidate_tags(f"article:{article_id}:comments")
+
+    @staticmethod
+    def _social_media_by_user(user_records: List[Any]) -> Dict[int, Any]:
+        """Parsed social media links of users (rows with id and social_media)."""
+        user_social_media = {}
+        for user in user_records:
+            if user.social_media:
+                try:
+                    user_social_media[user.id] = json.loads(user.social_media)
+                except json.JSONDecodeError:
+                    user_social_media[user.id] = None
+        return user_social_media
+
+    @staticmethod
+    def _with_replies(
+        comment: models.Comment,
+        replies: List[models.Comment],
+        article_title: Optional[str],
+        users: Dict[int, str],
+        user_social_media: Dict[int, Any],
+        current_user: Optional[models.User]
+    ) -> CommentWithReplies:
+        """
+        Build one item of the article comment list.
+
+        users and user_social_media hold the usernames and parsed social media
+        links of the comment's and replies' authors.
+        """
+        # 处理用户的社交媒体字段
+        if comment.user and comment.user.social_media and isinstance(comment.user.social_media, str):
+            try:
+                comment.user.social_media = json.loads(comment.user.social_media)
+            except json.JSONDecodeError:
+                comment.user.social_media = None
+
+        # 处理回复中用户的社交媒体字段
+        for reply in replies:
+            if reply.user and reply.user.social_media and isinstance(reply.user.social_media, str):
+                try:
+                    reply.user.social_media = json.loads(reply.user.social_media)
+                except json.JSONDecodeError:
+                    reply.user.social_media = None
+
+        # Convert to schema
+        comment_dict = CommentWithReplies.model_validate(comment)
+        comment_dict.article_title = article_title
+
+        # 设置评论者名称
+        if comment.user_id:
+            # 如果是当前登录用户的评论，直接使用当前用户对象
+            if current_user and current_user.id == comment.user_id:
+                comment_dict.commenter_name = current_user.username
+                # 处理当前用户的社交媒体字段
+                if current_user.social_media:
+                    try:
+                        comment_dict.user.social_media = json.loads(current_user.social_media) if isinstance(current_user.social_media, str) else current_user.social_media
+                    except json.JSONDecodeError:
+                        comment_dict.user.social_media = None
+            else:
+                comment_dict.commenter_name = users.get(comment.user_id, "未知用户")
+                # 设置用户的社交媒体字段
+                if comment_dict.user and comment.user_id in user_social_media:
+                    comment_dict.user.social_media = user_social_media[comment.user_id]
+        else:
+            comment_dict.commenter_name = comment.anonymous_name or "匿名用户"
+
+        # 处理回复
+        replies_with_names = []
+        for reply in replies:
+            reply_dict = CommentBrief.model_validate(reply)
+
+            # 设置回复者名称
+            if reply.user_id:
+                # 如果是当前登录用户的回复，直接使用当前用户对象
+                if current_user and current_user.id == reply.user_id:
+                    reply_dict.commenter_name = current_user.username
+                    # 处理当前用户的社交媒体字段
+                    if current_user.social_media:
+                        try:
+                            reply_dict.user.social_media = json.loads(current_user.social_media) if isinstance(current_user.social_media, str) else current_user.social_media
+                        except json.JSONDecodeError:
+                            reply_dict.user.social_media = None
+                else:
+                    reply_dict.commenter_name = users.get(reply.user_id, "未知用户")
+                    # 设置用户的社交媒体字段
+                    if reply_dict.user and reply.user_id in user_social_media:
+                        reply_dict.user.social_media = user_social_media[reply.user_id]
+            else:
+                reply_dict.commenter_name = reply.anonymous_name or "匿名用户"
+
+            replies_with_names.append(reply_dict)
+
+        comment_dict.replies = replies_with_names
+        return comment_dict
+
+    @staticmethod
+    @cached(prefix="comments_by_article", ttl=60, tags=["article:{article_id}:comments"])
     def get_comments_by_article(
         db: Session,
         article_id: int,
@@ -35,10 +137,12 @@ class CommentService:
         sort_by: str = "newest",
         parent_only: bool = True,
         current_user: Optional[models.User] = None
-    ) -> PagedResponse[CommentWithReplies]:
+    ) -> Dict[str, Any]:
         """
         Get comments for an article with pagination and sorting.
 
+        The result is cached as a plain snapshot of ``PagedResponse[CommentWithReplies]``.
+
         Args:
             db: Database session
             article_id: ID of the article
@@ -94,25 +198,6 @@ class CommentService:
 
             replies = replies_query.order_by(asc(models.Comment.created_at)).all()
 
-            # 处理用户的社交媒体字段
-            if comment.user and comment.user.social_media and isinstance(comment.user.social_media, str):
-                try:
-                    comment.user.social_media = json.loads(comment.user.social_media)
-                except json.JSONDecodeError:
-                    comment.user.social_media = None
-
-            # 处理回复中用户的社交媒体字段
-            for reply in replies:
-                if reply.user and reply.user.social_media and isinstance(reply.user.social_media, str):
-                    try:
-                        reply.user.social_media = json.loads(reply.user.social_media)
-                    except json.JSONDecodeError:
-                        reply.user.social_media = None
-
-            # Convert to schema
-            comment_dict = CommentWithReplies.model_validate(comment)
-            comment_dict.article_title = article_title
-
             # 批量获取用户信息，解决 N+1 查询问题
             # 收集所有评论和回复的用户ID
             all_user_ids = []
@@ -134,67 +219,100 @@ class CommentService:
                     models.User.id.in_(unique_user_ids)
                 ).all()
                 users = {user.id: user.username for user in user_records}
+                user_social_media = CommentService._social_media_by_user(user_records)
 
-                # 处理社交媒体字段
-                for user in user_records:
-                    if user.social_media:
-                        try:
-                            user_social_media[user.id] = json.loads(user.social_media)
-                        except json.JSONDecodeError:
-                            user_social_media[user.id] = None
+            result.append(CommentService._with_replies(
+                comment, replies, article_title, users, user_social_media, current_user
+            ))
 
-            # 设置评论者名称
-            if comment.user_id:
-                # 如果是当前登录用户的评论，直接使用当前用户对象
-                if current_user and current_user.id == comment.user_id:
-                    comment_dict.commenter_name = current_user.username
-                    # 处理当前用户的社交媒体字段
-                    if current_user.social_media:
-                        try:
-                            comment_dict.user.social_media = json.loads(current_user.social_media) if isinstance(current_user.social_media, str) else current_user.social_media
-                        except json.JSONDecodeError:
-                            comment_dict.user.social_media = None
-                else:
-                    comment_dict.commenter_name = users.get(comment.user_id, "未知用户")
-                    # 设置用户的社交媒体字段
-                    if comment_dict.user and comment.user_id in user_social_media:
-                        comment_dict.user.social_media = user_social_media[comment.user_id]
-            else:
-                comment_dict.commenter_name = comment.anonymous_name or "匿名用户"
+        # Create paginated response
+        return PagedResponse.create(result, total, params)
 
-            # 处理回复
-            replies_with_names = []
-            for reply in replies:
-                reply_dict = CommentBrief.model_validate(reply)
+    @staticmethod
+    @cached(prefix="comments_by_article", ttl=60, tags=["article:{article_id}:comments"])
+    async def aget_comments_by_article(
+        db: AsyncSession,
+        article_id: int,
+        params: PaginationParams,
+        approved_only: bool = True,
+        sort_by: str = "newest",
+        parent_only: bool = True,
+        current_user: Optional[models.User] = None
+    ) -> Dict[str, Any]:
+        """
+        Async version of get_comments_by_article for the article comment list.
 
-                # 设置回复者名称
-                if reply.user_id:
-                    # 如果是当前登录用户的回复，直接使用当前用户对象
-                    if current_user and current_user.id == reply.user_id:
-                        reply_dict.commenter_name = current_user.username
-                        # 处理当前用户的社交媒体字段
-                        if current_user.social_media:
-                            try:
-                                reply_dict.user.social_media = json.loads(current_user.social_media) if isinstance(current_user.social_media, str) else current_user.social_media
-                            except json.JSONDecodeError:
-                                reply_dict.user.social_media = None
-                    else:
-                        reply_dict.commenter_name = users.get(reply.user_id, "未知用户")
-                        # 设置用户的社交媒体字段
-                        if reply_dict.user and reply.user_id in user_social_media:
-                            reply_dict.user.social_media = user_social_media[reply.user_id]
-                else:
-                    reply_dict.commenter_name = reply.anonymous_name or "匿名用户"
+        Authors are eager-loaded and the replies of all comments on the page are
+        fetched in one query. The result and its cache entries are the same as the
+        sync version's.
+        """
+        article_title = (await db.execute(
+            select(models.Article.title).where(models.Article.id == article_id)
+        )).scalar()
 
-                replies_with_names.append(reply_dict)
+        conditions = [models.Comment.article_id == article_id]
+        if approved_only:
+            conditions.append(models.Comment.is_approved == True)
+        if parent_only:
+            conditions.append(models.Comment.parent_id == None)
 
-            comment_dict.replies = replies_with_names
-            result.append(comment_dict)
+        if sort_by == "oldest":
+            order_by = [asc(models.Comment.created_at)]
+        elif sort_by == "most_liked":
+            order_by = [desc(models.Comment.like_count), desc(models.Comment.created_at)]
+        else:  # default to "newest"
+            order_by = [desc(models.Comment.created_at)]
+
+        total = (await db.execute(
+            select(func.count()).select_from(models.Comment).where(*conditions)
+        )).scalar()
+
+        comments = (await db.execute(
+            select(models.Comment)
+            .options(selectinload(models.Comment.user))
+            .where(*conditions)
+            .order_by(*order_by)
+            .offset(params.skip)
+            .limit(params.page_size)
+        )).scalars().all()
+
+        # 一次查询当前页所有评论的回复
+        replies_by_parent: Dict[int, List[models.Comment]] = {comment.id: [] for comment in comments}
+        if comments:
+            reply_conditions = [models.Comment.parent_id.in_(replies_by_parent)]
+            if approved_only:
+                reply_conditions.append(models.Comment.is_approved == True)
+            replies = (await db.execute(
+                select(models.Comment)
+                .options(selectinload(models.Comment.user))
+                .where(*reply_conditions)
+                .order_by(asc(models.Comment.created_at))
+            )).scalars().all()
+            for reply in replies:
+                replies_by_parent[reply.parent_id].append(reply)
+
+        # 作者已随评论加载，在解析社交媒体字段之前记录用户名和原始的社交媒体字段
+        user_records = {}
+        for comment in comments:
+            for item in [comment] + replies_by_parent[comment.id]:
+                if item.user is not None:
+                    user_records[item.user.id] = item.user
+        users = {user.id: user.username for user in user_records.values()}
+        user_social_media = CommentService._social_media_by_user(list(user_records.values()))
+
+        result = []
+        for comment in comments:
+            replies = replies_by_parent[comment.id]
+            # 模型校验会读取 replies 关系，预先设置为已加载的回复，避免异步会话中的隐式加载
+            set_committed_value(comment, "replies", replies)
+            result.append(CommentService._with_replies(
+                comment, replies, article_title, users, user_social_media, current_user
+            ))
 
-        # Create paginated response
         return PagedResponse.create(result, total, params)
 
     @staticmethod
+    @traced("CommentService.create_comment")
     async def create_comment(
         db: Session,
         comment: CommentCreate,
@@ -310,6 +428,8 @@ class CommentService:
 
             db.commit()
 
+        CommentService.invalidate_article_comments(comment.article_id)
+
         logger.info(f"Created new comment on article {comment.article_id}")
         return db_comment
 
@@ -342,6 +462,8 @@ class CommentService:
         db.commit()
         db.refresh(db_comment)
 
+        CommentService.invalidate_article_comments(db_comment.article_id)
+
         logger.info(f"Updated comment {comment_id}")
         return db_comment
 
@@ -359,6 +481,8 @@ class CommentService:
         db.commit()
         db.refresh(db_comment)
 
+        CommentService.invalidate_article_comments(db_comment.article_id)
+
         logger.info(f"Approved comment {comment_id}")
         return db_comment
 
@@ -379,9 +503,12 @@ class CommentService:
                 detail="Permission denied"
             )
 
+        article_id = db_comment.article_id
         db.delete(db_comment)
         db.commit()
 
+        CommentService.invalidate_article_comments(article_id)
+
         logger.info(f"Deleted comment {comment_id}")
         return True
 
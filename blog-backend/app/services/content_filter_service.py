@@ -4,6 +4,7 @@ import json
 import httpx
 from typing import Dict, List, Tuple, Optional
 from fastapi import HTTPException, status
+from app.services.tracing import async_http_client, traced
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -70,7 +71,7 @@ class ContentFilterService:
                 - Reason for rejection if not approved
         """
         try:
-            async with httpx.AsyncClient() as client:
+            async with async_http_client() as client:
                 response = await client.post(
                     "https://openrouter.ai/api/v1/chat/completions",
                     headers={
@@ -121,6 +122,7 @@ class ContentFilterService:
             return False, f"AI审核失败: {str(e)}"
     
     @classmethod
+    @traced("ContentFilterService.moderate_content")
     async def moderate_content(cls, content: str, api_key: Optional[str] = None) -> Tuple[bool, str]:
         """
         Moderate content using local filter and optionally AI API.
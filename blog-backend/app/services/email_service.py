@@ -3,13 +3,13 @@ import random
 import string
 import logging
 from typing import Dict, Optional, Tuple
-import httpx
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 
 from app.core.config import settings
 from app.services.unified_cache_service import UnifiedCacheService
 from app.services.site_settings_service import SiteSettingsService
+from app.services.tracing import async_http_client
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -86,7 +86,7 @@ class EmailService:
 
         try:
             # 发送请求
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with async_http_client(timeout=10.0) as client:
                 response = await client.post(
                     "https://api.resend.com/emails",
                     headers={
@@ -1,11 +1,12 @@
 import os
 import json
+import threading
 import time
-from ipregion import IP2Region
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from app.utils.logging import get_logger
+from app.services.tracing import Tracer, traced
 from app.services.unified_cache_service import UnifiedCacheService
 
 logger = get_logger(__name__)
@@ -14,25 +15,34 @@ class IPLocationService:
     """Service for resolving IP address locations."""
 
     _ip2region = None
-    _cache_service = None
+    _initialized = False
+    _init_lock = threading.Lock()
     _cache_prefix = "ip_location:"
     _cache_ttl = 86400 * 7  # 7 days in seconds
 
     @classmethod
-    def init_app(cls):
-        """Initialize the service when the application starts."""
-        # 初始化 IP2Region 数据库
-        cls.initialize()
-
-        # 初始化缓存服务
-        cls._cache_service = UnifiedCacheService()
+    def init_app(cls) -> bool:
+        """
+        Load the IP2Region database once; returns whether it is loaded.
 
-        logger.info("IPLocationService initialized with cache")
+        Called on the first lookup, or ahead of time from the application lifespan.
+        A failed load (initialize logs the error) is retried on the next lookup.
+        """
+        if cls._initialized:
+            return True
+        with cls._init_lock:
+            if not cls._initialized:
+                cls.initialize()
+                cls._initialized = cls._ip2region is not None
+        return cls._initialized
 
     @classmethod
     def initialize(cls, db_path: Optional[str] = None):
         """Initialize the IP2Region database."""
         try:
+            # ipregion 导入时会导入 requests 等模块，延迟到首次查询或启动后的预热
+            from ipregion import IP2Region
+
             if not db_path:
                 # 使用默认路径
                 cur_path = os.path.abspath(os.path.dirname(__file__))
@@ -66,12 +76,9 @@ class IPLocationService:
     @classmethod
     def _get_from_cache(cls, ip_address: str) -> Optional[str]:
         """Get location from cache."""
-        if not cls._cache_service:
-            return None
-
         try:
             cache_key = cls._get_cache_key(ip_address)
-            cached_value = cls._cache_service.get(cache_key)
+            cached_value = UnifiedCacheService.get(cache_key)
 
             if cached_value:
                 logger.debug(f"Cache hit for IP: {ip_address}")
@@ -86,12 +93,12 @@ class IPLocationService:
     @classmethod
     def _save_to_cache(cls, ip_address: str, location: str) -> bool:
         """Save location to cache."""
-        if not cls._cache_service or not location or location == "未知地区":
+        if not location or location == "未知地区":
             return False
 
         try:
             cache_key = cls._get_cache_key(ip_address)
-            cls._cache_service.set(cache_key, location, cls._cache_ttl)
+            UnifiedCacheService.set(cache_key, location, cls._cache_ttl)
             logger.debug(f"Cached IP location: {ip_address} -> {location}")
             return True
         except Exception as e:
@@ -99,6 +106,7 @@ class IPLocationService:
             return False
 
     @classmethod
+    @traced("IPLocationService.get_location")
     def get_location(cls, ip_address: str) -> str:
         """
         Get location information for an IP address.
@@ -129,8 +137,7 @@ class IPLocationService:
             return cached_location
 
         # 如果缓存中没有，初始化 IP2Region
-        if not cls._ip2region:
-            cls.initialize()
+        cls.init_app()
 
         if not cls._ip2region:
             # 缓存未知地区结果，避免重复查询
@@ -141,7 +148,8 @@ class IPLocationService:
             # 简化查询逻辑，直接使用 search 方法
             try:
                 # 使用全局实例而不是创建新实例
-                region = cls._ip2region.search(ip_address)
+                with Tracer.span("ip2region.search"):
+                    region = cls._ip2region.search(ip_address)
                 logger.debug(f"[性能] IP地址解析耗时: {(time.time() - start_time) * 1000:.2f}ms")
                 # 记录返回的region类型，便于调试
                 logger.debug(f"IP2Region返回类型: {type(region)}, 值: {region}")
@@ -0,0 +1,168 @@
+"""
+SQL 检查：N+1 查询、慢查询和每个请求的查询预算
+
+用于开发和预发环境（QUERY_INSPECTOR_ENABLED，生产环境默认关闭），依赖 RequestMetrics
+的 SQL 事件和请求上下文：
+- 同一请求内的语句按归一化文本分组（字面量、占位符和 IN 列表替换为 ?），
+  同一语句执行超过 N_PLUS_ONE_THRESHOLD 次时记录一条 N+1 告警；
+- 耗时超过 SLOW_QUERY_MS 的语句连同绑定参数和路由写入日志；
+- 路由的 SQL 语句数超过预算（@query_budget 或 QUERY_BUDGET_DEFAULT）时告警，
+  QUERY_BUDGET_STRICT 开启时抛出 QueryBudgetExceeded，使测试失败。
+最近的告警通过 /metrics/queries 查看，各类告警的次数计入 /metrics。
+"""
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.logging import get_logger
+from app.utils.metrics import PrometheusWriter
+
+logger = get_logger(__name__)
+
+QUERY_BUDGET_ATTR = "__query_budget__"
+
+# 保留的最近告警数量
+MAX_FINDINGS = 200
+# 日志中语句和参数的最大长度
+MAX_LOGGED_CHARS = 500
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\([^()]*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a request runs more SQL statements than its budget."""
+
+
+def query_budget(max_queries: int):
+    """
+    设置接口每个请求允许的 SQL 语句数
+
+    标记放在 @router.get 之下；超出时告警，QUERY_BUDGET_STRICT 开启时抛出异常。
+    """
+    def decorator(func: Callable):
+        setattr(func, QUERY_BUDGET_ATTR, max_queries)
+        return func
+    return decorator
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """Statement text with literals, placeholders and IN lists replaced by ?."""
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (?)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_LOGGED_CHARS else text[:MAX_LOGGED_CHARS] + "..."
+
+
+class QueryInspector:
+    """Per-request SQL grouping for N+1, slow-query and budget checks."""
+
+    _findings: Deque[Dict[str, Any]] = deque(maxlen=MAX_FINDINGS)
+    _counts: Dict[Tuple[str, str, str], int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _report(cls, kind: str, route: str, method: str, **details: Any) -> None:
+        with cls._lock:
+            cls._findings.append({"type": kind, "route": route, "method": method, "at": time.time(), **details})
+            key = (route, method, kind)
+            cls._counts[key] = cls._counts.get(key, 0) + 1
+
+    @classmethod
+    def observe(cls, stats: Any, statement: str, parameters: Any, seconds: float) -> None:
+        """Group one executed statement of a request (RequestStats); log it if it was slow."""
+        key = normalize_statement(statement)
+        entry = stats.statements.get(key)
+        if entry is None:
+            stats.statements[key] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+        duration_ms = seconds * 1000
+        if settings.SLOW_QUERY_MS and duration_ms >= settings.SLOW_QUERY_MS:
+            route, method = stats.route()
+            logger.warning(
+                f"Slow query ({duration_ms:.1f}ms) in {method} {route}: "
+                f"{_truncate(statement)} | params={_truncate(parameters)}"
+            )
+            # 绑定参数可能含有邮箱、IP、令牌等，只写入服务器日志
+            cls._report(
+                "slow_query", route, method, duration_ms=round(duration_ms, 3), statement=_truncate(statement)
+            )
+
+    @classmethod
+    def check_budget(cls, stats: Any) -> None:
+        """
+        Check a request's (RequestStats) statement count against its query budget.
+
+        Called when the response starts, so that in strict mode QueryBudgetExceeded
+        fails the request (a 500, re-raised by the test client) instead of surfacing
+        after a successful response. Statements run after the response starts
+        (background tasks) are not counted.
+        """
+        budget = getattr(stats.scope.get("endpoint"), QUERY_BUDGET_ATTR, None) or settings.QUERY_BUDGET_DEFAULT
+        if budget and stats.queries > budget:
+            route, method = stats.route()
+            message = f"{method} {route} ran {stats.queries} SQL statements, budget is {budget}"
+            logger.warning(f"Query budget exceeded: {message}")
+            cls._report("budget_exceeded", route, method, queries=stats.queries, budget=budget)
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+
+    @classmethod
+    def finish(cls, stats: Any) -> None:
+        """Check a finished request (RequestStats) for repeated statements."""
+        route, method = stats.route()
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        for statement, (count, seconds) in stats.statements.items():
+            if count > threshold:
+                logger.warning(
+                    f"Possible N+1 in {method} {route}: executed {int(count)} times "
+                    f"({seconds * 1000:.1f}ms total): {_truncate(statement)}"
+                )
+                cls._report(
+                    "n_plus_one", route, method,
+                    count=int(count), total_ms=round(seconds * 1000, 3), statement=_truncate(statement)
+                )
+
+
+    @classmethod
+    def get_findings(cls, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent findings first, optionally of one type."""
+        with cls._lock:
+            findings = [item for item in reversed(cls._findings) if kind is None or item["type"] == kind]
+        return findings[:limit]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._findings.clear()
+            cls._counts.clear()
+
+    @classmethod
+    def write_prometheus(cls, writer: PrometheusWriter) -> None:
+        """Append the finding counters to a Prometheus document."""
+        with cls._lock:
+            writer.counter(
+                "sql_inspector_findings_total",
+                "N+1, slow query and query budget findings by route.",
+                (
+                    ({"route": route, "method": method, "type": kind}, count)
+                    for (route, method, kind), count in sorted(cls._counts.items())
+                )
+            )
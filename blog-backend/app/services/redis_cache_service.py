@@ -1,13 +1,16 @@
 import json
 import time
+import uuid
 import hashlib
-from typing import Any, Dict, Optional, Callable, TypeVar, cast, List
+from typing import Any, Dict, Optional, Callable, TypeVar, cast, List, Iterable, Union
 from functools import wraps
 import redis
+import redis.asyncio as aioredis
 from redis.client import Redis
 from redis.connection import ConnectionPool
 
 from app.core.config import settings
+from app.utils.cache_codec import CacheCodec
 from app.utils.logging import get_logger
 
 # 定义缓存类型
@@ -15,37 +18,65 @@ T = TypeVar('T')
 
 logger = get_logger(__name__)
 
+# 标签集合的键前缀：cache:tag:{tag} -> {cache_key, ...}
+TAG_KEY_PREFIX = "cache:tag:"
+# 批量删除时每条 DEL 命令的键数量
+DELETE_BATCH_SIZE = 500
+# 仅当锁仍属于自己时才删除
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 class RedisCacheService:
     """Redis-based cache service with TTL support."""
     
     _pool: Optional[ConnectionPool] = None
     _client: Optional[Redis] = None
+    # asyncio 客户端与连接池，供 async 路由、中间件和 WebSocket 使用，不阻塞事件循环
+    _async_pool: Optional[aioredis.ConnectionPool] = None
+    _async_client: Optional[aioredis.Redis] = None
+    # 每个标签集合下次清理过期成员的大小（本进程内），默认为 CACHE_TAG_PRUNE_THRESHOLD
+    _tag_prune_at: Dict[str, int] = {}
     
+    @classmethod
+    def get_connection_kwargs(cls) -> Dict[str, Any]:
+        """Build Redis connection parameters from settings."""
+        # 创建连接参数
+        connection_kwargs = {
+            "host": settings.REDIS_HOST,
+            "port": settings.REDIS_PORT,
+            "db": settings.REDIS_DB,
+            "decode_responses": True,  # 自动解码响应为字符串
+        }
+
+        # 添加可选的认证参数
+        if settings.REDIS_PASSWORD:
+            connection_kwargs["password"] = settings.REDIS_PASSWORD
+
+        if settings.REDIS_USERNAME:
+            connection_kwargs["username"] = settings.REDIS_USERNAME
+
+        if settings.REDIS_USE_SSL:
+            connection_kwargs["ssl"] = True
+            connection_kwargs["ssl_cert_reqs"] = None  # 不验证证书
+
+        return connection_kwargs
+
+    @classmethod
+    def get_value_connection_kwargs(cls) -> Dict[str, Any]:
+        """Connection parameters for the cache clients, which read values as raw bytes."""
+        # 缓存值是二进制编码（见 CacheCodec），不能按 UTF-8 自动解码
+        return {**cls.get_connection_kwargs(), "decode_responses": False}
+
     @classmethod
     def get_connection_pool(cls) -> ConnectionPool:
         """Get or create a Redis connection pool."""
         if cls._pool is None:
-            # 创建连接参数
-            connection_kwargs = {
-                "host": settings.REDIS_HOST,
-                "port": settings.REDIS_PORT,
-                "db": settings.REDIS_DB,
-                "decode_responses": True,  # 自动解码响应为字符串
-            }
-            
-            # 添加可选的认证参数
-            if settings.REDIS_PASSWORD:
-                connection_kwargs["password"] = settings.REDIS_PASSWORD
-            
-            if settings.REDIS_USERNAME:
-                connection_kwargs["username"] = settings.REDIS_USERNAME
-                
-            if settings.REDIS_USE_SSL:
-                connection_kwargs["ssl"] = True
-                connection_kwargs["ssl_cert_reqs"] = None  # 不验证证书
-            
             # 创建连接池
-            cls._pool = redis.ConnectionPool(**connection_kwargs)
+            cls._pool = redis.ConnectionPool(**cls.get_value_connection_kwargs())
             logger.info(f"Created Redis connection pool to {settings.REDIS_HOST}:{settings.REDIS_PORT}")
             
         return cls._pool
@@ -61,40 +92,343 @@ class RedisCacheService:
         return cls._client
     
     @classmethod
-    def get(cls, key: str) -> Optional[Any]:
-        """Get a value from cache if it exists."""
+    def get_async_client(cls) -> aioredis.Redis:
+        """Get or create the asyncio Redis client sharing one connection pool."""
+        if cls._async_client is None:
+            cls._async_pool = aioredis.ConnectionPool(**cls.get_value_connection_kwargs())
+            cls._async_client = aioredis.Redis(connection_pool=cls._async_pool)
+            logger.info(f"Created async Redis connection pool to {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+
+        return cls._async_client
+
+    @classmethod
+    async def close_async_client(cls) -> None:
+        """Close the asyncio client and disconnect its pool."""
+        if cls._async_client is None:
+            return
+        try:
+            await cls._async_client.aclose()
+            await cls._async_pool.aclose()
+        except Exception as e:
+            logger.error(f"Error closing async Redis client: {e}")
+        finally:
+            cls._async_client = None
+            cls._async_pool = None
+
+    @classmethod
+    def encode(cls, value: Any) -> Union[str, bytes]:
+        """Serialize a value into the form stored in Redis."""
+        return CacheCodec.encode(value)
+
+    @classmethod
+    def decode(cls, raw: Any) -> Any:
+        """Deserialize a value read from Redis."""
+        return CacheCodec.decode(raw)
+
+    @classmethod
+    def get_raw(cls, key: str) -> Optional[Any]:
+        """Get the stored (still serialized) value of a key."""
         try:
             client = cls.get_client()
-            value = client.get(key)
-            
-            if value is None:
-                return None
-                
-            # 尝试解析 JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                # 如果不是 JSON，则直接返回值
-                return value
-                
+            return client.get(key)
         except Exception as e:
             logger.error(f"Error getting value from Redis cache: {e}")
             return None
-    
+
     @classmethod
-    def set(cls, key: str, value: Any, ttl: int = 300) -> None:
-        """Set a value in cache with TTL in seconds."""
+    def _tag_key(cls, tag: str) -> str:
+        """Redis key of the set holding the cache keys of a tag."""
+        return f"{TAG_KEY_PREFIX}{tag}"
+
+    @classmethod
+    def _queue_set(cls, pipe: Any, items: Dict[str, Any], ttl: int, tags: List[str]) -> None:
+        """
+        Queue SET commands (and tag registrations) for serialized values on a pipeline.
+
+        The last results of the pipeline are the sizes of the tag sets (see _tags_to_prune).
+        """
+        for key, raw in items.items():
+            pipe.set(key, raw, ex=ttl)
+        # 写入值的同时登记到标签集合，标签集合的过期时间不短于成员的过期时间
+        for tag in tags:
+            tag_key = cls._tag_key(tag)
+            pipe.sadd(tag_key, *items)
+            pipe.expire(tag_key, max(ttl, settings.CACHE_TAG_TTL))
+        for tag in tags:
+            pipe.scard(cls._tag_key(tag))
+
+    @classmethod
+    def _tags_to_prune(cls, results: List[Any], tags: List[str]) -> List[str]:
+        """Tags whose sets have grown past their prune threshold."""
+        if not tags:
+            return []
+        sizes = results[-len(tags):]
+        return [
+            tag for tag, size in zip(tags, sizes)
+            if size > cls._tag_prune_at.get(tag, settings.CACHE_TAG_PRUNE_THRESHOLD)
+        ]
+
+    @classmethod
+    def _pruned(cls, tag: str, live: int) -> None:
+        # 仍然存在的成员较多时提高阈值，清理的开销分摊到之后的写入
+        cls._tag_prune_at[tag] = max(settings.CACHE_TAG_PRUNE_THRESHOLD, live * 2)
+
+    @classmethod
+    def _prune_tags(cls, client: Redis, tags: List[str]) -> None:
+        """
+        Remove members whose keys have expired from the tag sets.
+
+        Keys expire on their own without leaving their tag sets, so sets of tags
+        that are rarely invalidated (e.g. read_articles) would otherwise keep growing.
+        """
+        for tag in tags:
+            tag_key = cls._tag_key(tag)
+            live = 0
+            try:
+                members = list(client.sscan_iter(tag_key, count=DELETE_BATCH_SIZE))
+                for i in range(0, len(members), DELETE_BATCH_SIZE):
+                    batch = members[i:i + DELETE_BATCH_SIZE]
+                    pipe = client.pipeline(transaction=False)
+                    for member in batch:
+                        pipe.exists(member)
+                    expired = [member for member, exists in zip(batch, pipe.execute()) if not exists]
+                    if expired:
+                        client.srem(tag_key, *expired)
+                    live += len(batch) - len(expired)
+            except Exception as e:
+                logger.error(f"Error pruning Redis cache tag {tag}: {e}")
+            cls._pruned(tag, live)
+
+    @classmethod
+    async def _aprune_tags(cls, client: aioredis.Redis, tags: List[str]) -> None:
+        """Async version of _prune_tags."""
+        for tag in tags:
+            tag_key = cls._tag_key(tag)
+            live = 0
+            try:
+                members = [member async for member in client.sscan_iter(tag_key, count=DELETE_BATCH_SIZE)]
+                for i in range(0, len(members), DELETE_BATCH_SIZE):
+                    batch = members[i:i + DELETE_BATCH_SIZE]
+                    pipe = client.pipeline(transaction=False)
+                    for member in batch:
+                        pipe.exists(member)
+                    expired = [member for member, exists in zip(batch, await pipe.execute()) if not exists]
+                    if expired:
+                        await client.srem(tag_key, *expired)
+                    live += len(batch) - len(expired)
+            except Exception as e:
+                logger.error(f"Error pruning Redis cache tag {tag}: {e}")
+            cls._pruned(tag, live)
+
+    @classmethod
+    def set_raw(cls, key: str, raw: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Store an already serialized value with TTL in seconds."""
+        tags = list(tags or ())
         try:
             client = cls.get_client()
-            
-            # 如果值不是字符串，则转换为 JSON
-            if not isinstance(value, (str, bytes)):
-                value = json.dumps(value, default=str)
-                
-            client.set(key, value, ex=ttl)
+            if not tags:
+                client.set(key, raw, ex=ttl)
+                return
+
+            pipe = client.pipeline(transaction=False)
+            cls._queue_set(pipe, {key: raw}, ttl, tags)
+            cls._prune_tags(client, cls._tags_to_prune(pipe.execute(), tags))
         except Exception as e:
             logger.error(f"Error setting value in Redis cache: {e}")
-    
+
+    @classmethod
+    def get_many_raw(cls, keys: List[str]) -> Dict[str, Any]:
+        """Get the stored values of several keys with a single MGET."""
+        if not keys:
+            return {}
+        try:
+            client = cls.get_client()
+            values = client.mget(keys)
+            return {key: raw for key, raw in zip(keys, values) if raw is not None}
+        except Exception as e:
+            logger.error(f"Error getting values from Redis cache: {e}")
+            return {}
+
+    @classmethod
+    def set_many_raw(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Store several serialized values in one pipelined round trip."""
+        if not items:
+            return
+        tags = list(tags or ())
+        try:
+            client = cls.get_client()
+            pipe = client.pipeline(transaction=False)
+            cls._queue_set(pipe, items, ttl, tags)
+            cls._prune_tags(client, cls._tags_to_prune(pipe.execute(), tags))
+        except Exception as e:
+            logger.error(f"Error setting values in Redis cache: {e}")
+
+    @classmethod
+    def get_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get the cached values of several keys; missing keys are omitted."""
+        raw_values = cls.get_many_raw(list(keys))
+        return {key: cls.decode(raw) for key, raw in raw_values.items()}
+
+    @classmethod
+    def set_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Set several values with the same TTL."""
+        cls.set_many_raw({key: cls.encode(value) for key, value in items.items()}, ttl, tags)
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Any]:
+        """Get a value from cache if it exists."""
+        value = cls.get_raw(key)
+        if value is None:
+            return None
+        return cls.decode(value)
+
+    @classmethod
+    def set(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Set a value in cache with TTL in seconds."""
+        cls.set_raw(key, cls.encode(value), ttl, tags)
+
+    @classmethod
+    async def aget_raw(cls, key: str) -> Optional[Any]:
+        """Async version of get_raw."""
+        try:
+            client = cls.get_async_client()
+            return await client.get(key)
+        except Exception as e:
+            logger.error(f"Error getting value from Redis cache: {e}")
+            return None
+
+    @classmethod
+    async def aset_raw(cls, key: str, raw: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set_raw."""
+        tags = list(tags or ())
+        try:
+            client = cls.get_async_client()
+            if not tags:
+                await client.set(key, raw, ex=ttl)
+                return
+
+            pipe = client.pipeline(transaction=False)
+            cls._queue_set(pipe, {key: raw}, ttl, tags)
+            await cls._aprune_tags(client, cls._tags_to_prune(await pipe.execute(), tags))
+        except Exception as e:
+            logger.error(f"Error setting value in Redis cache: {e}")
+
+    @classmethod
+    async def aget_many_raw(cls, keys: List[str]) -> Dict[str, Any]:
+        """Async version of get_many_raw."""
+        if not keys:
+            return {}
+        try:
+            client = cls.get_async_client()
+            values = await client.mget(keys)
+            return {key: raw for key, raw in zip(keys, values) if raw is not None}
+        except Exception as e:
+            logger.error(f"Error getting values from Redis cache: {e}")
+            return {}
+
+    @classmethod
+    async def aset_many_raw(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set_many_raw."""
+        if not items:
+            return
+        tags = list(tags or ())
+        try:
+            client = cls.get_async_client()
+            pipe = client.pipeline(transaction=False)
+            cls._queue_set(pipe, items, ttl, tags)
+            await cls._aprune_tags(client, cls._tags_to_prune(await pipe.execute(), tags))
+        except Exception as e:
+            logger.error(f"Error setting values in Redis cache: {e}")
+
+    @classmethod
+    async def aget_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """Async version of get_many."""
+        raw_values = await cls.aget_many_raw(list(keys))
+        return {key: cls.decode(raw) for key, raw in raw_values.items()}
+
+    @classmethod
+    async def aset_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set_many."""
+        await cls.aset_many_raw({key: cls.encode(value) for key, value in items.items()}, ttl, tags)
+
+    @classmethod
+    async def aget(cls, key: str) -> Optional[Any]:
+        """Async version of get."""
+        value = await cls.aget_raw(key)
+        if value is None:
+            return None
+        return cls.decode(value)
+
+    @classmethod
+    async def aset(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set."""
+        await cls.aset_raw(key, cls.encode(value), ttl, tags)
+
+    @classmethod
+    def _tag_members(cls, members: Iterable[Iterable[Any]]) -> List[str]:
+        """Cache keys of several tag sets (SMEMBERS results), decoded and deduplicated."""
+        keys = set().union(*members)
+        return [key.decode() if isinstance(key, bytes) else key for key in keys]
+
+    @classmethod
+    def invalidate_tags(cls, tags: Iterable[str]) -> List[str]:
+        """
+        Delete every key carrying any of the tags, without scanning the keyspace.
+
+        Returns the deleted keys, so that copies held in-process (L1) can be dropped too.
+        """
+        tags = list(tags)
+        tag_keys = [cls._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return []
+        try:
+            client = cls.get_client()
+
+            # 读取并删除标签集合在同一事务中完成，之后写入的键会进入新的集合
+            pipe = client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            results = pipe.execute()
+            # 集合已删除，清理阈值恢复默认
+            for tag in tags:
+                cls._tag_prune_at.pop(tag, None)
+
+            keys = cls._tag_members(results[:-1])
+            for i in range(0, len(keys), DELETE_BATCH_SIZE):
+                client.delete(*keys[i:i + DELETE_BATCH_SIZE])
+            return keys
+        except Exception as e:
+            logger.error(f"Error invalidating Redis cache tags: {e}")
+            return []
+
+    @classmethod
+    async def ainvalidate_tags(cls, tags: Iterable[str]) -> List[str]:
+        """Async version of invalidate_tags."""
+        tags = list(tags)
+        tag_keys = [cls._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return []
+        try:
+            client = cls.get_async_client()
+
+            pipe = client.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*tag_keys)
+            results = await pipe.execute()
+            # 集合已删除，清理阈值恢复默认
+            for tag in tags:
+                cls._tag_prune_at.pop(tag, None)
+
+            keys = cls._tag_members(results[:-1])
+            for i in range(0, len(keys), DELETE_BATCH_SIZE):
+                await client.delete(*keys[i:i + DELETE_BATCH_SIZE])
+            return keys
+        except Exception as e:
+            logger.error(f"Error invalidating Redis cache tags: {e}")
+            return []
+
     @classmethod
     def delete(cls, key: str) -> None:
         """Delete a value from cache."""
@@ -103,6 +437,37 @@ class RedisCacheService:
             client.delete(key)
         except Exception as e:
             logger.error(f"Error deleting value from Redis cache: {e}")
+
+    @classmethod
+    async def adelete(cls, key: str) -> None:
+        """Async version of delete."""
+        try:
+            client = cls.get_async_client()
+            await client.delete(key)
+        except Exception as e:
+            logger.error(f"Error deleting value from Redis cache: {e}")
+
+    @classmethod
+    def delete_many(cls, keys: Iterable[str]) -> None:
+        """Delete several keys with batched DEL commands."""
+        keys = list(keys)
+        try:
+            client = cls.get_client()
+            for i in range(0, len(keys), DELETE_BATCH_SIZE):
+                client.delete(*keys[i:i + DELETE_BATCH_SIZE])
+        except Exception as e:
+            logger.error(f"Error deleting values from Redis cache: {e}")
+
+    @classmethod
+    async def adelete_many(cls, keys: Iterable[str]) -> None:
+        """Async version of delete_many."""
+        keys = list(keys)
+        try:
+            client = cls.get_async_client()
+            for i in range(0, len(keys), DELETE_BATCH_SIZE):
+                await client.delete(*keys[i:i + DELETE_BATCH_SIZE])
+        except Exception as e:
+            logger.error(f"Error deleting values from Redis cache: {e}")
     
     @classmethod
     def clear(cls) -> None:
@@ -125,15 +490,77 @@ class RedisCacheService:
         key_hash = hashlib.md5(f"{prefix}:{args_str}:{kwargs_str}".encode()).hexdigest()
         return f"{prefix}:{key_hash}"
     
+    @classmethod
+    def acquire_lock(cls, name: str, ttl_ms: int) -> Optional[str]:
+        """Try to take a short-lived lock; returns the owner token on success."""
+        token = uuid.uuid4().hex
+        try:
+            client = cls.get_client()
+            if client.set(name, token, nx=True, px=ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring Redis lock {name}: {e}")
+            # Redis 不可用时不阻塞调用方，视为获得锁
+            return token
+
+    @classmethod
+    def release_lock(cls, name: str, token: str) -> None:
+        """Release a lock only if it is still owned by token."""
+        try:
+            client = cls.get_client()
+            client.eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+        except Exception as e:
+            logger.error(f"Error releasing Redis lock {name}: {e}")
+
+    @classmethod
+    async def aacquire_lock(cls, name: str, ttl_ms: int) -> Optional[str]:
+        """Async version of acquire_lock."""
+        token = uuid.uuid4().hex
+        try:
+            client = cls.get_async_client()
+            if await client.set(name, token, nx=True, px=ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring Redis lock {name}: {e}")
+            return token
+
+    @classmethod
+    async def arelease_lock(cls, name: str, token: str) -> None:
+        """Async version of release_lock."""
+        try:
+            client = cls.get_async_client()
+            await client.eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+        except Exception as e:
+            logger.error(f"Error releasing Redis lock {name}: {e}")
+
     @classmethod
     def get_keys(cls, pattern: str = "*") -> List[str]:
         """Get all keys matching pattern."""
         try:
             client = cls.get_client()
-            return client.keys(pattern)
+            # 使用 SCAN 增量遍历，避免 KEYS 阻塞 Redis
+            return [key.decode() for key in client.scan_iter(match=pattern, count=1000)]
         except Exception as e:
             logger.error(f"Error getting keys from Redis cache: {e}")
             return []
+
+    @classmethod
+    def delete_by_prefix(cls, prefix: str) -> None:
+        """Delete every key starting with prefix (incremental SCAN, batched DEL)."""
+        try:
+            client = cls.get_client()
+            batch = []
+            for key in client.scan_iter(match=f"{prefix}*", count=1000):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    client.delete(*batch)
+                    batch = []
+            if batch:
+                client.delete(*batch)
+        except Exception as e:
+            logger.error(f"Error deleting keys by prefix from Redis cache: {e}")
     
     @classmethod
     def get_stats(cls) -> Dict[str, Any]:
@@ -148,6 +575,7 @@ class RedisCacheService:
                 "total_commands_processed": info.get("total_commands_processed", 0),
                 "keyspace_hits": info.get("keyspace_hits", 0),
                 "keyspace_misses": info.get("keyspace_misses", 0),
+                "evicted_keys": info.get("evicted_keys", 0),
                 "uptime_in_seconds": info.get("uptime_in_seconds", 0),
             }
             
@@ -0,0 +1,239 @@
+"""
+按路由统计的请求指标
+
+每个请求开始时在上下文变量中放入一个 RequestStats，请求处理期间：
+- SQLAlchemy 的 before/after_cursor_execute 事件累加 SQL 语句数和数据库耗时；
+- CacheMetrics.record_get 累加缓存命中与未命中次数；
+开启 QUERY_INSPECTOR_ENABLED 时语句还按归一化文本分组，用于发现 N+1 和慢查询（见 query_inspector）。
+请求结束时按 (路由模板, 方法) 汇总到直方图：延迟、SQL 语句数、数据库耗时和响应字节数，
+以及按状态码的请求数，通过 /metrics（Prometheus 文本格式）和 /metrics/routes（JSON）查看。
+
+路由模板取自匹配的 APIRoute（如 /api/v1/articles/{article_id}），数量有限；
+未匹配到 APIRoute 的请求（静态文件、404 等）归入 "other"。
+同步路由和依赖在线程池中执行时会复制上下文，RequestStats 是同一个对象，统计不会丢失；
+后台任务和定时任务没有请求上下文，不计入任何路由。
+"""
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.services.query_inspector import QueryInspector
+from app.utils.metrics import Histogram, PrometheusWriter
+
+OTHER_ROUTE = "other"
+
+# SQL 语句数分桶
+QUERY_COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+# 响应字节数分桶
+RESPONSE_BYTES_BUCKETS: Tuple[float, ...] = (
+    100, 1000, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000
+)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the APIRoute that matched a request."""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or OTHER_ROUTE
+
+
+class RequestStats:
+    """Counters of the request being handled."""
+
+    __slots__ = ("scope", "queries", "db_seconds", "cache_hits", "cache_misses", "statements")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 归一化语句 -> [执行次数, 总耗时]，仅在开启 SQL 检查时收集
+        self.statements: Optional[Dict[str, List[float]]] = {} if settings.QUERY_INSPECTOR_ENABLED else None
+
+    def route(self) -> Tuple[str, str]:
+        """(route template, method); the template is known once routing has matched."""
+        return route_template(self.scope), self.scope["method"]
+
+
+class RouteStats:
+    """Aggregated metrics of one (route, method)."""
+
+    __slots__ = ("statuses", "latency", "queries", "db_time", "response_bytes", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        # 毫秒
+        self.latency = Histogram()
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        # 毫秒
+        self.db_time = Histogram()
+        self.response_bytes = Histogram(RESPONSE_BYTES_BUCKETS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = self.latency.count
+        return {
+            "requests": count,
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+            "latency_ms": self.latency.snapshot(),
+            "queries": self.queries.snapshot(),
+            "db_time_ms": self.db_time.snapshot(),
+            "response_bytes": self.response_bytes.snapshot(),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class RequestMetrics:
+    """In-process per-route request metrics."""
+
+    _routes: Dict[Tuple[str, str], RouteStats] = {}
+    _lock = threading.Lock()
+    _instrumented = set()
+
+    @classmethod
+    def begin(cls, scope: Scope) -> Tuple[RequestStats, Token]:
+        """Start collecting for the current request context."""
+        stats = RequestStats(scope)
+        return stats, _current.set(stats)
+
+    @classmethod
+    def end(cls, token: Token, stats: RequestStats, status_code: int, seconds: float, response_bytes: int) -> None:
+        """Stop collecting and add the request to its route's metrics."""
+        _current.reset(token)
+        key = stats.route()
+        with cls._lock:
+            route_stats = cls._routes.get(key)
+            if route_stats is None:
+                route_stats = cls._routes[key] = RouteStats()
+            route_stats.statuses[status_code] = route_stats.statuses.get(status_code, 0) + 1
+            route_stats.latency.observe(seconds * 1000)
+            route_stats.queries.observe(stats.queries)
+            route_stats.db_time.observe(stats.db_seconds * 1000)
+            route_stats.response_bytes.observe(response_bytes)
+            route_stats.cache_hits += stats.cache_hits
+            route_stats.cache_misses += stats.cache_misses
+        if stats.statements is not None:
+            QueryInspector.finish(stats)
+
+    @staticmethod
+    def check_query_budget(stats: RequestStats) -> None:
+        """Raises QueryBudgetExceeded in strict mode when the route's query budget was exceeded."""
+        if stats.statements is not None:
+            QueryInspector.check_budget(stats)
+
+    @staticmethod
+    def current() -> Optional[RequestStats]:
+        """Stats of the request being handled, or None outside a request."""
+        return _current.get()
+
+    @staticmethod
+    def record_cache_lookup(hit: bool) -> None:
+        stats = _current.get()
+        if stats is None:
+            return
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+    @classmethod
+    def instrument_engine(cls, engine: Engine) -> None:
+        """Count SQL statements and their time per request on an engine."""
+        if not settings.REQUEST_METRICS_ENABLED or id(engine) in cls._instrumented:
+            return
+        cls._instrumented.add(id(engine))
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _current.get() is not None:
+                conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            stats = _current.get()
+            starts = conn.info.get("query_start")
+            if stats is None or not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            if stats.statements is not None:
+                QueryInspector.observe(stats, statement, parameters, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            # 出错的语句不会触发 after_cursor_execute，丢弃其开始时间
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("query_start"):
+                connection.info["query_start"].pop()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Per-route metrics keyed by "METHOD route"."""
+        with cls._lock:
+            return {f"{method} {route}": stats.to_dict() for (route, method), stats in sorted(cls._routes.items())}
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._routes.clear()
+
+    @classmethod
+    def write_prometheus(cls, writer: PrometheusWriter) -> None:
+        """Append the per-route metrics to a Prometheus document."""
+        with cls._lock:
+            items = sorted(cls._routes.items())
+            writer.counter(
+                "http_requests_total",
+                "Requests by route, method and status code.",
+                (
+                    ({"route": route, "method": method, "status": str(code)}, count)
+                    for (route, method), stats in items
+                    for code, count in sorted(stats.statuses.items())
+                )
+            )
+            writer.histogram(
+                "http_request_duration_seconds",
+                "Request latency by route.",
+                (({"route": route, "method": method}, stats.latency) for (route, method), stats in items),
+                scale=0.001
+            )
+            writer.histogram(
+                "http_request_db_queries",
+                "SQL statements executed per request.",
+                (({"route": route, "method": method}, stats.queries) for (route, method), stats in items)
+            )
+            writer.histogram(
+                "http_request_db_duration_seconds",
+                "Total SQL execution time per request.",
+                (({"route": route, "method": method}, stats.db_time) for (route, method), stats in items),
+                scale=0.001
+            )
+            writer.histogram(
+                "http_response_size_bytes",
+                "Response body bytes sent per request.",
+                (({"route": route, "method": method}, stats.response_bytes) for (route, method), stats in items)
+            )
+            writer.counter(
+                "http_request_cache_lookups_total",
+                "Cache lookups made while handling requests.",
+                (
+                    sample
+                    for (route, method), stats in items
+                    for sample in (
+                        ({"route": route, "method": method, "result": "hit"}, stats.cache_hits),
+                        ({"route": route, "method": method, "result": "miss"}, stats.cache_misses),
+                    )
+                )
+            )
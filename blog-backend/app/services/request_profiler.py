@@ -0,0 +1,191 @@
+"""
+单个请求的采样分析
+
+管理员在请求上加 X-Profile: 1 请求头（或 ?__profile=1）时，ProfilerMiddleware 在处理该请求期间
+启动 StackSampler：后台线程每 PROFILER_INTERVAL_MS 毫秒读取一次各线程的调用栈
+（事件循环线程，以及线程池中正在执行同步代码的线程），结束后生成：
+- folded 格式的调用栈（"根;...;叶 权重"，可直接导入 speedscope 或 flamegraph.pl），
+  权重为微秒：计算密集的代码持有 GIL 时采样线程无法按时运行，每个样本按距上一次采样的
+  实际时间计，各部分的比例与墙上时间一致；
+- 按类别的耗时：sql、cache、pydantic、app（本项目代码）、wait（事件循环等待 I/O）、framework。
+分析结果保存在统一缓存中（profile:{id}），通过 /admin/profiles 查看。
+
+未触发时不启动线程、不设置任何钩子；同一进程中其他并发请求的调用栈也可能被采到，
+在低负载时分析更准确。
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.unified_cache_service import UnifiedCacheService
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_KEY_PREFIX = "profile:"
+PROFILE_INDEX_KEY = "profile:index"
+MAX_INDEXED_PROFILES = 50
+MAX_STACK_DEPTH = 128
+
+# 按调用栈从叶到根遇到的第一个匹配项分类；遇到本项目的其他代码时归为 app
+CATEGORY_PATTERNS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("sql", ("sqlalchemy/", "pymysql/", "MySQLdb/", "sqlite3/", "aiomysql/", "asyncmy/")),
+    ("cache", (
+        "redis/", "fakeredis/", "app/services/unified_cache_service.py", "app/services/redis_cache_service.py",
+        "app/services/cache_service.py", "app/utils/cache_codec.py", "app/core/cache.py",
+    )),
+    ("pydantic", ("pydantic/", "pydantic_core/", "fastapi/encoders.py")),
+)
+# 中间件位于每个调用栈的外层，不作为判断依据
+APP_PATTERN = "app/"
+APP_EXCLUDED = "app/middleware/"
+# 线程空闲时所在的模块
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+_labels: Dict[Any, str] = {}
+
+
+def _frame_label(code) -> str:
+    """Short "path:function" label of a code object (cached)."""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_PROJECT_ROOT):
+            path = path[len(_PROJECT_ROOT):]
+        else:
+            marker = path.rfind("site-packages" + os.sep)
+            if marker != -1:
+                path = path[marker + len("site-packages") + 1:]
+            else:
+                path = os.path.basename(path)
+        label = _labels[code] = f"{path.replace(os.sep, '/')}:{code.co_name}"
+    return label
+
+
+def _stack_of(frame) -> Tuple[str, ...]:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def categorize(stack: Tuple[str, ...]) -> str:
+    """Category of one sampled stack (root first)."""
+    if stack and stack[-1].split(":", 1)[0].endswith(IDLE_FILES):
+        return "wait"
+    for label in reversed(stack):
+        for category, patterns in CATEGORY_PATTERNS:
+            if label.startswith(patterns):
+                return category
+        if label.startswith(APP_PATTERN) and not label.startswith(APP_EXCLUDED):
+            return "app"
+    return "framework"
+
+
+class StackSampler(threading.Thread):
+    """Samples the call stacks of the event loop thread and busy worker threads."""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        # 调用栈 -> 权重（微秒）
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            weight = int((now - last) * 1_000_000)
+            last = now
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _stack_of(frame)
+                # 其他线程只统计正在执行的（线程池中空闲的工作线程停在 queue / threading 中）
+                if thread_id != self.loop_thread_id and categorize(stack) == "wait":
+                    continue
+                self.samples[stack] += weight
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Runs single requests under the stack sampler and stores the results."""
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex[:16]
+
+    @classmethod
+    def start(cls) -> StackSampler:
+        sampler = StackSampler(threading.get_ident(), settings.PROFILER_INTERVAL_MS / 1000)
+        sampler.start()
+        return sampler
+
+    @classmethod
+    def build(
+        cls,
+        sampler: StackSampler,
+        profile_id: str,
+        method: str,
+        path: str,
+        status_code: int,
+        seconds: float
+    ) -> Dict[str, Any]:
+        """Profile document of a finished request."""
+        categories: Counter = Counter()
+        for stack, weight in sampler.samples.items():
+            categories[categorize(stack)] += weight
+        return {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 3),
+            "interval_ms": settings.PROFILER_INTERVAL_MS,
+            "samples": sampler.sample_count,
+            "created_at": time.time(),
+            "categories_ms": {name: round(weight / 1000, 3) for name, weight in categories.most_common()},
+            "folded": "\n".join(
+                f"{';'.join(stack)} {weight}" for stack, weight in sampler.samples.most_common()
+            ),
+        }
+
+    @classmethod
+    async def store(cls, profile: Dict[str, Any]) -> None:
+        ttl = settings.PROFILER_RETENTION_SECONDS
+        summary = {key: profile[key] for key in ("id", "method", "path", "status", "duration_ms", "created_at")}
+        index = await UnifiedCacheService.aget(PROFILE_INDEX_KEY) or []
+        index = [summary] + index[:MAX_INDEXED_PROFILES - 1]
+        await UnifiedCacheService.aset_many({
+            f"{PROFILE_KEY_PREFIX}{profile['id']}": profile,
+            PROFILE_INDEX_KEY: index,
+        }, ttl)
+        logger.info(
+            f"Profiled {profile['method']} {profile['path']} in {profile['duration_ms']}ms: "
+            f"{profile['categories_ms']} (id={profile['id']})"
+        )
+
+    @classmethod
+    async def get(cls, profile_id: str) -> Optional[Dict[str, Any]]:
+        return await UnifiedCacheService.aget(f"{PROFILE_KEY_PREFIX}{profile_id}")
+
+    @classmethod
+    async def list_recent(cls) -> List[Dict[str, Any]]:
+        """Summaries of the most recent profiles, newest first."""
+        return await UnifiedCacheService.aget(PROFILE_INDEX_KEY) or []
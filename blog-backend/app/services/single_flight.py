@@ -0,0 +1,122 @@
+"""
+缓存未命中时的请求合并（single-flight）
+
+同一缓存键同时未命中时只执行一次计算：
+- 进程内：后到的请求等待第一个请求的 asyncio Future；
+- 跨 worker：通过短期 Redis 锁选出一个 worker 计算，其余 worker 轮询缓存，
+  拿到结果则直接复用；锁被释放而缓存中没有值（结果为 None 或计算失败）时
+  由等待的 worker 取得锁并计算，锁过期仍未拿到结果时自行计算。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.config import settings
+from app.services.unified_cache_service import UnifiedCacheService
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+LOCK_KEY_PREFIX = "lock:"
+
+
+class SingleFlight:
+    """Coalesces concurrent cache-miss recomputations for the same key."""
+
+    # 正在计算中的缓存键: {cache_key: Future}
+    _inflight: Dict[str, asyncio.Future] = {}
+
+    # 统计：实际计算次数，以及进程内合并、跨 worker 复用而节省的计算次数
+    _stats: Dict[str, int] = {
+        "loads": 0,
+        "coalesced": 0,
+        "remote_reused": 0,
+        "lock_timeouts": 0,
+    }
+
+    @classmethod
+    async def run(cls, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run loader once for all concurrent callers of key.
+
+        loader computes the value and stores it in the cache; its result is
+        shared with every caller that arrived while it was running.
+        """
+        future = cls._inflight.get(key)
+        if future is not None:
+            cls._stats["coalesced"] += 1
+            # asyncio.wait 不会因为共享的 Future 被取消而取消当前请求
+            await asyncio.wait({future})
+            if future.cancelled():
+                # 负责计算的请求被取消（如客户端断开），由当前请求接手
+                return await cls.run(key, loader)
+            return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[key] = future
+        try:
+            result = await cls._load(key, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时也要取走异常，避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del cls._inflight[key]
+
+    @classmethod
+    async def _load(cls, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Compute the value, coordinating with other workers when enabled."""
+        if not settings.CACHE_SINGLE_FLIGHT_DISTRIBUTED:
+            cls._stats["loads"] += 1
+            return await loader()
+
+        lock_name = f"{LOCK_KEY_PREFIX}{key}"
+        token = await UnifiedCacheService.aacquire_lock(lock_name, settings.CACHE_LOCK_TTL_MS)
+
+        # 其他 worker 正在计算，等待其写入缓存
+        deadline = time.monotonic() + settings.CACHE_LOCK_TTL_MS / 1000
+        poll_interval = settings.CACHE_LOCK_POLL_MS / 1000
+        while token is None and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            value = await UnifiedCacheService.aget(key)
+            if value is not None:
+                cls._stats["remote_reused"] += 1
+                return value
+            # 锁已释放而缓存中仍没有值（结果为 None 或计算失败）时由当前 worker 接手，
+            # 不必等到锁过期；接手前再读一次缓存，值可能在上次读取之后、释放锁之前写入
+            token = await UnifiedCacheService.aacquire_lock(lock_name, settings.CACHE_LOCK_TTL_MS)
+            if token is not None:
+                value = await UnifiedCacheService.aget(key)
+                if value is not None:
+                    await UnifiedCacheService.arelease_lock(lock_name, token)
+                    cls._stats["remote_reused"] += 1
+                    return value
+
+        if token is None:
+            logger.warning(f"Timed out waiting for another worker to fill {key}, computing locally")
+            cls._stats["lock_timeouts"] += 1
+            cls._stats["loads"] += 1
+            return await loader()
+
+        try:
+            cls._stats["loads"] += 1
+            return await loader()
+        finally:
+            await UnifiedCacheService.arelease_lock(lock_name, token)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Return recomputation counters and the number of recomputations saved."""
+        saved = cls._stats["coalesced"] + cls._stats["remote_reused"]
+        return {
+            **cls._stats,
+            "saved": saved,
+            "in_flight": len(cls._inflight),
+        }
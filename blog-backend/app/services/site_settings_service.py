@@ -2,8 +2,10 @@ import json
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 
+from app.core.database import primary_reads
 from app.models.site_settings import SiteSettings
 from app.schemas.site_settings import SiteSettingsCreate, SiteSettingsUpdate
+from app.services.tracing import traced
 from app.services.unified_cache_service import UnifiedCacheService
 from app.utils.logging import get_logger
 
@@ -18,6 +20,7 @@ class SiteSettingsService:
     """系统设置服务类"""
 
     @staticmethod
+    @traced("SiteSettingsService.get_settings")
     def get_settings(db: Session) -> Optional[SiteSettings]:
         """
         获取系统设置
@@ -56,8 +59,9 @@ class SiteSettingsService:
             except Exception as e:
                 logger.error(f"从缓存解析系统设置失败: {e}")
 
-        # 从数据库获取
-        settings = db.query(SiteSettings).first()
+        # 从数据库获取（结果写入缓存，从主库读取）
+        with primary_reads():
+            settings = db.query(SiteSettings).first()
 
         # 如果存在设置，则缓存
         if settings:
@@ -0,0 +1,435 @@
+"""
+请求追踪
+
+开启 TRACING_ENABLED 后，TracingMiddleware 按 TRACING_SAMPLE_RATE 为请求创建根 span
+（请求带有 W3C traceparent 头时沿用其中的 trace ID），请求处理期间在其下记录子 span：
+- cache.get / cache.set：统一缓存的读写（由 CacheMetrics 在记录耗时的同时记录）；
+- db.query / db.commit：SQL 语句（SQLAlchemy 游标事件，只记录语句文本，不记录参数）和会话提交；
+- http.client：经 async_http_client 创建的 httpx 客户端发出的请求；
+- 用 @traced 或 Tracer.span 标记的调用（IP 属地查询、系统设置、内容审核等）。
+未采样的请求只多一次上下文变量读取。请求结束后该请求的 span 交给后台线程批量导出：
+TRACING_EXPORTER=jsonl 时每个 span 一行追加到 TRACING_JSONL_PATH，
+=otlp 时以 OTLP/HTTP JSON 格式发送到 TRACING_OTLP_ENDPOINT（OpenTelemetry Collector、Jaeger 等）。
+scripts/trace_report.py 按路由汇总 JSONL 中各类子 span 的耗时。
+"""
+import functools
+import inspect
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+KIND_INTERNAL = "internal"
+KIND_SERVER = "server"
+KIND_CLIENT = "client"
+# OTLP 的 SpanKind 取值
+OTLP_KINDS = {KIND_INTERNAL: 1, KIND_SERVER: 2, KIND_CLIENT: 3}
+
+# 导出队列长度，导出跟不上时丢弃新的 span
+MAX_QUEUED_SPANS = 10000
+# 每批导出的最大 span 数
+EXPORT_BATCH_SIZE = 512
+# 属性中语句的最大长度
+MAX_STATEMENT_CHARS = 1000
+
+
+class Trace:
+    """Spans of one sampled request."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(
+        self,
+        trace: Trace,
+        parent_id: Optional[str],
+        name: str,
+        kind: str = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None
+    ):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSONL record of the span."""
+        record = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON representation of the span."""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": OTLP_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": 2, "message": self.error}
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _parse_traceparent(value: str) -> Optional[Tuple[str, str]]:
+    """(trace id, parent span id) of a W3C traceparent header."""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2]
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(threading.Thread):
+    """Background thread that exports finished spans in batches."""
+
+    def __init__(self):
+        super().__init__(name="span-exporter", daemon=True)
+        self.queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+        self.dropped = 0
+        self._http: Optional[httpx.Client] = None
+
+    def submit(self, spans: List[Span]) -> None:
+        for span in spans:
+            try:
+                self.queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= EXPORT_BATCH_SIZE:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                try:
+                    self.export(batch)
+                except Exception as e:
+                    logger.warning(f"Error exporting {len(batch)} spans: {e}")
+
+    def export(self, batch: List[Span]) -> None:
+        if settings.TRACING_EXPORTER == "otlp":
+            if self._http is None:
+                self._http = httpx.Client(timeout=5.0)
+            payload = {"resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", settings.TRACING_SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in batch]}],
+            }]}
+            response = self._http.post(
+                settings.TRACING_OTLP_ENDPOINT,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+        else:
+            path = settings.TRACING_JSONL_PATH
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            data = b"".join(orjson.dumps(span.to_dict(), default=str) + b"\n" for span in batch)
+            # 一次写入整批，多个 worker 追加到同一文件时行不会交错
+            with open(path, "ab") as f:
+                f.write(data)
+
+    def stop(self, timeout: float) -> None:
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.join(timeout)
+        if self._http is not None:
+            self._http.close()
+
+
+class Tracer:
+    """Request-scoped spans with background export."""
+
+    _exporter: Optional[SpanExporter] = None
+    _lock = threading.Lock()
+    _instrumented = set()
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        """Innermost open span of the current context, or None when not tracing."""
+        return _current_span.get()
+
+    @classmethod
+    def start_request(cls, scope: Scope) -> Optional[Tuple[Span, Token]]:
+        """Root span of a request if it is sampled."""
+        if random.random() >= settings.TRACING_SAMPLE_RATE:
+            return None
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = _parse_traceparent(value.decode("latin-1"))
+                break
+        trace_id, parent_id = parent if parent else (os.urandom(16).hex(), None)
+        span = Span(Trace(trace_id), parent_id, f"{scope['method']} {scope['path']}", KIND_SERVER, {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        return span, _current_span.set(span)
+
+    @classmethod
+    def end_request(cls, span: Span, token: Token, route: str, status_code: int) -> None:
+        """Finish the root span and export the request's spans."""
+        _current_span.reset(token)
+        span.name = f"{span.attributes['http.method']} {route}"
+        span.set_attribute("http.route", route)
+        span.set_attribute("http.status_code", status_code)
+        if status_code >= 500:
+            span.error = f"HTTP {status_code}"
+        span.finish()
+        cls._export(span.trace.spans)
+
+    @classmethod
+    def _export(cls, spans: List[Span]) -> None:
+        exporter = cls._exporter
+        if exporter is None:
+            with cls._lock:
+                if cls._exporter is None:
+                    cls._exporter = SpanExporter()
+                    cls._exporter.start()
+                exporter = cls._exporter
+        exporter.submit(spans)
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str, kind: str = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Child span around a block; yields None when the request is not traced."""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, parent.span_id, name, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+
+    @classmethod
+    def record(cls, name: str, seconds: float, kind: str = KIND_INTERNAL, error: Optional[str] = None,
+               **attributes: Any) -> None:
+        """Child span of an operation that just finished and took seconds."""
+        parent = _current_span.get()
+        if parent is None:
+            return
+        end_ns = time.time_ns()
+        span = Span(parent.trace, parent.span_id, name, kind, attributes, end_ns - int(seconds * 1e9))
+        span.error = error
+        span.finish(end_ns)
+
+    @classmethod
+    def instrument_engine(cls, engine: Engine) -> None:
+        """Record a db.query span for each SQL statement executed on an engine."""
+        if not settings.TRACING_ENABLED or id(engine) in cls._instrumented:
+            return
+        cls._instrumented.add(id(engine))
+        system = engine.dialect.name
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _current_span.get() is not None:
+                conn.info.setdefault("trace_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("trace_start")
+            if not starts:
+                return
+            cls.record(
+                "db.query", time.perf_counter() - starts.pop(), KIND_CLIENT,
+                **{"db.system": system, "db.statement": statement[:MAX_STATEMENT_CHARS]}
+            )
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            starts = connection.info.get("trace_start") if connection is not None else None
+            if not starts:
+                return
+            cls.record(
+                "db.query", time.perf_counter() - starts.pop(), KIND_CLIENT,
+                error=str(exception_context.original_exception),
+                **{"db.system": system, "db.statement": (exception_context.statement or "")[:MAX_STATEMENT_CHARS]}
+            )
+
+    @classmethod
+    def instrument_sessions(cls, session_factory: Any) -> None:
+        """Record a db.commit span (including the flush) for each commit of a session factory."""
+        if not settings.TRACING_ENABLED or id(session_factory) in cls._instrumented:
+            return
+        cls._instrumented.add(id(session_factory))
+
+        @event.listens_for(session_factory, "before_commit")
+        def before_commit(session):
+            if _current_span.get() is not None:
+                session.info["trace_commit_start"] = time.perf_counter()
+
+        @event.listens_for(session_factory, "after_commit")
+        def after_commit(session):
+            start = session.info.pop("trace_commit_start", None)
+            if start is not None:
+                cls.record("db.commit", time.perf_counter() - start, KIND_CLIENT)
+
+        @event.listens_for(session_factory, "after_rollback")
+        def after_rollback(session):
+            # 提交失败（如 flush 出错）时会话回滚，不会触发 after_commit
+            start = session.info.pop("trace_commit_start", None)
+            if start is not None:
+                cls.record("db.commit", time.perf_counter() - start, KIND_CLIENT, error="rolled back")
+
+    @classmethod
+    def shutdown(cls, timeout: float = 5.0) -> None:
+        """Export the queued spans and stop the exporter thread."""
+        with cls._lock:
+            exporter, cls._exporter = cls._exporter, None
+        if exporter is not None:
+            exporter.stop(timeout)
+            if exporter.dropped:
+                logger.warning(f"Dropped {exporter.dropped} spans because the export queue was full")
+
+
+def traced(name: Optional[str] = None):
+    """
+    在追踪的请求中为函数调用记录一个 span
+
+    同时支持同步和异步函数，用于 @classmethod / @staticmethod 时放在它们之下。
+    """
+    def decorator(func: Callable):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with Tracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with Tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records an http.client span per request (until the response headers)."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if _current_span.get() is None:
+            return await self._transport.handle_async_request(request)
+        url = urlsplit(str(request.url))
+        with Tracer.span(
+            f"HTTP {request.method} {url.hostname}", KIND_CLIENT,
+            **{"http.method": request.method, "http.url": f"{url.scheme}://{url.netloc}{url.path}",
+               "server.address": url.hostname or ""}
+        ) as span:
+            response = await self._transport.handle_async_request(request)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.error = f"HTTP {response.status_code}"
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def async_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    """httpx.AsyncClient whose requests are traced as child spans of the current request."""
+    kwargs.setdefault("transport", TracingTransport())
+    return httpx.AsyncClient(**kwargs)
@@ -1,10 +1,14 @@
-import json
-import hashlib
-from typing import Any, Dict, Optional, Callable, TypeVar, cast, List
+import inspect
+import time
+from typing import Any, Dict, Optional, Callable, TypeVar, cast, List, Iterable, Set, Tuple
 from functools import wraps
 
 from app.core.config import settings
-from app.services.cache_service import CacheService
+from app.core.database import primary_reads, reading_own_writes
+from app.services.cache_service import CacheService, BoundedTTLCache
+from app.services.cache_invalidation_bus import CacheInvalidationBus
+from app.services.cache_metrics import CacheMetrics
+from app.utils.cache_utils import CacheKeyBuilder, to_snapshot
 from app.utils.logging import get_logger
 
 # 定义缓存类型
@@ -30,28 +34,438 @@ else:
     ActiveCacheService = CacheService
     logger.info("Using memory cache service")
 
+# 两级缓存：Redis 可用时，在每个 worker 进程内维护一个有界 L1，L1 中保存序列化后的值
+# 以保证每次读取都返回新对象，与直接读 Redis 的语义一致
+_l1_cache: Optional[BoundedTTLCache] = None
+if ActiveCacheService is not CacheService and settings.CACHE_L1_ENABLED:
+    _l1_cache = BoundedTTLCache(
+        max_items=settings.CACHE_L1_MAX_ITEMS,
+        max_bytes=settings.CACHE_L1_MAX_BYTES,
+        size_of=len,
+        on_evict=CacheMetrics.record_eviction
+    )
+    logger.info("Using two-tier cache (in-process L1 + Redis L2)")
+
+# 后端是否保存序列化后的值（Redis）；此时在这里编码，写入大小即编码后的字节数
+_raw_backend = hasattr(ActiveCacheService, "set_raw")
+
+# 本进程内的缓存存储：两级缓存的 L1，或内存后端本身；其他 worker 需要通过失效总线同步
+_local_cache: Optional[BoundedTTLCache] = _l1_cache
+if ActiveCacheService is CacheService:
+    _local_cache = CacheService._cache
+
+def _publish_invalidation(kind: str, value: Any = None) -> None:
+    """向其他 worker 广播失效事件（仅在存在进程内缓存时需要）"""
+    if _local_cache is not None:
+        CacheInvalidationBus.publish(kind, value)
+
+async def _apublish_invalidation(kind: str, value: Any = None) -> None:
+    """Async version of _publish_invalidation."""
+    if _local_cache is not None:
+        await CacheInvalidationBus.apublish(kind, value)
+
+_l1_prefixes = settings.cache_l1_prefixes
+_l1_all_keys = "*" in _l1_prefixes
+
+def _use_l1(key: str) -> bool:
+    """判断键是否进入进程内 L1"""
+    return _l1_cache is not None and (_l1_all_keys or key.startswith(_l1_prefixes))
+
 class UnifiedCacheService:
-    """Unified cache service that delegates to the active cache service."""
+    """
+    Unified cache service that delegates to the active cache service.
+
+    The ``a``-prefixed methods are awaitable counterparts of the sync API for
+    use in ``async def`` code: with Redis they go through a shared
+    ``redis.asyncio`` connection pool instead of blocking the event loop.
+    """
 
     @classmethod
     def get(cls, key: str) -> Optional[Any]:
         """Get a value from cache if it exists."""
-        return ActiveCacheService.get(key)
+        start = time.perf_counter()
+        source = "backend"
+        if _use_l1(key):
+            raw = _l1_cache.get(key)
+            if raw is not None:
+                source = "l1"
+            else:
+                # L1 未命中，读穿到 L2 并回填 L1
+                raw = ActiveCacheService.get_raw(key)
+                if raw is not None:
+                    _l1_cache.set(key, raw, settings.CACHE_L1_TTL)
+            value = ActiveCacheService.decode(raw) if raw is not None else None
+        else:
+            value = ActiveCacheService.get(key)
+        CacheMetrics.record_get(key, source if value is not None else None, time.perf_counter() - start)
+        return value
+
+    @classmethod
+    def set(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """
+        Set a value in cache with TTL in seconds.
+
+        Tags (e.g. ``article:42``, ``stats``) let ``invalidate_tags`` remove the
+        entry later without scanning the keyspace.
+        """
+        start = time.perf_counter()
+        if _raw_backend:
+            raw = ActiveCacheService.encode(value)
+            ActiveCacheService.set_raw(key, raw, ttl, tags)
+            cls._fill_l1({key: raw}, ttl, tags)
+            size = len(raw)
+        else:
+            ActiveCacheService.set(key, value, ttl, tags)
+            size = _local_cache.entry_size(key)
+        CacheMetrics.record_set(key, size, time.perf_counter() - start)
+
+    @classmethod
+    async def aget(cls, key: str) -> Optional[Any]:
+        """Async version of get."""
+        start = time.perf_counter()
+        source = "backend"
+        if _use_l1(key):
+            raw = _l1_cache.get(key)
+            if raw is not None:
+                source = "l1"
+            else:
+                raw = await ActiveCacheService.aget_raw(key)
+                if raw is not None:
+                    _l1_cache.set(key, raw, settings.CACHE_L1_TTL)
+            value = ActiveCacheService.decode(raw) if raw is not None else None
+        else:
+            value = await ActiveCacheService.aget(key)
+        CacheMetrics.record_get(key, source if value is not None else None, time.perf_counter() - start)
+        return value
+
+    @classmethod
+    async def aset(cls, key: str, value: Any, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set."""
+        start = time.perf_counter()
+        if _raw_backend:
+            raw = ActiveCacheService.encode(value)
+            await ActiveCacheService.aset_raw(key, raw, ttl, tags)
+            cls._fill_l1({key: raw}, ttl, tags)
+            size = len(raw)
+        else:
+            await ActiveCacheService.aset(key, value, ttl, tags)
+            size = _local_cache.entry_size(key)
+        CacheMetrics.record_set(key, size, time.perf_counter() - start)
 
     @classmethod
-    def set(cls, key: str, value: Any, ttl: int = 300) -> None:
-        """Set a value in cache with TTL in seconds."""
-        ActiveCacheService.set(key, value, ttl)
+    async def aget_bytes(cls, key: str) -> Optional[bytes]:
+        """
+        Get a value stored with ``aset_bytes``.
+
+        Byte values bypass the codec, so a hit returns the stored bytes as they are.
+        """
+        start = time.perf_counter()
+        source = "backend"
+        if _use_l1(key):
+            data = _l1_cache.get(key)
+            if data is not None:
+                source = "l1"
+            else:
+                data = await ActiveCacheService.aget_raw(key)
+                if data is not None:
+                    _l1_cache.set(key, data, settings.CACHE_L1_TTL)
+        elif _raw_backend:
+            data = await ActiveCacheService.aget_raw(key)
+        else:
+            data = await ActiveCacheService.aget(key)
+        CacheMetrics.record_get(key, source if data is not None else None, time.perf_counter() - start)
+        return data
+
+    @classmethod
+    async def aset_bytes(cls, key: str, data: bytes, ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Store bytes without serializing them (see ``aget_bytes``)."""
+        start = time.perf_counter()
+        if _raw_backend:
+            await ActiveCacheService.aset_raw(key, data, ttl, tags)
+            cls._fill_l1({key: data}, ttl, tags)
+        else:
+            await ActiveCacheService.aset(key, data, ttl, tags)
+        CacheMetrics.record_set(key, len(data), time.perf_counter() - start)
+
+    @classmethod
+    def get_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values at once; missing keys are omitted from the result.
+
+        L1 hits are served locally and the rest are fetched with one MGET.
+        """
+        start = time.perf_counter()
+        keys = list(dict.fromkeys(keys))
+        result, remote_keys = cls._get_many_local(keys)
+        l1_hits = set(result)
+        if _raw_backend:
+            cls._merge_remote(result, ActiveCacheService.get_many_raw(remote_keys))
+        else:
+            result.update(ActiveCacheService.get_many(remote_keys))
+        cls._record_many_gets(keys, result, l1_hits, time.perf_counter() - start)
+        return result
+
+    @classmethod
+    async def aget_many(cls, keys: Iterable[str]) -> Dict[str, Any]:
+        """Async version of get_many."""
+        start = time.perf_counter()
+        keys = list(dict.fromkeys(keys))
+        result, remote_keys = cls._get_many_local(keys)
+        l1_hits = set(result)
+        if _raw_backend:
+            cls._merge_remote(result, await ActiveCacheService.aget_many_raw(remote_keys))
+        else:
+            result.update(await ActiveCacheService.aget_many(remote_keys))
+        cls._record_many_gets(keys, result, l1_hits, time.perf_counter() - start)
+        return result
+
+    @classmethod
+    def _get_many_local(cls, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """Serve what L1 can and return the keys that still need the backend."""
+        if _l1_cache is None:
+            return {}, keys
+        l1_keys = [key for key in keys if _use_l1(key)]
+        result = {key: ActiveCacheService.decode(raw) for key, raw in _l1_cache.get_many(l1_keys).items()}
+        return result, [key for key in keys if key not in result]
+
+    @classmethod
+    def _merge_remote(cls, result: Dict[str, Any], raw_values: Dict[str, Any]) -> None:
+        """Decode backend values into result, filling L1 for eligible keys."""
+        for key, raw in raw_values.items():
+            if _use_l1(key):
+                _l1_cache.set(key, raw, settings.CACHE_L1_TTL)
+            result[key] = ActiveCacheService.decode(raw)
+
+    @classmethod
+    def _record_many_gets(cls, keys: List[str], result: Dict[str, Any], l1_hits: Set[str], seconds: float) -> None:
+        """Record a batched lookup, splitting its latency evenly across the keys."""
+        if not keys:
+            return
+        per_key = seconds / len(keys)
+        for key in keys:
+            source = None
+            if key in l1_hits:
+                source = "l1"
+            elif key in result:
+                source = "backend"
+            CacheMetrics.record_get(key, source, per_key)
+
+    @classmethod
+    def set_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Set several values with the same TTL in one round trip."""
+        start = time.perf_counter()
+        if _raw_backend:
+            raw_items = {key: ActiveCacheService.encode(value) for key, value in items.items()}
+            ActiveCacheService.set_many_raw(raw_items, ttl, tags)
+            cls._fill_l1(raw_items, ttl, tags)
+            sizes = {key: len(raw) for key, raw in raw_items.items()}
+        else:
+            ActiveCacheService.set_many(items, ttl, tags)
+            sizes = {key: _local_cache.entry_size(key) for key in items}
+        cls._record_many_sets(sizes, time.perf_counter() - start)
+
+    @classmethod
+    async def aset_many(cls, items: Dict[str, Any], ttl: int = 300, tags: Optional[Iterable[str]] = None) -> None:
+        """Async version of set_many."""
+        start = time.perf_counter()
+        if _raw_backend:
+            raw_items = {key: ActiveCacheService.encode(value) for key, value in items.items()}
+            await ActiveCacheService.aset_many_raw(raw_items, ttl, tags)
+            cls._fill_l1(raw_items, ttl, tags)
+            sizes = {key: len(raw) for key, raw in raw_items.items()}
+        else:
+            await ActiveCacheService.aset_many(items, ttl, tags)
+            sizes = {key: _local_cache.entry_size(key) for key in items}
+        cls._record_many_sets(sizes, time.perf_counter() - start)
+
+    @classmethod
+    def _record_many_sets(cls, sizes: Dict[str, int], seconds: float) -> None:
+        """Record a batched write, splitting its latency evenly across the keys."""
+        if not sizes:
+            return
+        per_key = seconds / len(sizes)
+        for key, size in sizes.items():
+            CacheMetrics.record_set(key, size, per_key)
+
+    @classmethod
+    def _fill_l1(cls, raw_items: Dict[str, Any], ttl: int, tags: Optional[Iterable[str]]) -> None:
+        """Store the L1-eligible serialized values locally."""
+        l1_items = {key: raw for key, raw in raw_items.items() if _use_l1(key)}
+        if l1_items:
+            _l1_cache.set_many(l1_items, min(ttl, settings.CACHE_L1_TTL), tags or ())
 
     @classmethod
     def delete(cls, key: str) -> None:
         """Delete a value from cache."""
+        CacheMetrics.record_delete(key)
+        if _l1_cache is not None:
+            _l1_cache.delete(key)
         ActiveCacheService.delete(key)
+        _publish_invalidation(CacheInvalidationBus.KEY, key)
+
+    @classmethod
+    async def adelete(cls, key: str) -> None:
+        """Async version of delete."""
+        CacheMetrics.record_delete(key)
+        if _l1_cache is not None:
+            _l1_cache.delete(key)
+        await ActiveCacheService.adelete(key)
+        await _apublish_invalidation(CacheInvalidationBus.KEY, key)
+
+    @classmethod
+    def delete_many(cls, keys: Iterable[str]) -> None:
+        """Delete several keys at once, in every worker."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        for key in keys:
+            CacheMetrics.record_delete(key)
+        if _l1_cache is not None:
+            _l1_cache.delete_many(keys)
+        ActiveCacheService.delete_many(keys)
+        _publish_invalidation(CacheInvalidationBus.KEYS, keys)
+
+    @classmethod
+    async def adelete_many(cls, keys: Iterable[str]) -> None:
+        """Async version of delete_many."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        for key in keys:
+            CacheMetrics.record_delete(key)
+        if _l1_cache is not None:
+            _l1_cache.delete_many(keys)
+        await ActiveCacheService.adelete_many(keys)
+        await _apublish_invalidation(CacheInvalidationBus.KEYS, keys)
+
+    @classmethod
+    def delete_by_prefix(cls, prefix: str) -> None:
+        """Delete every key starting with prefix, in every worker."""
+        if _l1_cache is not None:
+            _l1_cache.delete_prefix(prefix)
+        ActiveCacheService.delete_by_prefix(prefix)
+        _publish_invalidation(CacheInvalidationBus.PREFIX, prefix)
+
+    @classmethod
+    def invalidate_tags(cls, *tags: str) -> None:
+        """Delete every entry carrying any of the tags, in every worker."""
+        tags = [tag for tag in dict.fromkeys(tags) if tag]
+        if not tags:
+            return
+        keys = ActiveCacheService.invalidate_tags(tags)
+        l1_keys = cls._invalidate_l1(tags, keys)
+        _publish_invalidation(CacheInvalidationBus.TAGS, tags)
+        if l1_keys:
+            _publish_invalidation(CacheInvalidationBus.KEYS, l1_keys)
+
+    @classmethod
+    async def ainvalidate_tags(cls, *tags: str) -> None:
+        """Async version of invalidate_tags."""
+        tags = [tag for tag in dict.fromkeys(tags) if tag]
+        if not tags:
+            return
+        keys = await ActiveCacheService.ainvalidate_tags(tags)
+        l1_keys = cls._invalidate_l1(tags, keys)
+        await _apublish_invalidation(CacheInvalidationBus.TAGS, tags)
+        if l1_keys:
+            await _apublish_invalidation(CacheInvalidationBus.KEYS, l1_keys)
+
+    @classmethod
+    def _invalidate_l1(cls, tags: List[str], keys: Optional[List[str]]) -> List[str]:
+        """
+        Drop the invalidated entries from this worker's L1.
+
+        Returns the L1-eligible keys among those the backend deleted; other
+        workers drop them by key (KEYS event), because values filled into L1 by
+        read-through from Redis carry no tags.
+        """
+        if _l1_cache is None:
+            return []
+        for tag in tags:
+            _l1_cache.delete_tag(tag)
+        l1_keys = [key for key in keys or () if _use_l1(key)]
+        _l1_cache.delete_many(l1_keys)
+        return l1_keys
 
     @classmethod
     def clear(cls) -> None:
         """Clear all cache."""
+        if _l1_cache is not None:
+            _l1_cache.clear()
         ActiveCacheService.clear()
+        _publish_invalidation(CacheInvalidationBus.CLEAR)
+
+    @classmethod
+    def clear_local(cls) -> None:
+        """Clear only this worker's in-process cache."""
+        if _local_cache is not None:
+            _local_cache.clear()
+
+    @classmethod
+    def apply_invalidation(cls, kind: str, value: Any) -> None:
+        """Apply an invalidation event from another worker to the local cache only."""
+        if _local_cache is None:
+            return
+        if kind == CacheInvalidationBus.KEY and value:
+            _local_cache.delete(value)
+        elif kind == CacheInvalidationBus.KEYS and value:
+            _local_cache.delete_many(value)
+        elif kind == CacheInvalidationBus.PREFIX and value:
+            _local_cache.delete_prefix(value)
+        elif kind == CacheInvalidationBus.TAGS and value:
+            for tag in value:
+                _local_cache.delete_tag(tag)
+        elif kind == CacheInvalidationBus.CLEAR:
+            _local_cache.clear()
+        else:
+            logger.warning(f"Unknown cache invalidation event: {kind} {value}")
+
+    @classmethod
+    def start_invalidation_listener(cls) -> None:
+        """Start applying invalidation events published by other workers."""
+        if _local_cache is not None:
+            CacheInvalidationBus.start(cls.apply_invalidation)
+
+    @classmethod
+    async def stop_invalidation_listener(cls) -> None:
+        """Stop the invalidation subscriber task."""
+        await CacheInvalidationBus.stop()
+
+    @classmethod
+    async def close(cls) -> None:
+        """Release the backend's async connections (called on shutdown)."""
+        if hasattr(ActiveCacheService, "close_async_client"):
+            await ActiveCacheService.close_async_client()
+
+    @classmethod
+    def acquire_lock(cls, name: str, ttl_ms: int) -> Optional[str]:
+        """
+        Try to take a cross-worker lock; returns an owner token on success.
+
+        The memory backend is private to each worker, so the lock is always granted.
+        """
+        if hasattr(ActiveCacheService, "acquire_lock"):
+            return ActiveCacheService.acquire_lock(name, ttl_ms)
+        return "local"
+
+    @classmethod
+    def release_lock(cls, name: str, token: str) -> None:
+        """Release a lock taken with acquire_lock."""
+        if hasattr(ActiveCacheService, "release_lock"):
+            ActiveCacheService.release_lock(name, token)
+
+    @classmethod
+    async def aacquire_lock(cls, name: str, ttl_ms: int) -> Optional[str]:
+        """Async version of acquire_lock."""
+        if hasattr(ActiveCacheService, "aacquire_lock"):
+            return await ActiveCacheService.aacquire_lock(name, ttl_ms)
+        return "local"
+
+    @classmethod
+    async def arelease_lock(cls, name: str, token: str) -> None:
+        """Async version of release_lock."""
+        if hasattr(ActiveCacheService, "arelease_lock"):
+            await ActiveCacheService.arelease_lock(name, token)
 
     @classmethod
     def generate_key(cls, prefix: str, *args: Any, **kwargs: Any) -> str:
@@ -63,43 +477,77 @@ class UnifiedCacheService:
         """Get all keys matching pattern."""
         if hasattr(ActiveCacheService, "get_keys"):
             return ActiveCacheService.get_keys(pattern)
-        # 内存缓存不支持模式匹配，返回所有键
-        if ActiveCacheService == CacheService:
-            return list(ActiveCacheService._cache.keys())
         return []
 
     @classmethod
     def get_stats(cls) -> Dict[str, Any]:
         """Get cache statistics."""
         if hasattr(ActiveCacheService, "get_stats"):
-            return ActiveCacheService.get_stats()
-        # 内存缓存的简单统计
-        if ActiveCacheService == CacheService:
-            return {
-                "keys_count": len(ActiveCacheService._cache),
-                "type": "memory"
-            }
-        return {"type": "unknown"}
-
-def cached(prefix: str, ttl: int = 300) -> Callable[[Callable[..., T]], Callable[..., T]]:
-    """Decorator to cache function results."""
+            stats = ActiveCacheService.get_stats()
+        else:
+            stats = {"type": "unknown"}
+        if _l1_cache is not None:
+            stats["l1"] = _l1_cache.get_stats()
+        # 按键前缀统计的命中、写入、淘汰和耗时
+        stats["prefixes"] = CacheMetrics.get_stats()
+        return stats
+
+def cached(
+    prefix: str,
+    ttl: int = 300,
+    key_params: Optional[Iterable[str]] = None,
+    tags: Optional[Iterable[str]] = None
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator to cache function results.
+
+    The cache key skips the database session and injected dependencies, and the
+    result is stored as a plain serializable snapshot (see ``to_snapshot``), so
+    callers receive dicts/lists rather than ORM instances on both hits and misses.
+    Entries are tagged with the prefix plus any ``tags`` templates formatted
+    with the call arguments (e.g. ``"article:{article_id}"``). Coroutine
+    functions are cached through the async backend; a sync and an async
+    function with the same prefix and parameters share their entries.
+    With read replicas, misses are computed on the primary and requests
+    pinned to the primary after a write (db_last_write) skip the lookup.
+    """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        key_builder = CacheKeyBuilder(prefix, func, key_params, tags)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                cache_key, cache_tags = key_builder.build_entry(args, kwargs)
+
+                if not reading_own_writes():
+                    cached_result = await UnifiedCacheService.aget(cache_key)
+                    if cached_result is not None:
+                        return cast(T, cached_result)
+
+                with primary_reads():
+                    result = to_snapshot(await func(*args, **kwargs))
+                await UnifiedCacheService.aset(cache_key, result, ttl, cache_tags)
+                return cast(T, result)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            # 生成缓存键
-            cache_key = UnifiedCacheService.generate_key(prefix, *args, **kwargs)
+            # 生成缓存键和标签
+            cache_key, cache_tags = key_builder.build_entry(args, kwargs)
 
-            # 尝试从缓存获取
-            cached_result = UnifiedCacheService.get(cache_key)
-            if cached_result is not None:
-                return cast(T, cached_result)
+            # 尝试从缓存获取（客户端刚写入过时跳过，读取主库的最新数据）
+            if not reading_own_writes():
+                cached_result = UnifiedCacheService.get(cache_key)
+                if cached_result is not None:
+                    return cast(T, cached_result)
 
-            # 执行原始函数
-            result = func(*args, **kwargs)
+            # 执行原始函数；写入缓存的结果从主库读取，不使用副本的旧数据
+            with primary_reads():
+                result = to_snapshot(func(*args, **kwargs))
 
             # 缓存结果
-            UnifiedCacheService.set(cache_key, result, ttl)
+            UnifiedCacheService.set(cache_key, result, ttl, cache_tags)
 
-            return result
+            return cast(T, result)
         return wrapper
     return decorator
@@ -0,0 +1,190 @@
+"""
+文章浏览量的写后缓冲（write-behind）
+
+浏览量不再在每次请求时写数据库：
+- 使用 Redis 缓存时，增量累加在共享的 Redis 哈希中（HINCRBY），worker 重启不丢失；
+- 使用内存缓存时，增量累加在本进程内；
+- 后台任务每隔 VIEW_COUNT_FLUSH_SECONDS 秒取走全部增量，用一条批量 UPDATE 写入
+  articles.view_count；写入失败时增量放回缓冲区，应用关闭时会再刷新一次。
+文章的浏览量因此最多滞后一个刷新周期。
+"""
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal, primary_reads
+from app.services.article_service import ArticleService
+from app.services.unified_cache_service import ActiveCacheService, UnifiedCacheService
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Redis 中待写入的浏览量增量: {article_id: count}
+PENDING_KEY = "view_count:pending"
+# slug -> 文章 ID 的缓存
+ARTICLE_SLUG_CACHE_PREFIX = "article_slug:"
+ARTICLE_SLUG_CACHE_TTL = 3600
+
+
+class ViewCounter:
+    """Buffers article view increments and flushes them to the database in batches."""
+
+    # 内存缓冲区（内存缓存后端，或 Redis 不可用时的后备）
+    _pending: Counter = Counter()
+    _task: Optional[asyncio.Task] = None
+    _stopping: Optional[asyncio.Event] = None
+
+    _stats: Dict[str, int] = {
+        "recorded": 0,
+        "flushed": 0,
+        "flushes": 0,
+        "failures": 0,
+    }
+
+    @classmethod
+    def _redis(cls) -> Optional[Any]:
+        """Async Redis client when the Redis backend is active."""
+        if hasattr(ActiveCacheService, "get_async_client"):
+            return ActiveCacheService.get_async_client()
+        return None
+
+    @classmethod
+    async def resolve_slug(cls, slug: str) -> Optional[int]:
+        """Article ID for a slug, cached so that repeat readers cost no query."""
+        cache_key = f"{ARTICLE_SLUG_CACHE_PREFIX}{slug}"
+        article_id = await UnifiedCacheService.aget(cache_key)
+        if article_id is not None:
+            return article_id
+
+        def query() -> Optional[int]:
+            db = SessionLocal()
+            try:
+                # 结果写入缓存，从主库读取
+                with primary_reads():
+                    return ArticleService.get_article_id_by_slug(db, slug)
+            finally:
+                db.close()
+
+        article_id = await run_in_threadpool(query)
+        if article_id is not None:
+            await UnifiedCacheService.aset(cache_key, article_id, ARTICLE_SLUG_CACHE_TTL, [f"article:{article_id}"])
+        return article_id
+
+    @classmethod
+    async def record(cls, article_id: int) -> None:
+        """Count one view of an article."""
+        cls._stats["recorded"] += 1
+        client = cls._redis()
+        if client is not None:
+            try:
+                await client.hincrby(PENDING_KEY, str(article_id), 1)
+                return
+            except Exception as e:
+                logger.error(f"Error buffering view count in Redis, keeping it in memory: {e}")
+        cls._pending[article_id] += 1
+
+    @classmethod
+    async def _take(cls) -> Counter:
+        """Atomically take every buffered increment."""
+        counts, cls._pending = cls._pending, Counter()
+        client = cls._redis()
+        if client is not None:
+            try:
+                # 读取并删除在同一事务中完成，之后的增量进入新的哈希
+                pipe = client.pipeline(transaction=True)
+                pipe.hgetall(PENDING_KEY)
+                pipe.delete(PENDING_KEY)
+                pending, _ = await pipe.execute()
+                for article_id, count in pending.items():
+                    counts[int(article_id)] += int(count)
+            except Exception as e:
+                logger.error(f"Error reading buffered view counts from Redis: {e}")
+        return counts
+
+    @classmethod
+    async def _restore(cls, counts: Counter) -> None:
+        """Put increments back after a failed flush."""
+        client = cls._redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for article_id, count in counts.items():
+                    pipe.hincrby(PENDING_KEY, str(article_id), count)
+                await pipe.execute()
+                return
+            except Exception as e:
+                logger.error(f"Error restoring view counts to Redis, keeping them in memory: {e}")
+        cls._pending.update(counts)
+
+    @staticmethod
+    def _write(counts: Dict[int, int]) -> None:
+        db = SessionLocal()
+        try:
+            ArticleService.add_view_counts(db, counts)
+        finally:
+            db.close()
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Write buffered increments to the database; returns the number of views written."""
+        counts = await cls._take()
+        if not counts:
+            return 0
+
+        try:
+            # 数据库访问是同步的，放到线程池中执行，不阻塞事件循环
+            await run_in_threadpool(cls._write, dict(counts))
+        except Exception as e:
+            logger.error(f"Error flushing view counts: {e}")
+            cls._stats["failures"] += 1
+            await cls._restore(counts)
+            return 0
+
+        total = sum(counts.values())
+        cls._stats["flushes"] += 1
+        cls._stats["flushed"] += total
+        logger.debug(f"Flushed {total} views for {len(counts)} articles")
+        return total
+
+    @classmethod
+    async def _run(cls) -> None:
+        """Flush periodically until stop() is called."""
+        while not cls._stopping.is_set():
+            try:
+                await asyncio.wait_for(cls._stopping.wait(), timeout=settings.VIEW_COUNT_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await cls.flush()
+            except Exception as e:
+                logger.error(f"Unexpected error in view count flusher: {e}")
+
+    @classmethod
+    def start(cls) -> None:
+        """Start the periodic flush task on the running event loop."""
+        if cls._task is not None:
+            return
+        cls._stopping = asyncio.Event()
+        cls._task = asyncio.get_running_loop().create_task(cls._run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        """Stop the flush task and drain the buffer."""
+        if cls._task is None:
+            return
+        # 不取消正在进行的刷新，等待其结束后再退出（退出前会再刷新一次）
+        cls._stopping.set()
+        await cls._task
+        cls._task = None
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Counters of recorded and flushed views."""
+        return {
+            **cls._stats,
+            "pending_in_memory": sum(cls._pending.values()),
+            "flush_interval_seconds": settings.VIEW_COUNT_FLUSH_SECONDS,
+        }
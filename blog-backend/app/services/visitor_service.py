@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, extract
 from datetime import datetime, timedelta, timezone
 import re
-import user_agents
+from functools import lru_cache
 
 from app import models
 from app.schemas.visitor import VisitorCreate, VisitorResponse, VisitorStatistics
@@ -16,6 +16,16 @@ from app.services.ip_location_service import IPLocationService
 
 logger = get_logger(__name__)
 
+
+@lru_cache(maxsize=1024)
+def _parse_user_agent(user_agent_string: str) -> Tuple[bool, bool]:
+    """(is_mobile, is_bot) of a User-Agent string."""
+    # user_agents 导入时编译全部 UA 正则（约 200ms），首次访客记录时再导入
+    import user_agents
+
+    user_agent = user_agents.parse(user_agent_string)
+    return user_agent.is_mobile, user_agent.is_bot
+
 class VisitorService:
     """访客记录服务类"""
 
@@ -52,9 +62,7 @@ class VisitorService:
 
         if user_agent_string:
             try:
-                user_agent = user_agents.parse(user_agent_string)
-                is_mobile = user_agent.is_mobile
-                is_bot = user_agent.is_bot
+                is_mobile, is_bot = _parse_user_agent(user_agent_string)
             except Exception as e:
                 logger.error(f"解析用户代理失败: {e}")
 
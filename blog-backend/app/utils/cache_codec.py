@@ -0,0 +1,207 @@
+"""
+缓存值编解码
+
+写入 Redis 的值格式为：1 字节格式版本 + 1 字节标志位 + 负载。
+- 标志位低 4 位为序列化器编号（json / orjson），0x10 表示负载经过 zlib 压缩，
+  0x20 表示负载中含有类型标记（datetime、Decimal 等），读取时需要还原；
+- 不以版本字节开头的值按旧格式（JSON 文本或原始字符串）读取，新旧格式可以共存；
+- 读到未知版本时按未命中处理，便于先发布能读取新格式的代码，再切换写入格式。
+"""
+import datetime
+import json
+import zlib
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Union
+
+from app.core.config import settings
+from app.utils.logging import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+logger = get_logger(__name__)
+
+# 当前格式版本；旧格式的 JSON 文本总以可打印字符或空白开头，不会与之混淆
+CODEC_VERSION = 1
+_HEADER_MAX = 0x08
+
+# 标志位
+SERIALIZER_MASK = 0x0F
+FLAG_ZLIB = 0x10
+FLAG_TYPED = 0x20
+
+# 类型标记字段
+TYPE_FIELD = "__cache_type__"
+VALUE_FIELD = "value"
+
+
+def _tag(value: Any) -> Optional[Dict[str, Any]]:
+    """将 JSON 无法原样表示的值转换为带类型标记的字典，不支持的类型返回 None"""
+    if isinstance(value, datetime.datetime):
+        return {TYPE_FIELD: "datetime", VALUE_FIELD: value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {TYPE_FIELD: "date", VALUE_FIELD: value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {TYPE_FIELD: "time", VALUE_FIELD: value.isoformat()}
+    if isinstance(value, Decimal):
+        return {TYPE_FIELD: "decimal", VALUE_FIELD: str(value)}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE_FIELD: "set", VALUE_FIELD: list(value)}
+    if isinstance(value, bytes):
+        return {TYPE_FIELD: "bytes", VALUE_FIELD: value.hex()}
+    return None
+
+
+_UNTAG: Dict[str, Callable[[Any], Any]] = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "decimal": Decimal,
+    "set": set,
+    "bytes": bytes.fromhex,
+}
+
+
+def _untag(value: Any) -> Any:
+    """递归还原带类型标记的值"""
+    if isinstance(value, list):
+        return [_untag(item) for item in value]
+    if isinstance(value, dict):
+        type_name = value.get(TYPE_FIELD)
+        if type_name in _UNTAG and len(value) == 2:
+            return _UNTAG[type_name](_untag(value[VALUE_FIELD]))
+        return {key: _untag(item) for key, item in value.items()}
+    return value
+
+
+class JsonSerializer:
+    """标准库 json，作为没有安装 orjson 时的后备"""
+
+    id = 1
+    name = "json"
+
+    @staticmethod
+    def dumps(value: Any, default: Callable[[Any], Any]) -> bytes:
+        return json.dumps(value, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    @staticmethod
+    def loads(payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonSerializer:
+    """orjson：编解码速度和体积都明显优于标准库 json"""
+
+    id = 2
+    name = "orjson"
+
+    @staticmethod
+    def dumps(value: Any, default: Callable[[Any], Any]) -> bytes:
+        # datetime 交给 default 处理，以便加上类型标记；与 json 一致允许非字符串键
+        return orjson.dumps(
+            value,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+
+    @staticmethod
+    def loads(payload: bytes) -> Any:
+        return orjson.loads(payload)
+
+
+# 可用的序列化器: {编号: 序列化器}
+SERIALIZERS: Dict[int, Any] = {JsonSerializer.id: JsonSerializer}
+if orjson is not None:
+    SERIALIZERS[OrjsonSerializer.id] = OrjsonSerializer
+
+
+def register_serializer(serializer: Any) -> None:
+    """注册自定义序列化器（需提供 id、name、dumps(value, default) 和 loads(payload)）"""
+    if not 0 < serializer.id <= SERIALIZER_MASK:
+        raise ValueError(f"Serializer id must be between 1 and {SERIALIZER_MASK}")
+    SERIALIZERS[serializer.id] = serializer
+
+
+class CacheCodec:
+    """Encodes cache values into the versioned binary format and back."""
+
+    @classmethod
+    def _serializer(cls) -> Optional[Any]:
+        """Serializer selected by CACHE_CODEC; None means the legacy JSON text format."""
+        name = settings.CACHE_CODEC
+        if name == "legacy":
+            return None
+        for serializer in SERIALIZERS.values():
+            if serializer.name == name:
+                return serializer
+        return OrjsonSerializer if orjson is not None else JsonSerializer
+
+    @classmethod
+    def encode(cls, value: Any) -> Union[str, bytes]:
+        """Serialize a value, compressing it when above the size threshold."""
+        serializer = cls._serializer()
+        if serializer is None:
+            # 旧格式：字符串原样保存，其他值保存为 JSON 文本
+            if not isinstance(value, (str, bytes)):
+                value = json.dumps(value, default=str)
+            return value
+
+        typed = False
+
+        def default(obj: Any) -> Any:
+            nonlocal typed
+            tagged = _tag(obj)
+            if tagged is None:
+                # 其他类型与旧格式一致，转换为字符串
+                return str(obj)
+            typed = True
+            return tagged
+
+        payload = serializer.dumps(value, default)
+        flags = serializer.id | (FLAG_TYPED if typed else 0)
+
+        if settings.CACHE_COMPRESSION == "zlib" and len(payload) >= settings.CACHE_COMPRESS_MIN_BYTES:
+            compressed = zlib.compress(payload, settings.CACHE_COMPRESS_LEVEL)
+            if len(compressed) < len(payload):
+                payload = compressed
+                flags |= FLAG_ZLIB
+
+        return bytes((CODEC_VERSION, flags)) + payload
+
+    @classmethod
+    def decode(cls, raw: Any) -> Any:
+        """Deserialize a stored value written in either the current or the legacy format."""
+        if isinstance(raw, bytes) and raw and raw[0] <= _HEADER_MAX:
+            return cls._decode_versioned(raw)
+        return cls._decode_legacy(raw)
+
+    @classmethod
+    def _decode_versioned(cls, raw: bytes) -> Any:
+        if raw[0] != CODEC_VERSION or len(raw) < 2:
+            logger.debug(f"Unknown cache codec version {raw[0]}, treating as a miss")
+            return None
+
+        flags = raw[1]
+        serializer = SERIALIZERS.get(flags & SERIALIZER_MASK)
+        if serializer is None:
+            logger.warning(f"Cache value written with unavailable serializer {flags & SERIALIZER_MASK}")
+            return None
+
+        payload = raw[2:]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        value = serializer.loads(payload)
+        return _untag(value) if flags & FLAG_TYPED else value
+
+    @classmethod
+    def _decode_legacy(cls, raw: Any) -> Any:
+        # 尝试解析 JSON
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+            # 如果不是 JSON，则直接返回值
+            if isinstance(raw, bytes):
+                return raw.decode("utf-8", errors="replace")
+            return raw
@@ -0,0 +1,161 @@
+"""
+缓存工具：缓存键构建与结果快照
+
+缓存键只由真正影响结果的参数决定，数据库会话、请求对象以及通过 Depends 注入的依赖
+（如 current_user）都不会进入缓存键；缓存值在写入前被转换为可 JSON 序列化的快照，
+不会在请求之间共享存活的 ORM 对象。
+"""
+import hashlib
+import inspect
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import BackgroundTasks, Request, Response, WebSocket
+from fastapi.params import Depends, Param
+from pydantic_core import to_jsonable_python
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import NoInspectionAvailable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# 不参与缓存键计算的注入类型
+_INJECTED_TYPES = (Session, AsyncSession, Request, Response, BackgroundTasks, WebSocket)
+
+
+def _orm_identity(value: Any) -> Optional[str]:
+    """返回 ORM 实例的稳定标识（类名 + 主键），非 ORM 对象返回 None"""
+    try:
+        state = sa_inspect(value)
+    except NoInspectionAvailable:
+        return None
+    identity = getattr(state, "identity", None)
+    if identity is None:
+        return None
+    return f"{type(value).__name__}:{':'.join(str(part) for part in identity)}"
+
+
+def _orm_to_dict(value: Any) -> Optional[Dict[str, Any]]:
+    """将 ORM 实例的列属性转换为字典，非 ORM 对象返回 None"""
+    try:
+        mapper = sa_inspect(value).mapper
+    except (NoInspectionAvailable, AttributeError):
+        return None
+    return {attr.key: getattr(value, attr.key) for attr in mapper.column_attrs}
+
+
+def _key_fallback(value: Any) -> Any:
+    """缓存键中无法直接序列化的值的转换规则"""
+    identity = _orm_identity(value)
+    if identity is not None:
+        return identity
+    if isinstance(value, Param):
+        # 直接调用路由函数时未传入的 Query/Path 参数，使用其默认值
+        return value.default
+    if hasattr(value, "__dict__"):
+        # 普通参数对象（如 PaginationParams）按属性取值，避免 repr 中的内存地址
+        return {k: v for k, v in vars(value).items() if not k.startswith("_")}
+    return str(value)
+
+
+def _snapshot_fallback(value: Any) -> Any:
+    """缓存值中无法直接序列化的对象的转换规则"""
+    columns = _orm_to_dict(value)
+    if columns is not None:
+        return columns
+    return str(value)
+
+
+def to_snapshot(value: Any) -> Any:
+    """
+    将函数结果转换为可跨请求共享、可 JSON 序列化的快照
+
+    Pydantic 模型、dataclass、datetime 等会被转换为对应的 JSON 兼容值，
+    ORM 实例只保留列属性，不再携带会话状态。
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return to_jsonable_python(value, fallback=_snapshot_fallback)
+
+
+class CacheKeyBuilder:
+    """
+    缓存键构建器
+
+    在装饰时解析一次函数签名，之后每次调用只对参与计算的参数做序列化和哈希。
+    未指定 key_params 时，自动跳过数据库会话、请求对象和 Depends 注入的依赖；
+    指定 key_params 时，只有列出的参数参与计算（注入的 ORM 对象按主键参与）。
+
+    每个缓存条目都带有与前缀同名的标签，tags 中的模板（如 "article:{article_id}"）
+    使用调用参数格式化后作为附加标签。
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        func: Callable,
+        key_params: Optional[Iterable[str]] = None,
+        tags: Optional[Iterable[str]] = None
+    ):
+        self.prefix = prefix
+        self.signature = inspect.signature(func)
+        self.tag_templates = tuple(tags or ())
+
+        if key_params is not None:
+            key_params = set(key_params)
+            unknown = key_params - set(self.signature.parameters)
+            if unknown:
+                raise ValueError(f"Unknown cache key parameters for {func.__name__}: {sorted(unknown)}")
+            self.key_params = tuple(name for name in self.signature.parameters if name in key_params)
+            self.explicit = True
+        else:
+            self.key_params = tuple(
+                name for name, param in self.signature.parameters.items()
+                if not self._is_injected(param)
+            )
+            self.explicit = False
+
+    @staticmethod
+    def _is_injected(param: inspect.Parameter) -> bool:
+        """判断参数是否为注入的依赖"""
+        if param.name in ("self", "cls"):
+            return True
+        if isinstance(param.default, Depends):
+            return True
+        annotation = param.annotation
+        return inspect.isclass(annotation) and issubclass(annotation, _INJECTED_TYPES)
+
+    def _bind(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """按函数签名绑定调用参数（含默认值）"""
+        bound = self.signature.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        return bound.arguments
+
+    def _key_values(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """返回参与缓存键计算的参数及其取值"""
+        values = {}
+        for name in self.key_params:
+            value = arguments.get(name)
+            if not self.explicit and isinstance(value, _INJECTED_TYPES):
+                continue
+            values[name] = value
+        return values
+
+    def _key(self, arguments: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            to_jsonable_python(self._key_values(arguments), fallback=_key_fallback),
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        key_hash = hashlib.md5(f"{self.prefix}:{payload}".encode()).hexdigest()
+        return f"{self.prefix}:{key_hash}"
+
+    def build(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        """生成形如 "{prefix}:{hash}" 的缓存键"""
+        return self._key(self._bind(args, kwargs))
+
+    def build_entry(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """生成缓存键以及该条目的标签列表"""
+        arguments = self._bind(args, kwargs)
+        tags = [self.prefix]
+        tags.extend(template.format(**arguments) for template in self.tag_templates)
+        return self._key(arguments), tags
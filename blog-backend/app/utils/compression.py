@@ -0,0 +1,146 @@
+"""
+响应内容压缩
+
+- compress_variants：为响应体生成 gzip（以及安装了 brotli 时的 br）压缩版本，
+  压缩级别由 RESPONSE_GZIP_LEVEL / RESPONSE_BROTLI_QUALITY 配置；
+- negotiate_encoding：按请求的 Accept-Encoding（含 q 值）从已有版本中选择，
+  同等权重时优先 br，其次 gzip，客户端不接受任何压缩格式时返回 None（发送原文）；
+- write_precompressed / remove_precompressed：上传的文本类文件在磁盘上生成和删除
+  同名的 .br / .gz 文件，由静态文件服务直接发送。
+
+gzip 输出不含时间戳，相同内容在不同 worker 中压缩结果相同。
+"""
+import gzip
+import os
+from typing import Dict, Iterable, Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 为可选依赖
+    brotli = None
+
+IDENTITY = "identity"
+
+# 压缩格式的优先级；AVAILABLE_ENCODINGS 为当前进程能够生成的格式
+ENCODING_PREFERENCE = ("br", "gzip")
+AVAILABLE_ENCODINGS = ENCODING_PREFERENCE if brotli is not None else ("gzip",)
+
+# 静态文件的预压缩版本：原文件名加后缀
+SIBLING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# 上传时生成预压缩版本的文件类型（图片、音视频和压缩包本身已经压缩）
+PRECOMPRESS_EXTENSIONS = {
+    "svg", "txt", "md", "csv", "json", "xml", "html", "htm", "css", "js", "pdf", "rtf", "bmp", "ico",
+}
+# 压缩后不小于原文件的该比例时不保留（如图片较多的 PDF）
+PRECOMPRESS_MAX_RATIO = 0.9
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a body with the given content-coding (level defaults to the response settings)."""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL if level is None else level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY if level is None else level)
+    raise ValueError(f"Unsupported content-coding: {encoding}")
+
+
+def compress_variants(body: bytes, encodings: Iterable[str] = AVAILABLE_ENCODINGS) -> Dict[str, bytes]:
+    """
+    Compressed variants of a body, keyed by content-coding.
+
+    Bodies below RESPONSE_COMPRESS_MIN_BYTES and variants that are not smaller
+    than the original are left out.
+    """
+    if len(body) < settings.RESPONSE_COMPRESS_MIN_BYTES:
+        return {}
+    variants = {}
+    for encoding in encodings:
+        compressed = compress(body, encoding)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights = {}
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    Pick the content-coding to send from the available variants.
+
+    Returns None when the original body should be sent.
+    """
+    if not accept_encoding:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_precompressible(path: str) -> bool:
+    """Whether files of this type get .br / .gz siblings."""
+    return os.path.splitext(path)[1][1:].lower() in PRECOMPRESS_EXTENSIONS
+
+
+def write_precompressed(path: str) -> Dict[str, int]:
+    """
+    Write .br / .gz siblings of a file at the static-file compression levels.
+
+    Returns the size of each sibling written; siblings that do not save at least
+    10% are not kept.
+    """
+    if not is_precompressible(path):
+        return {}
+    with open(path, "rb") as f:
+        body = f.read()
+    if len(body) < settings.RESPONSE_COMPRESS_MIN_BYTES:
+        return {}
+
+    levels = {"gzip": settings.STATIC_GZIP_LEVEL, "br": settings.STATIC_BROTLI_QUALITY}
+    written = {}
+    for encoding in AVAILABLE_ENCODINGS:
+        compressed = compress(body, encoding, levels[encoding])
+        if len(compressed) > len(body) * PRECOMPRESS_MAX_RATIO:
+            continue
+        sibling = path + SIBLING_SUFFIXES[encoding]
+        # 先写临时文件再替换，避免发送写到一半的文件
+        temp_path = f"{sibling}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(temp_path, sibling)
+        written[encoding] = len(compressed)
+    return written
+
+
+def remove_precompressed(path: str) -> None:
+    """Delete the .br / .gz siblings of a file, if any."""
+    for suffix in SIBLING_SUFFIXES.values():
+        sibling = path + suffix
+        if os.path.exists(sibling):
+            os.remove(sibling)
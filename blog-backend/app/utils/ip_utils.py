@@ -1,62 +1,76 @@
 from fastapi import Request, WebSocket
-from typing import Optional, Union
+from starlette.datastructures import Headers
+from starlette.types import Scope
+from typing import Mapping, Optional, Union
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-def get_client_ip(request_or_websocket: Union[Request, WebSocket]) -> str:
+# 无法获取客户端地址时使用的默认值
+DEFAULT_CLIENT_IP = "127.0.0.1"
+
+def resolve_client_ip(headers: Mapping[str, str], client_host: Optional[str]) -> str:
     """
-    获取客户端真实 IP 地址。
+    按代理头部的优先级解析客户端真实 IP 地址。
 
-    优先从各种代理头部获取，如果不存在则使用 client.host。
-    X-Forwarded-For 格式通常为: client_ip, proxy1_ip, proxy2_ip, ...
+    优先级: X-Client-IP > X-Real-IP > X-Forwarded-For（第一个地址）> Forwarded（for=）> 直连地址。
 
     Args:
-        request_or_websocket: FastAPI 请求对象或 WebSocket 对象
+        headers: 请求头（大小写不敏感的映射）
+        client_host: 直连的客户端地址
 
     Returns:
         客户端 IP 地址字符串
     """
-    # 获取请求头和客户端信息
-    headers = None
-    client = None
-
-    if isinstance(request_or_websocket, Request):
-        headers = request_or_websocket.headers
-        client = request_or_websocket.client
-    else:  # WebSocket
-        headers = request_or_websocket.headers
-        client = request_or_websocket.client
-
-    # 尝试从各种头部获取真实 IP
     x_client_ip = headers.get("X-Client-IP")
-    x_real_ip = headers.get("X-Real-IP")
-    x_forwarded_for = headers.get("X-Forwarded-For")
-    forwarded = headers.get("Forwarded")
-
-    # 按优先级获取真实 IP
     if x_client_ip:
-        logger.debug(f"从 X-Client-IP 获取到 IP: {x_client_ip}")
         return x_client_ip
-    elif x_real_ip:
-        logger.debug(f"从 X-Real-IP 获取到 IP: {x_real_ip}")
+
+    x_real_ip = headers.get("X-Real-IP")
+    if x_real_ip:
         return x_real_ip
-    elif x_forwarded_for:
-        # X-Forwarded-For 可能包含多个 IP，取第一个
-        client_ip = x_forwarded_for.split(',')[0].strip()
-        logger.debug(f"从 X-Forwarded-For 获取到 IP: {client_ip} (完整值: {x_forwarded_for})")
-        return client_ip
-    elif forwarded:
+
+    x_forwarded_for = headers.get("X-Forwarded-For")
+    if x_forwarded_for:
+        # X-Forwarded-For 格式通常为: client_ip, proxy1_ip, proxy2_ip, ...，取第一个
+        return x_forwarded_for.split(',')[0].strip()
+
+    forwarded = headers.get("Forwarded")
+    if forwarded:
         # 解析 Forwarded 头部
         for part in forwarded.split(';'):
+            part = part.strip()
             if part.lower().startswith('for='):
-                real_ip = part[4:].strip()
                 # 移除可能的引号和 IPv6 括号
-                real_ip = real_ip.strip('"[]')
-                logger.debug(f"从 Forwarded 获取到 IP: {real_ip}")
-                return real_ip
+                return part[4:].strip().strip('"[]')
 
     # 如果没有代理头部，使用直接连接的客户端 IP
-    client_ip = client.host if client else "127.0.0.1"
-    logger.debug(f"从 client.host 获取到 IP: {client_ip}")
+    return client_host or DEFAULT_CLIENT_IP
+
+def get_client_ip_from_scope(scope: Scope) -> str:
+    """
+    从 ASGI scope 获取客户端真实 IP 地址。
+
+    RealIPMiddleware 已解析过时直接使用其结果（scope["state"]["real_ip"]）。
+    """
+    state = scope.get("state")
+    if state and "real_ip" in state:
+        return state["real_ip"]
+    client = scope.get("client")
+    return resolve_client_ip(Headers(scope=scope), client[0] if client else None)
+
+def get_client_ip(request_or_websocket: Union[Request, WebSocket]) -> str:
+    """
+    获取客户端真实 IP 地址。
+
+    优先从各种代理头部获取，如果不存在则使用 client.host。
+
+    Args:
+        request_or_websocket: FastAPI 请求对象或 WebSocket 对象
+
+    Returns:
+        客户端 IP 地址字符串
+    """
+    client_ip = get_client_ip_from_scope(request_or_websocket.scope)
+    logger.debug(f"客户端 IP: {client_ip}")
     return client_ip
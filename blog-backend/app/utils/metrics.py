@@ -0,0 +1,136 @@
+"""
+轻量级指标工具：固定分桶直方图与 Prometheus 文本格式输出
+
+直方图只维护每个桶的计数、总和与最大值，记录一次观测只需一次二分查找，
+分位数由桶边界线性插值估算，适合在请求路径上常驻统计。
+
+指标保存在各 worker 进程内，不跨进程汇总：Prometheus 输出的每个样本都带有
+worker（进程 ID）标签，JSON 接口同样返回 worker 字段。
+"""
+import bisect
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 默认分桶上界（毫秒）
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate quantiles."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        # 最后一个计数对应 +Inf 桶
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile (0 < q < 1) by interpolating inside the bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return count, average, max and p50/p95/p99."""
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.quantile(0.50), 3),
+            "p95": round(self.quantile(0.95), 3),
+            "p99": round(self.quantile(0.99), 3),
+        }
+
+
+def worker_id() -> str:
+    """Identify the worker process whose in-process metrics are being reported."""
+    return str(os.getpid())
+
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class PrometheusWriter:
+    """Builds a Prometheus text exposition document; every sample carries the worker label."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._declared = set()
+        self._worker = worker_id()
+
+    def _labels(self, labels: Optional[Dict[str, str]]) -> str:
+        return _format_labels({"worker": self._worker, **(labels or {})})
+
+    def _declare(self, name: str, metric_type: str, help_text: str) -> None:
+        if name in self._declared:
+            return
+        self._declared.add(name)
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        """Add a counter with one sample per label set."""
+        self._declare(name, "counter", help_text)
+        for labels, value in samples:
+            self._lines.append(f"{name}{self._labels(labels)} {value}")
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        """Add a gauge with one sample per label set."""
+        self._declare(name, "gauge", help_text)
+        for labels, value in samples:
+            self._lines.append(f"{name}{self._labels(labels)} {value}")
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        samples: Iterable[Tuple[Dict[str, str], Histogram]],
+        scale: float = 1.0
+    ) -> None:
+        """
+        Add a histogram with one series per label set.
+
+        scale converts the stored unit to the exported one (e.g. 0.001 for ms -> s).
+        """
+        self._declare(name, "histogram", help_text)
+        for labels, hist in samples:
+            cumulative = 0
+            for upper, bucket_count in zip(hist.buckets, hist.counts):
+                cumulative += bucket_count
+                bucket_labels = {**labels, "le": f"{upper * scale:g}"}
+                self._lines.append(f"{name}_bucket{self._labels(bucket_labels)} {cumulative}")
+            self._lines.append(f"{name}_bucket{self._labels({**labels, 'le': '+Inf'})} {hist.count}")
+            self._lines.append(f"{name}_sum{self._labels(labels)} {hist.sum * scale:g}")
+            self._lines.append(f"{name}_count{self._labels(labels)} {hist.count}")
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
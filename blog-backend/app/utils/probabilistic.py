@@ -0,0 +1,101 @@
+"""
+概率数据结构：布隆过滤器与 HyperLogLog
+
+两者都使用固定大小的内存：
+- 布隆过滤器回答“是否见过”，不会漏判，误判率由位数组大小和哈希函数个数决定；
+- HyperLogLog 估算去重后的元素数量，精度为 2^precision 个寄存器时的标准误差约 1.04 / sqrt(2^precision)。
+
+位置计算与 Redis 位图实现共用（见 ViewDeduplicator），同一元素在内存和 Redis 中映射到相同的位。
+"""
+import hashlib
+import math
+from typing import List, Tuple
+
+
+def _hash128(item: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter backed by a bytearray."""
+
+    def __init__(self, size_bits: int, hash_count: int):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    @staticmethod
+    def optimal_parameters(expected_items: int, false_positive_rate: float) -> Tuple[int, int]:
+        """Bit count m and hash count k for n items at the target false positive rate."""
+        size_bits = math.ceil(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2))
+        hash_count = max(1, round(size_bits / expected_items * math.log(2)))
+        return size_bits, hash_count
+
+    @staticmethod
+    def expected_false_positive_rate(size_bits: int, hash_count: int, items: int) -> float:
+        """Theoretical false positive rate after inserting items elements."""
+        return (1 - math.exp(-hash_count * items / size_bits)) ** hash_count
+
+    @staticmethod
+    def positions(item: str, size_bits: int, hash_count: int) -> List[int]:
+        """Bit positions of an item (Kirsch-Mitzenmacher double hashing)."""
+        h1, h2 = _hash128(item)
+        return [(h1 + i * h2) % size_bits for i in range(hash_count)]
+
+    def add(self, item: str) -> bool:
+        """Insert item; returns True when it was (probably) already present."""
+        present = True
+        for pos in self.positions(item, self.size_bits, self.hash_count):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                present = False
+                self.bits[byte] |= mask
+        return present
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self.positions(item, self.size_bits, self.hash_count)
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+
+class HyperLogLog:
+    """HyperLogLog cardinality estimator with 2^precision one-byte registers."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str) -> None:
+        """Add an item."""
+        x = _hash128(item)[0]
+        index = x >> (64 - self.precision)
+        # 剩余位中第一个 1 的位置
+        rest = (x << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - rest.bit_length() + 1, 64 - self.precision + 1)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merge another sketch of the same precision into this one (set union)."""
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        """Estimated number of distinct items."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # 小基数时使用线性计数修正
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.registers)
@@ -0,0 +1,16 @@
+"""
+数据库迁移脚本：按模型创建缺失的表
+
+应用启动时不再执行 Base.metadata.create_all，新环境部署前先运行迁移建表；
+已存在的表不受影响，表结构的变更仍由后续的迁移脚本完成。
+"""
+from app.models import Base
+from app.core.database import engine
+
+def run_migration():
+    """执行迁移：创建缺失的表"""
+    Base.metadata.create_all(bind=engine)
+    print("Migration completed: created missing tables")
+
+if __name__ == "__main__":
+    run_migration()
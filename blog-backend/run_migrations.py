@@ -8,6 +8,7 @@ from typing import List, Callable
 
 # 所有迁移模块列表
 MIGRATION_MODULES = [
+    "migrations.create_tables",
     "migrations.add_user_role",
     "migrations.add_social_media_field",
     "migrations.add_performance_indexes",
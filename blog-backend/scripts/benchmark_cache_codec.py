@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+缓存编码基准测试
+
+对比不同缓存编码格式（旧 JSON 文本 / json / orjson，是否压缩）下，文章数据的
+存储字节数以及编码、解码耗时。默认从数据库读取真实文章及其评论，
+数据库不可用或指定 --synthetic 时使用生成的数据。
+
+用法:
+    python scripts/benchmark_cache_codec.py [--limit 50] [--rounds 200] [--synthetic]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.cache_codec import CacheCodec, orjson
+from app.utils.cache_utils import to_snapshot
+
+# (名称, CACHE_CODEC, CACHE_COMPRESSION)
+VARIANTS = [
+    ("legacy json text", "legacy", "none"),
+    ("json", "json", "none"),
+    ("json + zlib", "json", "zlib"),
+    ("orjson", "orjson", "none"),
+    ("orjson + zlib", "orjson", "zlib"),
+]
+
+
+def load_articles(limit: int):
+    """从数据库读取文章及其评论，返回与接口缓存相同形式的快照"""
+    from app.core.database import SessionLocal
+    from app.models import Article, Comment
+
+    db = SessionLocal()
+    try:
+        articles = db.query(Article).order_by(Article.id.desc()).limit(limit).all()
+        payloads = []
+        for article in articles:
+            payload = to_snapshot(article)
+            payload["comments"] = to_snapshot(
+                db.query(Comment).filter(Comment.article_id == article.id).all()
+            )
+            payloads.append(payload)
+        return payloads
+    finally:
+        db.close()
+
+
+def synthetic_articles(limit: int):
+    """生成与文章接口结构相近的数据"""
+    now = datetime.now()
+    paragraph = "这是一段用于测试缓存编码的正文内容，包含中文、English words 和 `code`。\n" * 40
+    return [
+        {
+            "id": i,
+            "title": f"测试文章 {i}",
+            "slug": f"test-article-{i}",
+            "summary": paragraph[:200],
+            "content": paragraph,
+            "view_count": i * 17,
+            "created_at": now - timedelta(days=i),
+            "updated_at": now,
+            "comments": [
+                {"id": i * 100 + j, "content": f"评论 {j}", "created_at": now, "is_approved": True}
+                for j in range(10)
+            ],
+        }
+        for i in range(limit)
+    ]
+
+
+def measure(values, rounds: int):
+    """返回 (总字节数, 每条平均编码微秒, 每条平均解码微秒)"""
+    encoded = [CacheCodec.encode(value) for value in values]
+    size = sum(len(item if isinstance(item, bytes) else item.encode()) for item in encoded)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in values:
+            CacheCodec.encode(value)
+    encode_us = (time.perf_counter() - start) / (rounds * len(values)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in encoded:
+            CacheCodec.decode(item)
+    decode_us = (time.perf_counter() - start) / (rounds * len(values)) * 1e6
+
+    return size, encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache value codecs")
+    parser.add_argument("--limit", type=int, default=50, help="number of articles")
+    parser.add_argument("--rounds", type=int, default=200, help="encode/decode rounds")
+    parser.add_argument("--synthetic", action="store_true", help="do not read from the database")
+    args = parser.parse_args()
+
+    values = None
+    if not args.synthetic:
+        try:
+            values = load_articles(args.limit)
+            print(f"Loaded {len(values)} articles from the database")
+        except Exception as e:
+            print(f"Database unavailable ({e.__class__.__name__}), using synthetic articles")
+    if not values:
+        values = synthetic_articles(args.limit)
+
+    print(f"compress threshold: {settings.CACHE_COMPRESS_MIN_BYTES} bytes, level {settings.CACHE_COMPRESS_LEVEL}\n")
+    print(f"{'codec':<18}{'bytes':>12}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+
+    baseline = None
+    for name, codec, compression in VARIANTS:
+        if codec == "orjson" and orjson is None:
+            print(f"{name:<18}{'orjson not installed':>44}")
+            continue
+        settings.CACHE_CODEC = codec
+        settings.CACHE_COMPRESSION = compression
+        size, encode_us, decode_us = measure(values, args.rounds)
+        baseline = baseline or size
+        print(f"{name:<18}{size:>12}{size / baseline:>8.2f}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+响应压缩基准测试
+
+在同一进程内（httpx ASGITransport）请求一个约 45KB 的 JSON 页面（100 篇文章的列表），
+客户端声明 Accept-Encoding: gzip, br，对比每个请求消耗的 CPU 时间：
+- before: 响应字节已缓存，但每次都由 GZipMiddleware（原配置 compresslevel=9）重新压缩；
+- after:  @cache_response 在未命中时生成 gzip / brotli 版本，命中时直接发送。
+同时输出各版本的压缩后大小。默认使用内存缓存（USE_REDIS_CACHE=false）。
+
+用法:
+    USE_REDIS_CACHE=false python scripts/benchmark_compression.py [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.middleware.gzip import GZipMiddleware
+
+from app.core.config import settings
+from app.core.http_cache import ConditionalRoute, cache_response
+from app.utils.compression import AVAILABLE_ENCODINGS, compress_variants
+
+
+def page_body() -> bytes:
+    articles = [
+        {
+            "id": i,
+            "title": f"文章标题 {i}",
+            "slug": f"article-{i}",
+            "excerpt": "这是一段文章摘要，用于列表页展示。" * 3,
+            "tags_list": [{"id": t, "name": f"标签{t}"} for t in range(1, 4)],
+            "created_at": f"2025-01-{i % 28 + 1:02d}T12:00:00",
+            "view_count": i * 13,
+            "author": {"id": 1, "username": "admin", "avatar": "/images/avatar.png"},
+        }
+        for i in range(1, 101)
+    ]
+    return json.dumps(articles, ensure_ascii=False).encode()
+
+
+def build_before(body: bytes) -> FastAPI:
+    fastapi_app = FastAPI()
+    fastapi_app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+    @fastapi_app.get("/page")
+    async def page():
+        return Response(content=body, media_type="application/json")
+
+    return fastapi_app
+
+
+def build_after(body: bytes) -> FastAPI:
+    fastapi_app = FastAPI()
+    fastapi_app.add_middleware(
+        GZipMiddleware, minimum_size=settings.RESPONSE_COMPRESS_MIN_BYTES, compresslevel=settings.RESPONSE_GZIP_LEVEL
+    )
+    router = APIRouter(route_class=ConditionalRoute)
+
+    @router.get("/page")
+    @cache_response(ttl_seconds=3600)
+    async def page():
+        return Response(content=body, media_type="application/json")
+
+    fastapi_app.include_router(router)
+    return fastapi_app
+
+
+async def run(fastapi_app: FastAPI, total: int):
+    transport = httpx.ASGITransport(app=fastapi_app)
+    headers = {"Accept-Encoding": "gzip, br"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/page", headers=headers)
+        for _ in range(20):
+            await client.get("/page", headers=headers)
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        for _ in range(total):
+            await client.get("/page", headers=headers)
+        elapsed = time.perf_counter() - started
+        cpu_ms = (time.process_time() - cpu_started) / total * 1000
+    return cpu_ms, total / elapsed, response.headers.get("content-encoding")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    body = page_body()
+    variants = compress_variants(body)
+    print(f"body {len(body)} bytes; " + ", ".join(f"{name} {len(data)} bytes" for name, data in variants.items()))
+    print(f"encodings available: {', '.join(AVAILABLE_ENCODINGS)}\n")
+
+    results = {}
+    for name, build in (("before (GZipMiddleware)", build_before), ("after (precompressed)", build_after)):
+        cpu_ms, rps, encoding = asyncio.run(run(build(body), args.requests))
+        results[name] = cpu_ms
+        print(f"{name:<26}{cpu_ms:>8.3f} ms CPU/request{rps:>10.0f} req/s  ({encoding})")
+
+    before, after = results.values()
+    print(f"{'CPU reduction':<26}{before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
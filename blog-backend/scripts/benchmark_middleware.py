@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+中间件开销基准测试
+
+在同一进程内（httpx ASGITransport，不经过网络）对一个空接口发起请求，对比：
+- before: 原来的两个 @app.middleware("http") 中间件（BaseHTTPMiddleware）；
+- after:  纯 ASGI 的 RealIPMiddleware 与 ViewCountMiddleware。
+两组都带有相同的 GZip 中间件，输出每秒请求数。
+
+用法:
+    python scripts/benchmark_middleware.py [--requests 20000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+
+from app.core.config import settings
+from app.middleware import RealIPMiddleware, ViewCountMiddleware
+
+
+def build_before() -> FastAPI:
+    """原实现：两个 BaseHTTPMiddleware（浏览量计数中只保留路径匹配部分）"""
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+    @app.middleware("http")
+    async def get_real_ip(request: Request, call_next):
+        x_client_ip = request.headers.get("X-Client-IP")
+        x_real_ip = request.headers.get("X-Real-IP")
+        x_forwarded_for = request.headers.get("X-Forwarded-For")
+        if x_client_ip:
+            real_ip = x_client_ip
+        elif x_real_ip:
+            real_ip = x_real_ip
+        elif x_forwarded_for:
+            real_ip = x_forwarded_for.split(',')[0].strip()
+        else:
+            real_ip = request.client.host
+        request.state.real_ip = real_ip
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def add_view_count(request: Request, call_next):
+        response = await call_next(request)
+        if request.method == "GET" and response.status_code == 200:
+            path = request.url.path
+            re.match(rf"{settings.API_V1_STR}/articles/(\d+)$", path) \
+                or re.match(rf"{settings.API_V1_STR}/articles/by-slug/([\w-]+)$", path)
+        return response
+
+    return app
+
+
+def build_after() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    app.add_middleware(ViewCountMiddleware)
+    app.add_middleware(RealIPMiddleware)
+    return app
+
+
+def add_endpoint(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"X-Forwarded-For": "203.0.113.7, 10.0.0.1"}
+        # 预热
+        for _ in range(100):
+            await client.get("/ping", headers=headers)
+
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping", headers=headers)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {}
+    for name, build in (("before (BaseHTTPMiddleware)", build_before), ("after (pure ASGI)", build_after)):
+        results[name] = asyncio.run(run(add_endpoint(build()), args.requests, args.concurrency))
+        print(f"{name:<30}{results[name]:>10.0f} req/s")
+
+    before, after = results.values()
+    print(f"{'speedup':<30}{after / before:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+响应序列化基准测试
+
+用 100 篇文章（与 read_articles 返回的结构相同）对比三种序列化方式：
+- default:  FastAPI 按 response_model 校验 + 标准库 json 编码（JSONResponse）；
+- orjson:   同样校验，使用 FastJSONResponse 编码；
+- trusted:  @trusted_response，缓存的 TypeAdapter 在 pydantic-core 中一次完成转换与编码。
+先单独测量序列化耗时，再在进程内（httpx ASGITransport）测量整个请求的耗时，
+并确认三种方式输出的 JSON 内容一致。
+
+用法:
+    python scripts/benchmark_serialization.py [--articles 100] [--rounds 300]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse, serialize_trusted, trusted_response
+from app.schemas.article import ArticleList
+from app.schemas.user import UserBriefResponse
+
+
+def synthetic_articles(count: int):
+    """与 read_articles 相同形式的文章字典（作者为已校验的 UserBriefResponse）"""
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    articles = []
+    for i in range(1, count + 1):
+        articles.append({
+            "id": i,
+            "title": f"文章标题 {i}",
+            "slug": f"article-{i}",
+            "excerpt": "这是一段文章摘要，用于列表页展示。" * 3,
+            "category_id": i % 7 + 1,
+            "tags_list": [{"id": t, "name": f"标签{t}", "description": None} for t in range(1, 4)],
+            "cover_image": f"/static/images/{i}.png",
+            "author_id": 1,
+            "created_at": now - timedelta(days=i),
+            "updated_at": now - timedelta(days=i, hours=-1),
+            "category_name": f"分类{i % 7 + 1}",
+            "view_count": i * 13,
+            "like_count": i * 3,
+            "is_featured": i % 10 == 0,
+            "author": UserBriefResponse(id=1, username="admin", avatar="/images/avatar.png", social_media={"github": "x"}),
+            "category": {"id": i % 7 + 1, "name": f"分类{i % 7 + 1}", "description": None},
+        })
+    return articles
+
+
+def time_it(func, rounds: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def build_app(articles, variant: str) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse if variant == "orjson" else JSONResponse)
+
+    if variant == "trusted":
+        @app.get("/articles", response_model=List[ArticleList])
+        @trusted_response(List[ArticleList])
+        async def read_articles():
+            return articles
+    else:
+        @app.get("/articles", response_model=List[ArticleList])
+        async def read_articles():
+            return articles
+
+    return app
+
+
+async def request_latency(app: FastAPI, rounds: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get("/articles")).content
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await client.get("/articles")
+        return (time.perf_counter() - started) / rounds * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=300)
+    args = parser.parse_args()
+
+    articles = synthetic_articles(args.articles)
+    adapter = TypeAdapter(List[ArticleList])
+
+    def default():
+        # FastAPI 的处理方式：校验、转换为 JSON 兼容对象，再编码
+        content = adapter.dump_python(adapter.validate_python(articles), mode="json")
+        return JSONResponse(content).body
+
+    def with_orjson():
+        content = adapter.dump_python(adapter.validate_python(articles), mode="json")
+        return FastJSONResponse(content).body
+
+    def trusted():
+        return serialize_trusted(List[ArticleList], articles)
+
+    print(f"{args.articles} articles, {args.rounds} rounds\n")
+    print(f"{'variant':<10}{'serialize ms':>14}{'request ms':>14}{'bytes':>10}")
+    bodies = {}
+    for name, func in (("default", default), ("orjson", with_orjson), ("trusted", trusted)):
+        serialize_ms = time_it(func, args.rounds)
+        request_ms, body = asyncio.run(request_latency(build_app(articles, name), args.rounds))
+        bodies[name] = body
+        print(f"{name:<10}{serialize_ms:>14.3f}{request_ms:>14.3f}{len(body):>10}")
+
+    decoded = {name: json.loads(body) for name, body in bodies.items()}
+    print(f"\nidentical JSON: {decoded['default'] == decoded['orjson'] == decoded['trusted']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+为已有的上传文件生成预压缩版本
+
+新上传的文本类文件（SVG、TXT、PDF 等）在上传后自动生成 .br / .gz 文件；
+本脚本为此前上传的文件补充生成，已有压缩版本的文件默认跳过。
+
+用法:
+    python scripts/precompress_static.py [--dir static] [--force]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.compression import SIBLING_SUFFIXES, is_precompressible, write_precompressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=settings.STATIC_FILES_DIR, help="静态文件目录")
+    parser.add_argument("--force", action="store_true", help="重新生成已有的压缩版本")
+    args = parser.parse_args()
+
+    processed = skipped = original_bytes = saved_bytes = 0
+    for root, _, names in os.walk(args.dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if not is_precompressible(path):
+                continue
+            if not args.force and any(os.path.exists(path + suffix) for suffix in SIBLING_SUFFIXES.values()):
+                skipped += 1
+                continue
+            written = write_precompressed(path)
+            processed += 1
+            if written:
+                size = os.path.getsize(path)
+                original_bytes += size
+                saved_bytes += size - min(written.values())
+                print(f"{path}: {size} -> " + ", ".join(f"{enc} {length}" for enc, length in written.items()))
+
+    print(f"\nprocessed {processed}, skipped {skipped}, smallest variants save {saved_bytes} of {original_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+按路由汇总请求追踪的 span
+
+读取 TRACING_EXPORTER=jsonl 导出的文件，对每个路由（根 span）列出请求数和延迟，
+以及其下各类 span（cache.get、db.query、db.commit、HTTP POST openrouter.ai 等）
+在每个请求中的平均次数、平均耗时和占请求耗时的比例，用于找出写路径中最慢的部分。
+嵌套的 span（如 IPLocationService.get_location 中的 cache.get）同时计入自身和外层，比例之和可能超过 100%。
+
+用法:
+    python scripts/trace_report.py [--file logs/traces.jsonl] [--route POST] [--top 10]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=settings.TRACING_JSONL_PATH, help="span 文件")
+    parser.add_argument("--route", default="", help="只显示名称包含该字符串的路由，如 POST 或 /comments")
+    parser.add_argument("--top", type=int, default=10, help="每个路由显示的 span 类别数")
+    args = parser.parse_args()
+
+    spans_by_trace = defaultdict(list)
+    with open(args.file, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                spans_by_trace[span["trace_id"]].append(span)
+
+    # 路由 -> 根 span 耗时列表；路由 -> span 名称 -> [次数, 总耗时]
+    route_durations = defaultdict(list)
+    route_legs = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+    for spans in spans_by_trace.values():
+        ids = {span["span_id"] for span in spans}
+        for root in spans:
+            if root["kind"] != "server" or root["parent_id"] in ids:
+                continue
+            if args.route not in root["name"]:
+                continue
+            route_durations[root["name"]].append(root["duration_ms"])
+            for span in spans:
+                if span is not root:
+                    leg = route_legs[root["name"]][span["name"]]
+                    leg[0] += 1
+                    leg[1] += span["duration_ms"]
+
+    routes = sorted(route_durations, key=lambda name: -sum(route_durations[name]))
+    for route in routes:
+        durations = route_durations[route]
+        requests = len(durations)
+        mean = sum(durations) / requests
+        print(f"\n{route}: {requests} 个请求, 平均 {mean:.1f}ms, p95 {percentile(durations, 0.95):.1f}ms")
+        legs = sorted(route_legs[route].items(), key=lambda item: -item[1][1])
+        for name, (count, total) in legs[:args.top]:
+            print(
+                f"  {name:<48} {count / requests:6.1f} 次/请求 "
+                f"{total / requests:9.2f}ms/请求 {total / sum(durations) * 100:6.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+测试配置
+
+app 的配置在导入时读取环境变量，因此在导入 app 之前设置：使用进程内缓存（不需要 Redis），
+数据库使用临时目录中的 SQLite 文件（同步和异步引擎访问同一个文件），另一个文件作为只读副本，
+测试不会访问开发数据库。
+"""
+import os
+import tempfile
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+DATABASE_DIR = tempfile.mkdtemp(prefix="blog-tests-")
+
+os.environ["USE_REDIS_CACHE"] = "false"
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_DIR}/primary.db"
+os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{DATABASE_DIR}/replica.db"
+
+# 先导入服务包，避免模块间的循环导入
+import app.services  # noqa: E402,F401
+# 导入模型包以将所有模型注册到 Base.metadata，create_all 才会创建全部表
+import app.models  # noqa: E402,F401
+from app.core.database import Base, engine  # noqa: E402
+from app.services import unified_cache_service  # noqa: E402
+from app.services.cache_invalidation_bus import CacheInvalidationBus  # noqa: E402
+from app.services.cache_service import BoundedTTLCache  # noqa: E402
+from app.services.redis_cache_service import RedisCacheService  # noqa: E402
+from app.services.unified_cache_service import UnifiedCacheService  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database():
+    """Empty tables in the primary database and an empty cache."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    UnifiedCacheService.clear()
+    yield engine
+    UnifiedCacheService.clear()
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    """UnifiedCacheService as with USE_REDIS_CACHE=true; yields the published invalidation events."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(RedisCacheService, "_client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(RedisCacheService, "_async_client", fakeredis.aioredis.FakeRedis(server=server))
+
+    l1 = BoundedTTLCache(max_items=100, max_bytes=1024 * 1024, size_of=len)
+    monkeypatch.setattr(unified_cache_service, "ActiveCacheService", RedisCacheService)
+    monkeypatch.setattr(unified_cache_service, "_raw_backend", True)
+    monkeypatch.setattr(unified_cache_service, "_l1_cache", l1)
+    monkeypatch.setattr(unified_cache_service, "_local_cache", l1)
+
+    events = []
+
+    async def apublish(kind, value=None):
+        events.append((kind, value))
+
+    monkeypatch.setattr(CacheInvalidationBus, "publish", lambda kind, value=None: events.append((kind, value)))
+    monkeypatch.setattr(CacheInvalidationBus, "apublish", apublish)
+    yield events
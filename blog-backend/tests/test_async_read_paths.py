@@ -0,0 +1,215 @@
+"""异步热点读取路径（文章列表、详情、首页、评论列表）与同步服务的结果一致"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.models.article import article_tags
+from app.schemas.article import ArticleList, CategoryResponse, TagResponse
+from app.schemas.article_extended import ArticleWithContent
+from app.services.article_service import ArticleService
+from app.services.comment_service import CommentService
+from app.utils.pagination import PaginationParams
+
+pytestmark = pytest.mark.anyio
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def seeded(database):
+    """Two authors, two categories, two tags, six articles and threaded comments on the first article."""
+    db = SessionLocal()
+    try:
+        alice = models.User(
+            username="alice", email="alice@example.com", hashed_password="x",
+            social_media=json.dumps({"github": "alice"})
+        )
+        bob = models.User(username="bob", email="bob@example.com", hashed_password="x")
+        tech = models.Category(name="tech")
+        life = models.Category(name="life")
+        python = models.Tag(name="python")
+        mysql = models.Tag(name="mysql")
+        db.add_all([alice, bob, tech, life, python, mysql])
+        db.flush()
+
+        articles = []
+        for i in range(6):
+            article = models.Article(
+                title=f"Article {i}", slug=f"article-{i}", content=f"Content {i}",
+                excerpt=None if i == 1 else f"Excerpt {i}",
+                category_id=[tech.id, life.id, None][i % 3], author_id=[alice.id, bob.id][i % 2],
+                is_featured=i % 2 == 0, view_count=i, like_count=i * 2,
+                created_at=BASE_TIME + timedelta(days=i)
+            )
+            db.add(article)
+            articles.append(article)
+        db.flush()
+
+        for i, article in enumerate(articles):
+            if i % 2 == 0:
+                db.execute(article_tags.insert().values(article_id=article.id, tag_id=python.id))
+            if i % 3 == 0:
+                db.execute(article_tags.insert().values(article_id=article.id, tag_id=mysql.id))
+
+        for i in range(5):
+            parent = models.Comment(
+                content=f"Comment {i}", article_id=articles[0].id, user_id=[alice.id, bob.id, None][i % 3],
+                anonymous_name="guest" if i % 3 == 2 else None, ip_address="127.0.0.1",
+                is_approved=i != 3, like_count=i % 2, created_at=BASE_TIME + timedelta(minutes=i)
+            )
+            db.add(parent)
+            db.flush()
+            for j in range(2):
+                db.add(models.Comment(
+                    content=f"Reply {i}.{j}", article_id=articles[0].id, parent_id=parent.id,
+                    user_id=[bob.id, None][j], anonymous_name="guest" if j else None, ip_address="127.0.0.1",
+                    is_approved=True, created_at=BASE_TIME + timedelta(minutes=10 + i + j)
+                ))
+        db.commit()
+        yield {"articles": [article.id for article in articles], "categories": {"tech": tech.id, "life": life.id}}
+    finally:
+        db.close()
+
+
+@pytest.fixture
+async def async_db(seeded):
+    async with AsyncSessionLocal() as db:
+        yield db
+    # 连接池中的连接属于本测试的事件循环
+    await async_engine.dispose()
+
+
+def _tags(article):
+    return sorted(
+        (TagResponse.model_validate(tag).model_dump() for tag in article.tags_relationship),
+        key=lambda tag: tag["id"]
+    )
+
+
+def _sync_article_list(article):
+    data = ArticleList.model_validate(article).model_dump()
+    data["tags_list"] = _tags(article)
+    return data
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"category": "tech"},
+    {"tag": "python"},
+    {"is_featured": True},
+    {"category": "tech", "tag": "python"},
+    {"skip": 2, "limit": 3},
+])
+async def test_list_articles_matches_sync(seeded, async_db, filters):
+    result = await ArticleService.alist_articles(async_db, **filters)
+
+    db = SessionLocal()
+    try:
+        category = filters.get("category")
+        expected, _ = ArticleService.get_articles(
+            db,
+            skip=filters.get("skip", 0),
+            limit=filters.get("limit", 10),
+            category_id=seeded["categories"][category] if category else None,
+            tag=filters.get("tag"),
+            featured_only=filters.get("is_featured", False)
+        )
+        expected = [_sync_article_list(article) for article in expected]
+    finally:
+        db.close()
+
+    assert expected
+    assert [ArticleList.model_validate(item).model_dump() for item in result] == expected
+
+
+async def test_list_articles_with_unknown_tag_is_empty(async_db):
+    assert await ArticleService.alist_articles(async_db, tag="missing") == []
+
+
+async def test_get_article_matches_sync(seeded, async_db):
+    db = SessionLocal()
+    try:
+        for article_id in seeded["articles"]:
+            article = ArticleService.get_article_by_id(db, article_id)
+            expected = ArticleWithContent.model_validate(article).model_dump()
+            expected["tags_list"] = _tags(article)
+            expected["category_name"] = article.category.name if article.category else None
+
+            by_id = await ArticleService.aget_article(async_db, article_id=article_id)
+            by_slug = await ArticleService.aget_article(async_db, slug=article.slug)
+            assert ArticleWithContent.model_validate(by_id).model_dump() == expected
+            assert ArticleWithContent.model_validate(by_slug).model_dump() == expected
+    finally:
+        db.close()
+
+    assert await ArticleService.aget_article(async_db, article_id=999) is None
+
+
+async def test_home_matches_sync(seeded, async_db):
+    home = await ArticleService.aget_home(async_db)
+
+    db = SessionLocal()
+    try:
+        latest, _ = ArticleService.get_articles(db, limit=10)
+        featured, _ = ArticleService.get_articles(db, featured_only=True)
+        categories = db.query(models.Category).order_by(models.Category.id).all()
+
+        assert [
+            (item["id"], item["comment_count"], item["tags"], item["category"]) for item in home["articles"]
+        ] == [
+            (
+                article.id,
+                len(article.comments),
+                _tags(article),
+                CategoryResponse.model_validate(article.category).model_dump(exclude={"description"})
+                if article.category else None
+            )
+            for article in latest
+        ]
+        assert sorted(
+            (item["id"], item["name"], item["articleCount"]) for item in home["categories"]
+        ) == [(category.id, category.name, len(category.articles)) for category in categories]
+        assert sorted(item["id"] for item in home["featuredArticles"]) == sorted(article.id for article in featured)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("sort_by", ["newest", "oldest", "most_liked"])
+@pytest.mark.parametrize("page", [1, 2])
+@pytest.mark.parametrize("username", [None, "alice"])
+async def test_comments_match_sync(seeded, async_db, sort_by, page, username):
+    db = SessionLocal()
+    try:
+        current_user = db.query(models.User).filter_by(username=username).first() if username else None
+        params = PaginationParams(page=page, page_size=2)
+        # 绕过缓存直接比较两个实现
+        expected = CommentService.get_comments_by_article.__wrapped__(
+            db=db, article_id=seeded["articles"][0], params=params, sort_by=sort_by, current_user=current_user
+        )
+        result = await CommentService.aget_comments_by_article.__wrapped__(
+            db=async_db, article_id=seeded["articles"][0], params=params, sort_by=sort_by,
+            current_user=current_user
+        )
+    finally:
+        db.close()
+
+    assert result.items
+    assert result.model_dump() == expected.model_dump()
+
+
+async def test_async_comments_share_the_sync_cache_entry(seeded, async_db):
+    article_id = seeded["articles"][0]
+    params = PaginationParams(page=1, page_size=2)
+    result = await CommentService.aget_comments_by_article(db=async_db, article_id=article_id, params=params)
+
+    db = SessionLocal()
+    try:
+        # 删除评论后同步版本仍返回异步版本写入的缓存结果
+        db.query(models.Comment).delete()
+        db.commit()
+        assert CommentService.get_comments_by_article(db=db, article_id=article_id, params=params) == result
+    finally:
+        db.close()
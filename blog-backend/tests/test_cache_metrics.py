@@ -0,0 +1,78 @@
+"""按键前缀的缓存指标：命中（L1 与后端）、未命中、写入、删除、淘汰和写入大小"""
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services import unified_cache_service
+from app.services.cache_metrics import CacheMetrics
+from app.services.cache_service import BoundedTTLCache
+from app.services.unified_cache_service import UnifiedCacheService
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_METRICS_ENABLED", True)
+    CacheMetrics.reset()
+    yield CacheMetrics
+    CacheMetrics.reset()
+
+
+def test_lookups_and_writes_are_counted_per_prefix(database, metrics):
+    UnifiedCacheService.set("article_by_slug:hello", {"title": "Hello"}, 60)
+    assert UnifiedCacheService.get("article_by_slug:hello") == {"title": "Hello"}
+    assert UnifiedCacheService.get("article_by_slug:missing") is None
+    assert UnifiedCacheService.get("comments_by_article:1") is None
+    UnifiedCacheService.delete("article_by_slug:hello")
+
+    prefixes = UnifiedCacheService.get_stats()["prefixes"]
+    assert set(prefixes) == {"article_by_slug", "comments_by_article"}
+    articles = prefixes["article_by_slug"]
+    assert (articles["hits"], articles["misses"], articles["sets"], articles["deletes"]) == (1, 1, 1, 1)
+    assert articles["hit_rate"] == "50.00%"
+    assert articles["avg_value_bytes"] > 0
+    assert articles["get_latency_ms"]["count"] == 2
+    assert articles["set_latency_ms"]["count"] == 1
+    comments = prefixes["comments_by_article"]
+    assert (comments["hits"], comments["misses"], comments["sets"]) == (0, 1, 0)
+
+
+@pytest.mark.anyio
+async def test_hits_are_split_between_l1_and_the_backend(redis_cache, metrics, monkeypatch):
+    monkeypatch.setattr(unified_cache_service, "_l1_prefixes", ("site_settings",))
+    await UnifiedCacheService.aset("site_settings", {"title": "Blog"}, 60)
+    await UnifiedCacheService.aset("comments_by_article:1", [], 60)
+    UnifiedCacheService.clear_local()
+
+    for _ in range(3):
+        await UnifiedCacheService.aget("site_settings")
+        await UnifiedCacheService.aget("comments_by_article:1")
+
+    prefixes = CacheMetrics.get_stats()
+    # 第一次从 Redis 读取并回填 L1，之后命中 L1
+    assert (prefixes["site_settings"]["hits"], prefixes["site_settings"]["l1_hits"]) == (3, 2)
+    assert (prefixes["comments_by_article"]["hits"], prefixes["comments_by_article"]["l1_hits"]) == (3, 0)
+
+    metrics_text = CacheMetrics.render_prometheus()
+    worker = os.getpid()
+    assert f'cache_hits_total{{worker="{worker}",prefix="site_settings",layer="l1"}} 2' in metrics_text
+    assert f'cache_hits_total{{worker="{worker}",prefix="site_settings",layer="backend"}} 1' in metrics_text
+    assert f'cache_hits_total{{worker="{worker}",prefix="comments_by_article",layer="backend"}} 3' in metrics_text
+
+
+def test_l1_evictions_are_counted(redis_cache, metrics, monkeypatch):
+    l1 = BoundedTTLCache(max_items=2, max_bytes=1024 * 1024, size_of=len, on_evict=CacheMetrics.record_eviction)
+    monkeypatch.setattr(unified_cache_service, "_l1_cache", l1)
+    monkeypatch.setattr(unified_cache_service, "_local_cache", l1)
+    monkeypatch.setattr(unified_cache_service, "_l1_all_keys", True)
+
+    for i in range(5):
+        UnifiedCacheService.set(f"articles:{i}", i, 60)
+    assert CacheMetrics.get_stats()["articles"]["evictions"] == 3
+
+
+def test_disabled_metrics_record_nothing(database, metrics, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_METRICS_ENABLED", False)
+    UnifiedCacheService.set("articles:1", 1, 60)
+    UnifiedCacheService.get("articles:1")
+    assert CacheMetrics.get_stats() == {}
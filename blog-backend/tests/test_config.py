@@ -0,0 +1,18 @@
+"""配置从环境变量读取"""
+import pytest
+
+from app.core.config import Settings
+
+
+@pytest.mark.parametrize("value, prefixes", [
+    ("*", ("*",)),
+    ("site_settings,auth:", ("site_settings", "auth:")),
+    (" response: , ,auth:", ("response:", "auth:")),
+])
+def test_cache_l1_prefixes_from_env(monkeypatch, value, prefixes):
+    monkeypatch.setenv("CACHE_L1_PREFIXES", value)
+    assert Settings().cache_l1_prefixes == prefixes
+
+
+def test_cache_l1_prefixes_default():
+    assert Settings().cache_l1_prefixes == ("site_settings", "ip_location:", "auth:", "response:")
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.middleware import RequestMetricsMiddleware
+from app.services.query_inspector import QueryBudgetExceeded, QueryInspector, query_budget
+from app.services.request_metrics import RequestMetrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_INSPECTOR_ENABLED", True)
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+    QueryInspector.reset()
+
+    engine = create_engine("sqlite://")
+    RequestMetrics.instrument_engine(engine)
+
+    def run_queries(count: int) -> None:
+        with engine.connect() as conn:
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+
+    app = FastAPI()
+
+    @app.get("/within-budget")
+    @query_budget(3)
+    def within_budget():
+        run_queries(3)
+        return {"ok": True}
+
+    @app.get("/over-budget")
+    @query_budget(2)
+    def over_budget():
+        run_queries(3)
+        return {"ok": True}
+
+    app.add_middleware(RequestMetricsMiddleware)
+    return TestClient(app)
+
+
+def test_within_budget_passes(client):
+    assert client.get("/within-budget").status_code == 200
+    assert QueryInspector.get_findings("budget_exceeded") == []
+
+
+def test_over_budget_fails_the_request_in_strict_mode(client):
+    # 在发送响应前抛出，测试客户端直接得到异常，而不是先收到 200
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 SQL statements, budget is 2"):
+        client.get("/over-budget")
+
+
+def test_over_budget_returns_500_in_strict_mode(client):
+    client = TestClient(client.app, raise_server_exceptions=False)
+    assert client.get("/over-budget").status_code == 500
+
+
+def test_over_budget_is_reported_when_not_strict(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+    assert client.get("/over-budget").status_code == 200
+    [finding] = QueryInspector.get_findings("budget_exceeded")
+    assert finding["queries"] == 3 and finding["budget"] == 2
+
+
+def test_slow_query_findings_omit_bound_parameters(client, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+    client.get("/within-budget")
+    findings = QueryInspector.get_findings("slow_query")
+    assert findings and all("params" not in finding for finding in findings)
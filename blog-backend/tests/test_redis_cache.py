@@ -0,0 +1,84 @@
+"""两级缓存（进程内 L1 + Redis L2）的标签失效与标签集合清理，使用 fakeredis 代替 Redis"""
+import pytest
+
+from app.core.config import settings
+from app.services import unified_cache_service
+from app.services.cache_invalidation_bus import CacheInvalidationBus
+from app.services.redis_cache_service import TAG_KEY_PREFIX, RedisCacheService
+from app.services.unified_cache_service import UnifiedCacheService
+
+pytestmark = pytest.mark.anyio
+
+RESPONSE_KEY = "response:/api/v1/articles/1?"
+TAGS = ["read_articles", "article:1"]
+
+
+async def _read_through(key: str, data: bytes) -> None:
+    """Store a tagged value, then read it back from Redis into an empty L1 (as another worker would)."""
+    await UnifiedCacheService.aset_bytes(key, data, 60, TAGS)
+    UnifiedCacheService.clear_local()
+    assert await UnifiedCacheService.aget_bytes(key) == data
+    assert unified_cache_service._l1_cache.get(key) == data
+
+
+async def test_tag_invalidation_drops_read_through_l1_entries(redis_cache):
+    await _read_through(RESPONSE_KEY, b"OLD")
+    UnifiedCacheService.invalidate_tags("article:1")
+    assert await UnifiedCacheService.aget_bytes(RESPONSE_KEY) is None
+
+
+async def test_async_tag_invalidation_drops_read_through_l1_entries(redis_cache):
+    await _read_through(RESPONSE_KEY, b"OLD")
+    await UnifiedCacheService.ainvalidate_tags("article:1")
+    assert await UnifiedCacheService.aget_bytes(RESPONSE_KEY) is None
+
+
+async def test_other_workers_drop_read_through_l1_entries(redis_cache):
+    await _read_through(RESPONSE_KEY, b"OLD")
+    await UnifiedCacheService.ainvalidate_tags("article:1")
+    assert (CacheInvalidationBus.KEYS, [RESPONSE_KEY]) in redis_cache
+
+    # 其他 worker 的 L1 中有读穿回填的旧值（不带标签），收到失效事件后删除
+    unified_cache_service._l1_cache.set(RESPONSE_KEY, b"OLD", 30)
+    for kind, value in redis_cache:
+        UnifiedCacheService.apply_invalidation(kind, value)
+    assert unified_cache_service._l1_cache.get(RESPONSE_KEY) is None
+
+
+@pytest.fixture
+def prune_threshold(redis_cache, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_TAG_PRUNE_THRESHOLD", 3)
+    monkeypatch.setattr(RedisCacheService, "_tag_prune_at", {})
+    return 3
+
+
+def _tag_members(tag: str):
+    return RedisCacheService.get_client().smembers(f"{TAG_KEY_PREFIX}{tag}")
+
+
+def test_tag_sets_drop_expired_members(prune_threshold):
+    for i in range(prune_threshold):
+        UnifiedCacheService.set(f"articles:{i}", i, 60, ["read_articles"])
+    # 键过期后仍留在标签集合中
+    RedisCacheService.get_client().delete(*(f"articles:{i}" for i in range(prune_threshold)))
+    assert len(_tag_members("read_articles")) == prune_threshold
+
+    # 集合超过阈值时写入方清除已过期的成员
+    UnifiedCacheService.set("articles:new", "new", 60, ["read_articles"])
+    assert _tag_members("read_articles") == {b"articles:new"}
+
+
+async def test_tag_sets_drop_expired_members_async(prune_threshold):
+    for i in range(prune_threshold):
+        await UnifiedCacheService.aset(f"articles:{i}", i, 60, ["read_articles"])
+    await RedisCacheService.get_async_client().delete(*(f"articles:{i}" for i in range(prune_threshold)))
+
+    await UnifiedCacheService.aset_many({"articles:a": "a", "articles:b": "b"}, 60, ["read_articles"])
+    assert _tag_members("read_articles") == {b"articles:a", b"articles:b"}
+
+
+def test_tag_invalidation_deletes_the_tag_set(redis_cache):
+    UnifiedCacheService.set("articles:1", 1, 60, TAGS)
+    UnifiedCacheService.invalidate_tags("read_articles")
+    assert UnifiedCacheService.get("articles:1") is None
+    assert _tag_members("read_articles") == set()
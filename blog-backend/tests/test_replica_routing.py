@@ -0,0 +1,143 @@
+"""读写分离：GET 读取副本、写入后的粘滞、@use_primary，以及缓存只用主库数据填充"""
+from contextlib import asynccontextmanager
+from typing import List
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import (
+    Base, SessionLocal, async_engine, async_replica_engines, get_async_db, get_db, replica_engines, use_primary
+)
+from app.core.http_cache import ConditionalRoute, cache_response
+from app.middleware import ReplicaRoutingMiddleware
+from app.services.unified_cache_service import cached
+
+
+@cached(prefix="test_category_names", ttl=60)
+def cached_category_names(db: Session) -> List[str]:
+    return [category.name for category in db.query(models.Category).order_by(models.Category.id)]
+
+
+@pytest.fixture
+def databases(database):
+    """The primary holds the category "primary", the replica (lagging behind) holds "replica"."""
+    replica = replica_engines[0]
+    Base.metadata.drop_all(replica)
+    Base.metadata.create_all(replica)
+    for bind, name in [(database, "primary"), (replica, "replica")]:
+        with Session(bind) as db:
+            db.add(models.Category(name=name))
+            db.commit()
+    yield
+
+
+@pytest.fixture
+def app(databases):
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # 连接池中的异步连接属于测试客户端的事件循环
+        for db_engine in [async_engine] + async_replica_engines:
+            await db_engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/categories")
+    def list_categories(db: Session = Depends(get_db)):
+        return [category.name for category in db.query(models.Category).order_by(models.Category.id)]
+
+    @app.get("/async-categories")
+    async def list_categories_async(db: AsyncSession = Depends(get_async_db)):
+        return list((await db.execute(select(models.Category.name).order_by(models.Category.id))).scalars())
+
+    @app.get("/primary-categories")
+    @use_primary
+    def list_primary_categories(db: Session = Depends(get_db)):
+        return [category.name for category in db.query(models.Category).order_by(models.Category.id)]
+
+    @app.get("/cached-categories")
+    def list_cached_categories(db: Session = Depends(get_db)):
+        return cached_category_names(db)
+
+    @app.post("/categories")
+    def create_category(name: str, db: Session = Depends(get_db)):
+        db.add(models.Category(name=name))
+        db.commit()
+        return {"ok": True}
+
+    router = APIRouter(route_class=ConditionalRoute)
+
+    @router.get("/response-cached-categories")
+    @cache_response(ttl_seconds=60)
+    def list_response_cached_categories(db: Session = Depends(get_db)):
+        return [category.name for category in db.query(models.Category).order_by(models.Category.id)]
+
+    app.include_router(router)
+    app.add_middleware(ReplicaRoutingMiddleware)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+def test_reads_go_to_the_replica(client):
+    assert client.get("/categories").json() == ["replica"]
+    assert client.get("/async-categories").json() == ["replica"]
+
+
+def test_use_primary_reads_the_primary(client):
+    assert client.get("/primary-categories").json() == ["primary"]
+
+
+def test_writes_pin_the_client_to_the_primary(app, client):
+    response = client.post("/categories", params={"name": "new"})
+    assert "db_last_write=1" in response.headers["set-cookie"]
+
+    # 写入的客户端携带 Cookie，读到自己的写入
+    assert client.get("/categories").json() == ["primary", "new"]
+    assert client.get("/async-categories").json() == ["primary", "new"]
+    assert "set-cookie" not in client.get("/categories").headers
+
+    # 其他客户端仍然读取副本
+    with TestClient(app) as other:
+        assert other.get("/categories").json() == ["replica"]
+
+    with Session(replica_engines[0]) as db:
+        assert [category.name for category in db.query(models.Category)] == ["replica"]
+    with SessionLocal() as db:
+        assert [category.name for category in db.query(models.Category)] == ["primary", "new"]
+
+
+def test_cached_results_are_filled_from_the_primary(app, client):
+    assert client.get("/cached-categories").json() == ["primary"]
+    response = client.get("/response-cached-categories")
+    assert response.json() == ["primary"]
+    assert response.headers["x-cache"] == "MISS"
+
+
+def test_clients_that_wrote_bypass_the_cache(app, client):
+    with TestClient(app) as other:
+        assert other.get("/cached-categories").json() == ["primary"]
+        assert other.get("/response-cached-categories").json() == ["primary"]
+
+        client.post("/categories", params={"name": "new"})
+
+        # 写入的客户端不使用缓存，读到自己的写入，并用主库数据更新缓存
+        assert client.get("/cached-categories").json() == ["primary", "new"]
+        response = client.get("/response-cached-categories")
+        assert response.json() == ["primary", "new"]
+        assert response.headers["x-cache"] == "MISS"
+
+        # 其他客户端读取更新后的缓存
+        assert other.get("/cached-categories").json() == ["primary", "new"]
+        response = other.get("/response-cached-categories")
+        assert response.json() == ["primary", "new"]
+        assert response.headers["x-cache"] == "HIT"
@@ -0,0 +1,91 @@
+"""按路由的请求指标：SQL 语句计数、worker 标签，以及 /metrics 的访问控制（抓取令牌、管理员、匿名）"""
+import os
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.core.database import engine, get_db, replica_engines
+from app.middleware import RequestMetricsMiddleware
+from app.routers.metrics import router as metrics_router
+from app.services.request_metrics import RequestMetrics
+
+METRICS_TOKEN = "test-metrics-token"
+AUTH = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", METRICS_TOKEN)
+    for db_engine in [engine] + replica_engines:
+        RequestMetrics.instrument_engine(db_engine)
+    RequestMetrics.reset()
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int, db: Session = Depends(get_db)):
+        for _ in range(item_id):
+            db.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    app.include_router(metrics_router)
+    app.add_middleware(RequestMetricsMiddleware)
+    yield TestClient(app)
+    RequestMetrics.reset()
+
+
+def test_metrics_are_labelled_with_the_worker(client):
+    client.get("/items/1")
+    worker = str(os.getpid())
+
+    samples = [line for line in client.get("/metrics", headers=AUTH).text.splitlines() if not line.startswith("#")]
+    assert samples and all(f'{{worker="{worker}",' in sample for sample in samples)
+
+    routes = client.get("/metrics/routes", headers=AUTH).json()
+    assert routes["worker"] == worker
+    assert routes["routes"]["GET /items/{item_id}"]["requests"] == 1
+
+
+def test_sql_statements_are_counted_per_route(client):
+    client.get("/items/2")
+    client.get("/items/3")
+
+    stats = client.get("/metrics/routes", headers=AUTH).json()["routes"]["GET /items/{item_id}"]
+    assert stats["requests"] == 2
+    assert stats["queries"]["count"] == 2
+    assert stats["queries"]["avg"] == 2.5
+    assert stats["queries"]["max"] == 3
+
+    metrics = client.get("/metrics", headers=AUTH).text
+    labels = f'worker="{os.getpid()}",route="/items/{{item_id}}",method="GET"'
+    assert f"http_request_db_queries_sum{{{labels}}} 5" in metrics
+    assert f"http_request_db_queries_count{{{labels}}} 2" in metrics
+
+
+def _login(role: str) -> dict:
+    with Session(engine) as db:
+        db.add(models.User(username=role, email=f"{role}@example.com", hashed_password="x", role=role))
+        db.commit()
+    return {"Authorization": f"Bearer {security.create_access_token(data={'sub': role})}"}
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/metrics/routes"])
+def test_metrics_require_the_token_or_an_admin(client, path):
+    assert client.get(path, headers=AUTH).status_code == 200
+    assert client.get(path, headers=_login("admin")).status_code == 200
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong-token"}).status_code == 401
+    assert client.get(path, headers=_login("user")).status_code == 403
+
+
+def test_metrics_token_is_rejected_when_not_configured(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 401
+    assert client.get("/metrics", headers=AUTH).status_code == 401
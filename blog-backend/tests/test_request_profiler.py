@@ -0,0 +1,88 @@
+"""单个请求分析：管理员按需触发，结果按类别汇总耗时并输出 folded 调用栈"""
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import security
+from app.core.config import settings
+from app.core.database import engine
+from app.middleware import ProfilerMiddleware
+from app.routers.admin import router as admin_router
+
+
+def _login(role: str) -> dict:
+    with Session(engine) as db:
+        db.add(models.User(username=role, email=f"{role}@example.com", hashed_password="x", role=role))
+        db.commit()
+    return {"Authorization": f"Bearer {security.create_access_token(data={'sub': role})}"}
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_INTERVAL_MS", 1)
+
+    app = FastAPI()
+
+    @app.get("/busy")
+    def busy():
+        # 约 50 毫秒的 SQL，在线程池中执行
+        deadline = time.perf_counter() + 0.05
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    app.include_router(admin_router)
+    app.add_middleware(ProfilerMiddleware)
+    return TestClient(app)
+
+
+def test_admins_get_a_profile_of_the_request(client):
+    admin = _login("admin")
+    response = client.get("/busy", headers={**admin, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    [summary] = client.get("/admin/profiles", headers=admin).json()
+    assert summary["id"] == profile_id
+    assert (summary["method"], summary["path"], summary["status"]) == ("GET", "/busy", 200)
+
+    profile = client.get(f"/admin/profiles/{profile_id}", headers=admin).json()
+    assert profile["samples"] > 0
+    assert profile["categories_ms"]["sql"] > 0
+
+    folded = client.get(f"/admin/profiles/{profile_id}", params={"format": "folded"}, headers=admin).text
+    assert "tests/test_request_profiler.py:busy" in folded
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+
+
+def test_the_query_flag_also_triggers_profiling(client):
+    response = client.get("/busy", params={"__profile": "1"}, headers=_login("admin"))
+    assert "x-profile-id" in response.headers
+
+
+@pytest.mark.parametrize("headers", [
+    {"X-Profile": "1"},
+    {"X-Profile": "1", "Authorization": "Bearer forged.token.value"},
+])
+def test_requests_without_an_admin_token_are_not_profiled(client, headers):
+    response = client.get("/busy", headers=headers)
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+def test_non_admins_are_not_profiled(client):
+    response = client.get("/busy", headers={**_login("user"), "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+def test_admin_requests_without_the_flag_are_not_profiled(client):
+    admin = _login("admin")
+    assert "x-profile-id" not in client.get("/busy", headers=admin).headers
+    assert "x-profile-id" not in client.get("/busy", headers={**admin, "X-Profile": "0"}).headers
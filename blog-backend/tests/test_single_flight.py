@@ -0,0 +1,62 @@
+"""跨 worker 的 single-flight：等待其他 worker 的结果，以及持锁方没有写入结果时立即接手"""
+import time
+
+import anyio
+import pytest
+
+from app.core.config import settings
+from app.services.single_flight import LOCK_KEY_PREFIX, SingleFlight
+from app.services.unified_cache_service import UnifiedCacheService
+
+pytestmark = pytest.mark.anyio
+
+KEY = "articles:missing"
+LOCK_NAME = f"{LOCK_KEY_PREFIX}{KEY}"
+
+
+@pytest.fixture
+def distributed(redis_cache, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SINGLE_FLIGHT_DISTRIBUTED", True)
+    monkeypatch.setattr(settings, "CACHE_LOCK_TTL_MS", 10000)
+    monkeypatch.setattr(settings, "CACHE_LOCK_POLL_MS", 10)
+    monkeypatch.setattr(SingleFlight, "_stats", dict.fromkeys(SingleFlight._stats, 0))
+
+
+async def _load_while_another_worker_holds_the_lock(result):
+    """Run SingleFlight for KEY while "another worker" holds the lock, finishes with `result` and releases it."""
+    token = await UnifiedCacheService.aacquire_lock(LOCK_NAME, settings.CACHE_LOCK_TTL_MS)
+    loads = []
+
+    async def loader():
+        loads.append(time.monotonic())
+        return "loaded"
+
+    async def other_worker():
+        await anyio.sleep(0.05)
+        if result is not None:
+            await UnifiedCacheService.aset(KEY, result, 60)
+        await UnifiedCacheService.arelease_lock(LOCK_NAME, token)
+
+    started = time.monotonic()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(other_worker)
+        value = await SingleFlight.run(KEY, loader)
+    return value, loads, time.monotonic() - started
+
+
+async def test_waiters_reuse_the_other_workers_result(distributed):
+    value, loads, _ = await _load_while_another_worker_holds_the_lock("cached")
+    assert value == "cached"
+    assert loads == []
+    assert SingleFlight.get_stats()["remote_reused"] == 1
+
+
+async def test_waiters_take_over_when_the_lock_is_released_without_a_result(distributed):
+    value, loads, elapsed = await _load_while_another_worker_holds_the_lock(None)
+    assert value == "loaded"
+    assert len(loads) == 1
+    # 不等到锁过期（10 秒）
+    assert elapsed < 1
+    assert SingleFlight.get_stats()["lock_timeouts"] == 0
+    # 接手的 worker 计算完成后释放锁
+    assert await UnifiedCacheService.aacquire_lock(LOCK_NAME, settings.CACHE_LOCK_TTL_MS) is not None
@@ -0,0 +1,91 @@
+"""请求追踪：根 span 与缓存、SQL、外部 HTTP 和 @traced 子 span 写入 JSONL"""
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.middleware import TracingMiddleware
+from app.services.tracing import Tracer, TracingTransport, async_http_client, traced
+from app.services.unified_cache_service import UnifiedCacheService
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@traced("test.lookup")
+def lookup() -> str:
+    return "found"
+
+
+@pytest.fixture
+def traces(database, tmp_path, monkeypatch):
+    """Path of the JSONL file the spans of TracingMiddleware requests are exported to."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "TRACING_EXPORTER", "jsonl")
+    monkeypatch.setattr(settings, "TRACING_JSONL_PATH", str(path))
+    yield path
+    Tracer.shutdown()
+
+
+@pytest.fixture
+def client(traces):
+    engine = create_engine("sqlite://")
+    Tracer.instrument_engine(engine)
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        UnifiedCacheService.get(f"item:{item_id}")
+        UnifiedCacheService.set(f"item:{item_id}", item_id, 60)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        async with async_http_client(transport=TracingTransport(upstream)) as http:
+            await http.get("https://upstream.example.com/status?q=1")
+        return {"id": item_id, "lookup": lookup()}
+
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app)
+
+
+def _exported_spans(path):
+    # 关闭导出线程，等待排队的 span 写入文件
+    Tracer.shutdown()
+    return [orjson.loads(line) for line in path.read_bytes().splitlines()]
+
+
+def test_request_spans_reach_the_jsonl_exporter(client, traces):
+    response = client.get("/items/1", headers={"traceparent": TRACEPARENT})
+    assert response.headers["x-trace-id"] == TRACE_ID
+
+    spans = {span["name"]: span for span in _exported_spans(traces)}
+    assert set(spans) == {
+        "GET /items/{item_id}", "cache.get", "cache.set", "db.query", "HTTP GET upstream.example.com", "test.lookup"
+    }
+    root = spans.pop("GET /items/{item_id}")
+    assert root["kind"] == "server"
+    assert root["attributes"]["http.route"] == "/items/{item_id}"
+    assert root["attributes"]["http.status_code"] == 200
+    assert all(span["trace_id"] == TRACE_ID for span in spans.values())
+    assert all(span["parent_id"] == root["span_id"] for span in spans.values())
+
+    assert spans["cache.get"]["attributes"]["cache.hit"] == "miss"
+    assert spans["db.query"]["attributes"]["db.statement"] == "SELECT 1"
+    http_span = spans["HTTP GET upstream.example.com"]
+    assert http_span["attributes"]["http.url"] == "https://upstream.example.com/status"
+    assert http_span["attributes"]["http.status_code"] == 200
+
+
+def test_unsampled_requests_are_not_exported(client, traces, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+    response = client.get("/items/1")
+    assert response.status_code == 200
+    assert "x-trace-id" not in response.headers
+    Tracer.shutdown()
+    assert not traces.exists()